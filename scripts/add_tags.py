@@ -1,27 +1,9 @@
-import csv
+from enrich import enrich, load_source, report
 
-# Read model-to-tag mapping from fal-tags2.csv
-model_to_tag = {}
-with open('fal-tags2.csv', newline='', encoding='utf-8') as f:
-    reader = csv.reader(f)
-    for row in reader:
-        if len(row) >= 2:
-            model_id, tag = row[0].strip(), row[1].strip()
-            model_to_tag[model_id] = tag
-
-# Read fal-prices-plain2.csv, append Tag column and write to new file
+# Append a Tag column to fal-prices-plain2.csv from the model-to-tag mapping
+# in fal-tags2.csv (see enrich.py for several columns in one pass)
 input_file = 'fal-prices-plain2.csv'
 output_file = 'fal-prices-plain2.with-tags.csv'
 
-with open(input_file, newline='', encoding='utf-8') as fin, \
-     open(output_file, 'w', newline='', encoding='utf-8') as fout:
-    reader = csv.DictReader(fin)
-    fieldnames = reader.fieldnames + ['Tag']
-    writer = csv.DictWriter(fout, fieldnames=fieldnames)
-    writer.writeheader()
-    for row in reader:
-        model_id = row.get('Model ID')
-        tag = model_to_tag.get(model_id, "")
-        row['Tag'] = tag
-        writer.writerow(row)
-
+unmatched = enrich(input_file, output_file, [load_source('Tag=fal-tags2.csv')], key_column='Model ID')
+report(unmatched)
@@ -0,0 +1,52 @@
+"""
+Atomic file replacement shared by the scripts that rewrite their output,
+possibly in place (enrich.py, process_units.py).
+
+    with atomic_write(output_path) as fout:
+        with open(input_path, ...) as fin:
+            ...
+
+The content goes to a temp file next to the target, which is fsynced and
+renamed over the target only when the block exits without an error, so an
+interrupted run leaves the old file intact. The temp file gets the mode of
+the file it replaces (mkstemp would otherwise leave it at 0600). Open the
+input inside the block: it must be closed before the rename, since Windows
+cannot replace a file that is still open.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Iterator
+
+
+@contextmanager
+def atomic_write(path: str, encoding: str = 'utf-8', newline: str = '') -> Iterator[IO[str]]:
+    """Text file that replaces path when the block exits; on error it is removed and path left as it was"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding, newline=newline) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            mode = os.stat(path).st_mode & 0o7777
+        else:
+            # What a plain open() would have created
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    # Persist the rename itself
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
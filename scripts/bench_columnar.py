@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Compare the row-oriented JSON that the web app imports today with the
+columnar JSON and binary layouts (csv_to_json.py --format columns): file
+size, gzipped size and parse time. Parse time includes turning the table
+back into row objects, since that is what the app works with. That every
+format round-trips to the same rows is checked by tests/test_columnar.py.
+
+Parse times are measured in Python and, if `node` is on the PATH, for
+JSON.parse in Node as well.
+
+Usage:
+    python bench_columnar.py [data/prices-v1.csv] [--repeat 50]
+"""
+
+import os
+import gzip
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+import columnar
+from csv_to_json import CSVToJSONConverter
+
+NODE_TIMER = """
+const fs = require('fs');
+const [path, kind, repeat] = process.argv.slice(1);
+const text = fs.readFileSync(path, 'utf8');
+function toRows(table) {
+  const names = Object.keys(table.columns);
+  const columns = names.map(name => {
+    const column = table.columns[name];
+    return Array.isArray(column) ? column : column.codes.map(code => column.dictionary[code]);
+  });
+  const rows = new Array(table.length);
+  for (let i = 0; i < table.length; i++) {
+    const row = {};
+    for (let c = 0; c < names.length; c++) row[names[c]] = columns[c][i];
+    rows[i] = row;
+  }
+  return rows;
+}
+let best = Infinity;
+for (let r = 0; r < Number(repeat); r++) {
+  const started = process.hrtime.bigint();
+  const data = JSON.parse(text);
+  if (kind === 'columns') toRows(data);
+  best = Math.min(best, Number(process.hrtime.bigint() - started) / 1e6);
+}
+console.log(best);
+"""
+
+
+def best_time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def node_time(path, kind, repeat):
+    node = shutil.which('node')
+    if not node:
+        return None
+    output = subprocess.run([node, '-e', NODE_TIMER, path, kind, str(repeat)],
+                            capture_output=True, text=True, check=True).stdout
+    return float(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare row JSON with columnar JSON and binary')
+    parser.add_argument('catalog', nargs='?', default='data/prices-v1.csv', help='Price catalog CSV (default: data/prices-v1.csv)')
+    parser.add_argument('--repeat', type=int, default=50, help='Parses per format, best is reported (default: 50)')
+    args = parser.parse_args()
+
+    converter = CSVToJSONConverter()
+    headers, data_rows = converter.read_csv(Path(args.catalog))
+    rows = converter.convert_to_objects(headers, data_rows)
+    table = columnar.build_columns(headers, converter.convert_to_array(headers, data_rows))
+
+    encoded = {
+        'rows': json.dumps(rows, ensure_ascii=False).encode('utf-8'),
+        'columns': json.dumps(table, ensure_ascii=False).encode('utf-8'),
+        'binary': columnar.encode_binary(table),
+    }
+    decoders = {
+        'rows': lambda data: json.loads(data),
+        'columns': lambda data: columnar.table_rows(json.loads(data)),
+        'binary': lambda data: columnar.table_rows(columnar.decode_binary(data)),
+    }
+
+    print(f'Catalog: {len(rows)} rows, {len(headers)} columns from {args.catalog}')
+    dictionary_columns = [name for name, column in table['columns'].items() if isinstance(column, dict)]
+    print(f'Dictionary-encoded: {", ".join(dictionary_columns)}')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, data in encoded.items():
+            python_ms = best_time(lambda: decoders[name](data), args.repeat) * 1000
+            node_ms = None
+            if name != 'binary':
+                path = os.path.join(tmp, f'{name}.json')
+                with open(path, 'wb') as f:
+                    f.write(data)
+                node_ms = node_time(path, name, args.repeat)
+            node = f'{node_ms:7.2f} ms' if node_ms is not None else '      n/a'
+            print(f'{name:>8}: {len(data) / 1024:7.1f} KiB, gzip {len(gzip.compress(data, 9)) / 1024:6.1f} KiB, '
+                  f'parse python {python_ms:7.2f} ms, node {node}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark CostEngine (cost_engine.py) against a per-row Python loop over
+the catalog. That both produce the same costs is checked by
+tests/test_cost_engine.py.
+
+Usage:
+    python bench_cost.py [data/prices-v1.csv] [--repeat 200] [--top 10]
+"""
+
+import csv
+import time
+import argparse
+
+from cost_engine import PROFILES, CostEngine, loop_costs
+
+
+def engine_top(engine, usage, tag, option, k):
+    return engine.top_k(usage, k, tag, option)
+
+
+def loop_top(rows, usage, tag, option, k):
+    return sorted(loop_costs(rows, usage, tag, option), key=lambda estimate: estimate.cost)[:k]
+
+
+def run(name, fn, target, repeat, k):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for usage, tag, option in PROFILES:
+            fn(target, usage, tag, option, k)
+    elapsed = time.perf_counter() - started
+    queries = repeat * len(PROFILES)
+    print(f'{name:>6}: {queries / elapsed:10.0f} queries/s ({elapsed / queries * 1e6:.1f} us/query)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the vectorized cost engine')
+    parser.add_argument('catalog', nargs='?', default='data/prices-v1.csv', help='Price catalog CSV (default: data/prices-v1.csv)')
+    parser.add_argument('--repeat', type=int, default=200, help='Passes over the usage profiles per timing run (default: 200)')
+    parser.add_argument('--top', type=int, default=10, help='Results per query (default: 10)')
+    args = parser.parse_args()
+
+    with open(args.catalog, 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+
+    started = time.perf_counter()
+    engine = CostEngine(rows)
+    print(f'Catalog: {len(rows)} rows, {len(engine)} prices, {len(engine.units.names)} units, '
+          f'loaded in {(time.perf_counter() - started) * 1000:.1f} ms')
+
+    run('loop', loop_top, rows, args.repeat, args.top)
+    run('numpy', engine_top, engine, args.repeat, args.top)
+
+
+if __name__ == '__main__':
+    main()
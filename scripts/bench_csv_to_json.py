@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark csv_to_json.py in its default (load everything) mode against
+--stream, --ndjson and --typed on a synthetic price file, reporting wall
+time and peak memory of each run. Every mode runs in its own process.
+That --stream writes the same bytes as the default mode is checked by
+tests/test_csv_to_json.py.
+
+Per-cell conversion cost of clean_value and of the schema converters used
+by --typed is also timed in-process.
+
+Usage:
+    python bench_csv_to_json.py [--rows 1000000] [--keep DIR]
+"""
+
+import os
+import sys
+import csv
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+from itertools import islice
+from pathlib import Path
+
+from csv_to_json import CSVToJSONConverter
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'csv_to_json.py')
+
+HEADERS = ['model_id', 'tag', 'inputs', 'output', 'options', 'bip_units', 'bip_price_usd', 'notes', 'description']
+TAGS = ('text-to-image', 'image-to-video', 'text-to-video', 'text-to-speech', 'image-to-image')
+UNITS = ('runs', 'output seconds', 'compute seconds', 'mega pixels', 'input kilo tokens')
+
+MODES = (
+    ('default', []),
+    ('stream', ['--stream']),
+    ('ndjson', ['--ndjson']),
+    ('typed', ['--stream', '--typed']),
+)
+
+
+def write_synthetic(path, rows):
+    """A price file shaped like data/prices-v1.csv, with some multi-option rows"""
+    rng = random.Random(0)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS)
+        for i in range(rows):
+            tag = TAGS[i % len(TAGS)]
+            inputs, _, output = tag.partition('-to-')
+            if i % 8 == 0:
+                options = '480p\n720p\n1080p'
+                prices = '\n'.join(str(round(rng.uniform(0.01, 0.5), 4)) for _ in range(3))
+            else:
+                options = ''
+                prices = str(round(rng.uniform(0.0001, 0.5), 5))
+            writer.writerow([f'provider-{i % 97}/model-{i}', tag, inputs, output, options,
+                             UNITS[i % len(UNITS)], prices, '', f'Synthetic model number {i} for benchmarking'])
+
+
+def run(args):
+    """Run csv_to_json.py; returns (seconds, peak RSS in MB) of that process alone"""
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, SCRIPT] + args, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - started
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f'csv_to_json.py {args} failed')
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return elapsed, usage.ru_maxrss / scale
+
+
+def time_conversion(source, rows):
+    """Seconds per cell for clean_value and for the inferred per-column converters"""
+    converter = CSVToJSONConverter()
+    reader = converter.iter_csv(Path(source))
+    headers = next(reader)
+    data_rows = list(islice(reader, rows))
+    cells = len(data_rows) * len(headers)
+
+    results = {}
+    for name in ('clean_value', 'typed'):
+        if name == 'typed':
+            converter.infer_schema(headers, data_rows[:converter.sample_size])
+        converters = converter.column_converters(headers)
+        started = time.perf_counter()
+        for row in data_rows:
+            for col_idx, convert in enumerate(converters):
+                convert(row[col_idx])
+        results[name] = (time.perf_counter() - started) / cells
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark csv_to_json.py streaming modes')
+    parser.add_argument('--rows', type=int, default=1000000, help='Rows in the synthetic CSV (default: 1000000)')
+    parser.add_argument('--keep', help='Write the files to this directory and keep them')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.keep or tmp
+        os.makedirs(directory, exist_ok=True)
+        source = os.path.join(directory, 'synthetic-prices.csv')
+        write_synthetic(source, args.rows)
+        print(f'Input: {args.rows} rows, {os.path.getsize(source) / 1e6:.1f} MB')
+
+        outputs = {}
+        for name, flags in MODES:
+            outputs[name] = os.path.join(directory, f'synthetic-{name}.json')
+            elapsed, peak = run([source, outputs[name]] + flags)
+            size = os.path.getsize(outputs[name]) / 1e6
+            print(f'{name:>8}: {elapsed:7.2f} s, peak RSS {peak:8.1f} MB, output {size:.1f} MB')
+
+        for name, seconds in time_conversion(source, min(args.rows, 200000)).items():
+            print(f'{name:>11}: {seconds * 1e9:6.0f} ns/cell')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark enrich.py: N enrichments applied in one pass against N chained
+one-column rewrites of the whole CSV (what add_tags.py and merge_props.py
+used to do, one script per column). Both must produce the same file, or
+the script exits non-zero.
+
+Usage:
+    python bench_enrich.py [--rows 200000] [--sources 3]
+"""
+
+import os
+import csv
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+from enrich import enrich, load_source
+
+
+def write_inputs(directory, rows, sources):
+    """A main CSV plus `sources` side tables, alternating CSV and JSON, each missing some keys"""
+    main = os.path.join(directory, 'prices.csv')
+    with open(main, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['model_id', 'tag', 'bip_units', 'bip_price_usd'])
+        for i in range(rows):
+            writer.writerow([f'provider-{i % 97}/model-{i}', 'text-to-image', 'runs', f'0.{i % 1000:03d}'])
+
+    specs = []
+    for n in range(sources):
+        keys = (f'provider-{i % 97}/model-{i}' for i in range(rows) if i % (n + 7))
+        if n % 2:
+            path = os.path.join(directory, f'side-{n}.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({key: {'value': f'{n}:{key}'} for key in keys}, f)
+            specs.append(f'extra_{n}={path}:value')
+        else:
+            path = os.path.join(directory, f'side-{n}.csv')
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                csv.writer(f).writerows([key, f'{n}:{key}'] for key in keys)
+            specs.append(f'extra_{n}={path}')
+    return main, specs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark single-pass enrichment against chained rewrites')
+    parser.add_argument('--rows', type=int, default=200000, help='Rows in the main CSV (default: 200000)')
+    parser.add_argument('--sources', type=int, default=3, help='Number of side tables (default: 3)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        main_csv, specs = write_inputs(tmp, args.rows, args.sources)
+        started = time.perf_counter()
+        enrichments = [load_source(spec) for spec in specs]
+        load_seconds = time.perf_counter() - started
+        print(f'Input: {args.rows} rows, {os.path.getsize(main_csv) / 1e6:.1f} MB, {len(specs)} side tables '
+              f'loaded in {load_seconds * 1000:.0f} ms')
+
+        chained = os.path.join(tmp, 'chained.csv')
+        shutil.copyfile(main_csv, chained)
+        started = time.perf_counter()
+        for enrichment in enrichments:
+            enrich(chained, chained, [enrichment])
+        chained_seconds = time.perf_counter() - started
+
+        single = os.path.join(tmp, 'single.csv')
+        started = time.perf_counter()
+        unmatched = enrich(main_csv, single, enrichments)
+        single_seconds = time.perf_counter() - started
+
+        with open(chained, 'rb') as a, open(single, 'rb') as b:
+            identical = a.read() == b.read()
+
+        print(f'chained rewrites: {chained_seconds * 1000:8.0f} ms')
+        print(f'     single pass: {single_seconds * 1000:8.0f} ms')
+        print('Unmatched: ' + ', '.join(f'{column} {len(keys)}' for column, keys in unmatched.items()))
+        print(f'Single pass identical to chained: {identical}')
+
+    return 0 if identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
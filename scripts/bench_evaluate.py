@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark the inference formula evaluator (pricing.evaluate).
+
+The throughput of cost lookups over the formulas produced for the corpus
+is measured with a cold and a warm compile cache. That every corpus
+formula compiles and that hand-checked formulas evaluate to the expected
+costs is checked by tests/test_evaluate.py.
+
+Usage:
+    python bench_evaluate.py [fal-prices.json] [--lookups 100000]
+"""
+
+import os
+import json
+import time
+import random
+import argparse
+
+import pricing
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'fal-prices.json')
+
+
+def corpus_formulas(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    formulas = (pricing.create_inference_formula(pricing.strip_html(html)) for html in data.values())
+    return [formula for formula in formulas if formula]
+
+
+def requests_for(formulas, count):
+    """Random (formula, variant, variables) lookups over the corpus formulas"""
+    rng = random.Random(0)
+    compiled = [pricing.compile_formula(formula) for formula in formulas]
+    lookups = []
+    for _ in range(count):
+        formula = rng.choice(compiled)
+        variant = rng.choice(formula.labels) if formula.labels else None
+        variables = {name: rng.randint(1, 20) for name in formula.variables}
+        lookups.append((formula.source, variant, variables))
+    return lookups
+
+
+def run(name, lookups, cold):
+    if cold:
+        pricing.cache_clear()
+    started = time.perf_counter()
+    for formula, variant, variables in lookups:
+        pricing.compile_formula(formula).evaluate(variables, variant)
+    elapsed = time.perf_counter() - started
+    print(f'{name:>6}: {len(lookups) / elapsed:12.0f} lookups/s ({elapsed / len(lookups) * 1e6:.2f} us/lookup)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the formula evaluator')
+    parser.add_argument('corpus', nargs='?', default=DEFAULT_CORPUS, help='JSON of model id to pricing HTML (default: fixtures/fal-prices.json)')
+    parser.add_argument('--lookups', type=int, default=100000, help='Cost lookups per timing run (default: 100000)')
+    args = parser.parse_args()
+
+    formulas = corpus_formulas(args.corpus)
+    print(f'Corpus: {len(formulas)} formulas ({len(set(formulas))} distinct) from {args.corpus}')
+
+    lookups = requests_for(formulas, args.lookups)
+    started = time.perf_counter()
+    for formula in set(formulas):
+        pricing.compile_formula.__wrapped__(formula)
+    print(f'Compile: {(time.perf_counter() - started) / len(set(formulas)) * 1e6:.1f} us/formula uncached')
+    run('cold', lookups, cold=True)
+    run('warm', lookups, cold=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark price snippet extraction: the original whole-document DOTALL
+regexes against the bounded-window extractor in price_extract.py.
+
+By default the corpus is built from the fixture pages in fixtures/models,
+padded with filler markup to a realistic page size. Pass --cache to run
+over a real fal-html/ cache (and --archive if bodies live in one).
+
+Usage:
+    python bench_extract.py [--pages 500] [--page-kb 300]
+    python bench_extract.py --cache fal-html [--archive fal-html.sqlite]
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+
+from price_extract import RULES, extract_price
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'models')
+
+regex = re.compile(r'<div class="flex items-center p-4 pt-4 text-sm text-content-light"><div><p>(.+?)</p></div></div>', re.DOTALL)
+regex2 = re.compile(r'<div class="flex flex-col items-start space-y-3"><div class="space-y-3"><p>(.+?)</p></div></div>', re.DOTALL)
+
+
+def legacy_extract(html):
+    match = regex.search(html)
+    if match:
+        return match.group(1)
+    match = regex2.search(html)
+    if match:
+        return match.group(1)
+    return None
+
+
+def load_fixture_pages():
+    pages = []
+    for dirpath, _, filenames in os.walk(FIXTURES_DIR):
+        for filename in sorted(filenames):
+            with open(os.path.join(dirpath, filename), 'r', encoding='utf-8') as f:
+                pages.append(f.read())
+    return pages
+
+
+def synthetic_corpus(count, page_kb):
+    """Fixture pages padded to page_kb, plus pages with an unterminated anchor."""
+    filler = '<div class="grid gap-2"><span class="text-sm">lorem ipsum</span></div>'
+    padding = filler * (page_kb * 1024 // len(filler))
+    fixtures = load_fixture_pages()
+
+    templates = []
+    for page in fixtures:
+        head, _, tail = page.partition('<main>')
+        templates.append(head + '<main>' + padding + tail + padding)
+    # A truncated page: anchor present, closing markup never arrives
+    templates.append('<html><body>' + RULES[0].anchor + 'Your request will cost $0.01' + padding + padding)
+
+    return [templates[i % len(templates)] for i in range(count)]
+
+
+def cache_corpus(root, archive):
+    from html_cache import HTMLCache
+    from html_archive import PageArchive
+    cache = HTMLCache(root, blobs=PageArchive(archive) if archive else None)
+    return [html for _, html in cache.iter_pages(list(cache.entries))]
+
+
+def run(name, fn, pages):
+    started = time.perf_counter()
+    results = [fn(html) for html in pages]
+    elapsed = time.perf_counter() - started
+    print(f'{name:>10}: {len(pages) / elapsed:10.1f} pages/s ({elapsed:.3f}s)')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark price snippet extraction')
+    parser.add_argument('--pages', type=int, default=500, help='Synthetic corpus size (default: 500)')
+    parser.add_argument('--page-kb', type=int, default=300, help='Synthetic page size in KiB (default: 300)')
+    parser.add_argument('--cache', help='Benchmark over an existing fal-html cache instead')
+    parser.add_argument('--archive', help='SQLite page archive used by the cache')
+    args = parser.parse_args()
+
+    if args.cache:
+        pages = cache_corpus(args.cache, args.archive)
+    else:
+        pages = synthetic_corpus(args.pages, args.page_kb)
+    print(f'Corpus: {len(pages)} pages, {sum(map(len, pages)) / 1024 / 1024:.1f} MiB')
+
+    before = run('regex', legacy_extract, pages)
+    after = run('bounded', extract_price, pages)
+
+    hits = {}
+    mismatches = 0
+    for old, (new, rule) in zip(before, after):
+        hits[rule] = hits.get(rule, 0) + 1
+        if old != new:
+            mismatches += 1
+
+    for rule, count in hits.items():
+        print(f'{rule or "no match":>14}: {count} pages')
+    print(f'Mismatches: {mismatches}')
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
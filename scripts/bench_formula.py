@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for create_inference_formula.
+
+Every entry of the corpus is stripped to plain text and timed through both
+the original if-chain (formula_legacy.py) and the rule engine in the
+pricing package. That both give the same formulas is checked by
+tests/test_formula.py.
+
+Usage:
+    python bench_formula.py [fal-prices.json] [--repeat 200]
+"""
+
+import os
+import json
+import time
+import argparse
+
+import formula_legacy
+import pricing
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'fal-prices.json')
+
+
+def load_texts(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [formula_legacy.strip_html(html) for html in data.values()]
+
+
+def run(name, fn, texts, repeat, cached=False):
+    """Time fn over the corpus; pricing caches are emptied each pass unless cached"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        if not cached:
+            pricing.cache_clear()
+        for text in texts:
+            fn(text)
+    elapsed = time.perf_counter() - started
+    calls = repeat * len(texts)
+    print(f'{name:>8}: {calls / elapsed:12.0f} calls/s ({elapsed / calls * 1e6:.2f} us/call)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark create_inference_formula')
+    parser.add_argument('corpus', nargs='?', default=DEFAULT_CORPUS, help='JSON of model id to pricing HTML (default: fixtures/fal-prices.json)')
+    parser.add_argument('--repeat', type=int, default=200, help='Passes over the corpus per timing run (default: 200)')
+    args = parser.parse_args()
+
+    texts = load_texts(args.corpus)
+    print(f'Corpus: {len(texts)} entries from {args.corpus}')
+
+    rule_hits = {}
+    for text in texts:
+        name, _ = pricing.match_formula_rule(text)
+        rule_hits[name] = rule_hits.get(name, 0) + 1
+    for name, hits in sorted(rule_hits.items(), key=lambda item: -item[1]):
+        print(f'{str(name):>16}: {hits}')
+
+    run('legacy', formula_legacy.create_inference_formula, texts, args.repeat)
+    run('rules', pricing.create_inference_formula, texts, args.repeat)
+    run('cached', pricing.create_inference_formula, texts, args.repeat, cached=True)
+
+
+if __name__ == '__main__':
+    main()
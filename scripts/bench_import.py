@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Measure import cost of the pricing package, each in a fresh interpreter:
+the bare package import (lazy, should be near zero) and the first use of
+each public name, which pulls in its submodule.
+
+Usage:
+    python bench_import.py [--runs 10]
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CASES = (
+    ('import pricing', 'import pricing'),
+    ('strip_html', 'from pricing import strip_html'),
+    ('create_inference_formula', 'from pricing import create_inference_formula'),
+    ('determine_unit', 'from pricing import determine_unit'),
+    ('compile_formula', 'from pricing import compile_formula'),
+)
+
+TIMER = """
+import time
+started = time.perf_counter()
+{statement}
+print(time.perf_counter() - started)
+"""
+
+
+def measure(statement, runs):
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', TIMER.format(statement=statement)],
+            cwd=SCRIPTS_DIR, capture_output=True, text=True, check=True
+        ).stdout
+        timings.append(float(output))
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure pricing package import time')
+    parser.add_argument('--runs', type=int, default=10, help='Fresh interpreters per case, best is reported (default: 10)')
+    args = parser.parse_args()
+
+    for name, statement in CASES:
+        print(f'{name:>26}: {measure(statement, args.runs) * 1000:7.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
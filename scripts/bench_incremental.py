@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark csv_to_json.py --incremental against a full conversion.
+
+The catalog is copied to a temporary directory and converted once to
+create the manifest. Then one row's price is edited and the file is
+converted again, incrementally and in full. The catalog can be scaled up
+by repeating its rows under new model ids. That both conversions write the
+same bytes is checked by tests/test_incremental.py.
+
+Usage:
+    python bench_incremental.py [data/prices-v1.csv] [--scale 1] [--repeat 5]
+"""
+
+import os
+import csv
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+from csv_to_json import CSVToJSONConverter
+
+
+def write_catalog(source, target, scale):
+    with open(source, 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    headers, data_rows = rows[0], rows[1:]
+    with open(target, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        for copy in range(scale):
+            for row in data_rows:
+                writer.writerow([f'{row[0]}~{copy}' if copy else row[0]] + row[1:])
+    return len(data_rows) * scale
+
+
+def edit_price(path, row_number, price):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    rows[row_number][rows[0].index('bip_price_usd')] = price
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f).writerows(rows)
+
+
+def timed(fn, repeat, setup=None):
+    best = float('inf')
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark incremental CSV to JSON conversion')
+    parser.add_argument('catalog', nargs='?', default='data/prices-v1.csv', help='Price catalog CSV (default: data/prices-v1.csv)')
+    parser.add_argument('--scale', type=int, default=1, help='Repeat the catalog rows this many times (default: 1)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing runs, best is reported (default: 5)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp, 'prices.csv')
+        incremental = Path(tmp, 'incremental.json')
+        full = Path(tmp, 'full.json')
+        rows = write_catalog(args.catalog, source, args.scale)
+        print(f'Catalog: {rows} rows')
+
+        converter = CSVToJSONConverter()
+        quiet = open(os.devnull, 'w')
+        stdout, sys.stdout = sys.stdout, quiet
+        try:
+            converter.convert_incremental(source, incremental)
+            prices = iter(range(1, args.repeat + 1))
+
+            edit_seconds = timed(lambda: converter.convert_incremental(source, incremental), args.repeat,
+                                 setup=lambda: edit_price(source, rows // 2, f'0.{next(prices):04d}'))
+            noop_seconds = timed(lambda: converter.convert_incremental(source, incremental), args.repeat)
+            full_seconds = timed(lambda: converter.convert(source, full), args.repeat)
+        finally:
+            sys.stdout = stdout
+            quiet.close()
+
+        print(f'        full: {full_seconds * 1000:8.1f} ms')
+        print(f'one-row edit: {edit_seconds * 1000:8.1f} ms')
+        print(f'   no change: {noop_seconds * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Compare the unbatched LLM path (one request per row) with batched prompts
+(N rows per request) on the same CSV: requests sent, tokens used, rows and
+requests per second, and how many responses differ between the two.
+
+Token counts come from the "usage" field of each reply. No response cache
+is used. Run it against llm_stub_server.py to measure the client side only:
+
+Usage:
+    python llm_stub_server.py --latency 0.2 &
+    LLM_API_BASE=http://127.0.0.1:8799 OPENROUTER_API_KEY=stub \\
+        python bench_llm_batch.py fal-prices-plain.csv [--batch-size 10] [--concurrency 8]
+"""
+
+import csv
+import sys
+import time
+import asyncio
+import argparse
+
+from process_llm import LLM_API_KEY, AsyncLLMClient
+
+
+def load_texts(path, limit=None):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        texts = [row['Plain Text'] for row in csv.DictReader(f) if row.get('Plain Text', '').strip()]
+    return texts[:limit] if limit else texts
+
+
+def run(name, texts, concurrency, batch_size):
+    client = AsyncLLMClient(concurrency=concurrency)
+    started = time.perf_counter()
+    try:
+        responses = [answer for answer, _ in asyncio.run(client.query_all(texts, batch_size=batch_size))]
+    finally:
+        client.close()
+    elapsed = time.perf_counter() - started
+
+    usage = client.usage
+    tokens = usage['prompt_tokens'] + usage['completion_tokens']
+    print(f'{name:>10}: {usage["requests"]:5d} requests, {usage["prompt_tokens"]:7d} prompt + '
+          f'{usage["completion_tokens"]:6d} completion tokens, {len(texts) / elapsed:8.1f} rows/s, '
+          f'{usage["requests"] / elapsed:7.1f} requests/s, {usage["slot_retries"]} slot retries')
+    return responses, usage['requests'], tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batched against unbatched LLM requests')
+    parser.add_argument('input', nargs='?', default='fal-prices-plain.csv', help='CSV with a Plain Text column (default: fal-prices-plain.csv)')
+    parser.add_argument('--batch-size', type=int, default=10, help='Rows per batched request (default: 10)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight at once (default: 8)')
+    parser.add_argument('--limit', type=int, default=None, help='Only use the first N rows')
+    args = parser.parse_args()
+
+    if not LLM_API_KEY:
+        print('Error: OPENROUTER_API_KEY environment variable not set')
+        return 1
+
+    texts = load_texts(args.input, args.limit)
+    print(f'Rows: {len(texts)} from {args.input}')
+
+    single, single_requests, single_tokens = run('unbatched', texts, args.concurrency, 1)
+    batched, batched_requests, batched_tokens = run(f'batch={args.batch_size}', texts, args.concurrency, args.batch_size)
+
+    saved = single_tokens - batched_tokens
+    print(f'Tokens saved: {saved} ({saved / single_tokens * 100 if single_tokens else 0:.1f}%), '
+          f'requests saved: {single_requests - batched_requests}')
+    print(f'Differing responses: {sum(1 for a, b in zip(single, batched) if a != b)}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Peak memory of loading a schema dump into an enrichment index
+(enrich.load_json_index): json.load of the whole file against streaming
+with ijson. The dump is synthetic and shaped like bak/fal-schemas.json, a
+list of model schemas with a large nested OpenAPI payload each. Every mode
+runs in its own process and must build the same index, or the script exits
+non-zero.
+
+Usage:
+    python bench_schema_load.py [--models 20000] [--layout list|dict]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import importlib.util
+import tempfile
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = """
+import sys, json, hashlib
+sys.path.insert(0, sys.argv[1])
+from enrich import load_json_index
+if sys.argv[3] != 'none':
+    index = load_json_index(sys.argv[2], 'desc', stream=sys.argv[3] == 'stream')
+    digest = hashlib.sha1(json.dumps(index, sort_keys=True).encode()).hexdigest()
+    print(len(index), digest)
+"""
+
+MODES = ('none', 'json.load', 'stream')
+
+
+def schema(i):
+    """One synthetic model schema with an OpenAPI-like payload of a few KB"""
+    properties = {f'param_{p}': {'type': 'string', 'title': f'Parameter {p}',
+                                 'description': f'Input parameter {p} of model {i}. ' * 4,
+                                 'examples': [f'example {p}.{e}' for e in range(3)]}
+                  for p in range(12)}
+    return {
+        'provider': f'provider-{i % 97}',
+        'name': f'model-{i}',
+        'desc': f'Synthetic model {i} generating {("images", "videos", "audio")[i % 3]}',
+        'category': ('text-to-image', 'image-to-video', 'text-to-speech')[i % 3],
+        'openapi': {'components': {'schemas': {'Input': {'properties': properties},
+                                               'Output': {'properties': properties}}}},
+    }
+
+
+def write_dump(path, models, layout):
+    """Written one schema at a time: child processes inherit this process's peak RSS"""
+    opening, closing = ('[', ']') if layout == 'list' else ('{', '}')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(opening)
+        for i in range(models):
+            if i:
+                f.write(', ')
+            if layout == 'dict':
+                f.write(json.dumps(f'provider-{i % 97}/model-{i}') + ': ')
+            f.write(json.dumps(schema(i)))
+        f.write(closing)
+
+
+def run(path, mode):
+    """(seconds, peak RSS in MB, child output) for one load in a fresh process"""
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', CHILD, HERE, path, mode], stdout=subprocess.PIPE, text=True)
+    output = process.stdout.read().strip()
+    process.stdout.close()
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - started
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f'loading {path} with {mode} failed')
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return elapsed, usage.ru_maxrss / scale, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark memory of schema dump loading')
+    parser.add_argument('--models', type=int, default=20000, help='Schemas in the synthetic dump (default: 20000)')
+    parser.add_argument('--layout', choices=('list', 'dict'), default='list', help='Top-level JSON layout (default: list)')
+    args = parser.parse_args()
+
+    if importlib.util.find_spec('ijson') is None:
+        print('ijson is not installed; the stream mode falls back to json.load')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'schemas.json')
+        write_dump(path, args.models, args.layout)
+        print(f'Dump: {args.models} schemas ({args.layout}), {os.path.getsize(path) / 1e6:.1f} MB')
+
+        outputs = {}
+        for mode in MODES:
+            elapsed, peak, outputs[mode] = run(path, mode)
+            label = 'interpreter' if mode == 'none' else mode
+            print(f'{label:>11}: {elapsed:6.2f} s, peak RSS {peak:7.1f} MB')
+
+    identical = outputs['json.load'] == outputs['stream']
+    print(f'Index: {outputs["stream"].split()[0]} keys, stream identical to json.load: {identical}')
+    return 0 if identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for strip_html: the original one-parser-per-call version
+(formula_legacy.py) against the reusable parser with a tag-free fast path
+in the pricing package. Outputs are compared entry by entry.
+
+Usage:
+    python bench_strip.py [fal-prices.json] [--repeat 200]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import formula_legacy
+import pricing
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'fal-prices.json')
+
+
+def run(name, fn, snippets, repeat, cached=False):
+    """Time fn over the corpus; pricing caches are emptied each pass unless cached"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        if not cached:
+            pricing.cache_clear()
+        for html in snippets:
+            fn(html)
+    elapsed = time.perf_counter() - started
+    calls = repeat * len(snippets)
+    print(f'{name:>8}: {calls / elapsed:12.0f} calls/s ({elapsed / calls * 1e6:.2f} us/call)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark strip_html')
+    parser.add_argument('corpus', nargs='?', default=DEFAULT_CORPUS, help='JSON of model id to pricing HTML (default: fixtures/fal-prices.json)')
+    parser.add_argument('--repeat', type=int, default=200, help='Passes over the corpus per timing run (default: 200)')
+    args = parser.parse_args()
+
+    with open(args.corpus, 'r', encoding='utf-8') as f:
+        snippets = list(json.load(f).values())
+    tagless = sum(1 for html in snippets if '<' not in html)
+    print(f'Corpus: {len(snippets)} snippets ({tagless} without tags) from {args.corpus}')
+
+    mismatches = 0
+    for html in snippets:
+        expected = formula_legacy.strip_html(html)
+        actual = pricing.strip_html(html)
+        if expected != actual:
+            mismatches += 1
+            print(f'MISMATCH: {html!r}\n  expected: {expected!r}\n  actual:   {actual!r}')
+    print(f'Mismatches: {mismatches}')
+
+    run('legacy', formula_legacy.strip_html, snippets, args.repeat)
+    run('reused', pricing.strip_html, snippets, args.repeat)
+    run('cached', pricing.strip_html, snippets, args.repeat, cached=True)
+
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""
+Columnar encoding of converted CSV rows, used by csv_to_json.py --format columns.
+
+A table stores one array per column instead of one object per row:
+
+    {"length": 745,
+     "columns": {
+        "model_id": ["argil/avatars/audio-to-video", ...],
+        "tag": {"dictionary": ["audio-to-video", "text-to-video", ...],
+                "codes": [0, 1, ...]},
+        ...}}
+
+Columns with few distinct values are dictionary-encoded: each value is
+stored once and rows refer to it by index.
+
+The binary variant (.bin) is laid out for typed-array views in the browser,
+little-endian:
+
+    b'PTCB' | uint32 header length | header JSON (UTF-8) | column bodies
+
+The header lists each column's name, encoding, byte offset and size, and
+dictionary. Bodies start at 8-byte aligned offsets:
+
+    dictionary  uint8 codes (uint16 / uint32 for dictionaries over 256 / 65536 entries)
+    float64     one float64 per row; NaN for null
+    utf8        uint32 offsets (length + 1) followed by the UTF-8 text
+    json        like utf8, with every value JSON-encoded (mixed or nullable columns)
+"""
+
+import sys
+import json
+import math
+import struct
+from array import array
+from typing import Any, Dict, List, Optional, Sequence
+
+MAGIC = b'PTCB'
+
+SWAP_BYTES = sys.byteorder != 'little'
+
+# Bytes per dictionary code -> array typecode
+CODE_TYPES = {1: 'B', 2: 'H', 4: 'I'}
+
+# Dictionary-encode a column when it has at most this many distinct values
+# and they make up at most this share of the rows
+MAX_DICTIONARY = 256
+MAX_DICTIONARY_RATIO = 0.5
+
+
+def dictionary_worthwhile(values: Sequence[Any]) -> bool:
+    distinct = set(json.dumps(value) for value in values)
+    return len(distinct) <= MAX_DICTIONARY and len(distinct) <= max(1, len(values) * MAX_DICTIONARY_RATIO)
+
+
+def dictionary_encode(values: Sequence[Any]) -> Dict[str, List[Any]]:
+    dictionary: List[Any] = []
+    index: Dict[str, int] = {}
+    codes = []
+    for value in values:
+        # Keyed by JSON text so that 1, 1.0 and True stay distinct entries
+        key = json.dumps(value)
+        code = index.get(key)
+        if code is None:
+            code = index[key] = len(dictionary)
+            dictionary.append(value)
+        codes.append(code)
+    return {'dictionary': dictionary, 'codes': codes}
+
+
+def build_columns(headers: List[str], rows: Sequence[Sequence[Any]],
+                  dictionary: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    Turn converted rows (lists of values in header order) into a columnar
+    table. `dictionary` names the columns to dictionary-encode; by default
+    low-cardinality columns are picked automatically.
+    """
+    columns = {}
+    for col_idx, header in enumerate(headers):
+        values = [row[col_idx] if col_idx < len(row) else None for row in rows]
+        encode = header in dictionary if dictionary is not None else dictionary_worthwhile(values)
+        columns[header] = dictionary_encode(values) if encode else values
+    return {'length': len(rows), 'columns': columns}
+
+
+def column_values(column: Any) -> List[Any]:
+    """Plain list of values for a column of a table, decoding dictionaries"""
+    if isinstance(column, dict):
+        dictionary = column['dictionary']
+        return [dictionary[code] for code in column['codes']]
+    return list(column)
+
+
+def table_rows(table: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Row objects from a table, as the row-oriented JSON format would hold them"""
+    headers = list(table['columns'])
+    columns = [column_values(table['columns'][header]) for header in headers]
+    return [dict(zip(headers, values)) for values in zip(*columns)] if columns else []
+
+
+def is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def text_body(texts: List[str]) -> bytes:
+    offsets = array('I', [0])
+    chunks = []
+    position = 0
+    for text in texts:
+        chunk = text.encode('utf-8')
+        chunks.append(chunk)
+        position += len(chunk)
+        offsets.append(position)
+    return little_endian(offsets) + b''.join(chunks)
+
+
+def code_size(dictionary: Sequence[Any]) -> int:
+    return 1 if len(dictionary) <= 1 << 8 else 2 if len(dictionary) <= 1 << 16 else 4
+
+
+def little_endian(values: array) -> bytes:
+    if SWAP_BYTES:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def encode_column(column: Any):
+    """(encoding, body bytes, dictionary or None) for one column of a table"""
+    if isinstance(column, dict):
+        typecode = CODE_TYPES[code_size(column['dictionary'])]
+        return 'dictionary', little_endian(array(typecode, column['codes'])), column['dictionary']
+    if all(value is None or is_number(value) for value in column):
+        floats = array('d', (math.nan if value is None else value for value in column))
+        return 'float64', little_endian(floats), None
+    if all(isinstance(value, str) for value in column):
+        return 'utf8', text_body(column), None
+    return 'json', text_body([json.dumps(value, ensure_ascii=False) for value in column]), None
+
+
+def encode_binary(table: Dict[str, Any]) -> bytes:
+    """Serialize a table to the compact binary layout described above"""
+    specs = []
+    bodies = []
+    offset = 0
+    for name, column in table['columns'].items():
+        encoding, body, dictionary = encode_column(column)
+        spec = {'name': name, 'encoding': encoding, 'offset': offset, 'size': len(body)}
+        if dictionary is not None:
+            spec['dictionary'] = dictionary
+            spec['code_size'] = code_size(dictionary)
+        specs.append(spec)
+        padding = -len(body) % 8
+        bodies.append(body + b'\0' * padding)
+        offset += len(body) + padding
+
+    header = json.dumps({'length': table['length'], 'columns': specs}, ensure_ascii=False,
+                        separators=(',', ':')).encode('utf-8')
+    # Pad the header too, so that body offsets are 8-byte aligned in the file
+    header += b' ' * (-(len(MAGIC) + 4 + len(header)) % 8)
+    return MAGIC + struct.pack('<I', len(header)) + header + b''.join(bodies)
+
+
+def decode_texts(body: memoryview, length: int) -> List[str]:
+    offsets = array('I')
+    offsets.frombytes(body[:4 * (length + 1)])
+    if SWAP_BYTES:
+        offsets.byteswap()
+    text = bytes(body[4 * (length + 1):])
+    return [text[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(length)]
+
+
+def decode_binary(data: bytes) -> Dict[str, Any]:
+    """Read a table written by encode_binary"""
+    if data[:4] != MAGIC:
+        raise ValueError("not a columnar price table (bad magic)")
+    (header_length,) = struct.unpack_from('<I', data, 4)
+    base = 8 + header_length
+    header = json.loads(data[8:base].decode('utf-8'))
+    length = header['length']
+    view = memoryview(data)
+
+    columns = {}
+    for spec in header['columns']:
+        body = view[base + spec['offset']:base + spec['offset'] + spec['size']]
+        encoding = spec['encoding']
+        if encoding == 'dictionary':
+            codes = array(CODE_TYPES[spec['code_size']])
+            codes.frombytes(body)
+            if SWAP_BYTES:
+                codes.byteswap()
+            columns[spec['name']] = {'dictionary': spec['dictionary'], 'codes': codes.tolist()}
+        elif encoding == 'float64':
+            floats = array('d')
+            floats.frombytes(body)
+            if SWAP_BYTES:
+                floats.byteswap()
+            columns[spec['name']] = [None if math.isnan(value) else value for value in floats]
+        elif encoding == 'utf8':
+            columns[spec['name']] = decode_texts(body, length)
+        elif encoding == 'json':
+            columns[spec['name']] = [json.loads(text) for text in decode_texts(body, length)]
+        else:
+            raise ValueError(f"unknown column encoding {encoding!r}")
+    return {'length': length, 'columns': columns}
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Bulk cost estimation over the price catalog (data/prices-v1.csv).
+
+Every price in the catalog becomes one entry in a set of NumPy arrays:
+price, billing unit, model, tag and option. Rows with several options
+("480p\\n720p" priced "0.15\\n0.3") contribute one entry per option. A usage
+profile maps billing units to quantities, e.g. {'output seconds': 10,
+'runs': 1}, and the cost of every entry is computed in one vectorized pass;
+entries billed in a unit the profile does not mention get no cost.
+
+Units are parsed once at load time (pricing.parse_unit) and every price is
+stored per base unit: '0.2 per output minutes' becomes 0.00333 per second,
+'0.025 per mega pixels' 2.5e-08 per pixel. A profile in any unit of the same
+base ('output minutes=1' or 'output seconds=60') costs both. The input/output
+qualifier is not part of the base, so 'mega pixels=1' also costs prices per
+'output mega pixels'; 'compute seconds' is a base of its own.
+Rows whose unit parse_unit does not know are skipped with a warning.
+
+Usage:
+    python cost_engine.py [data/prices-v1.csv] --usage "output seconds=10" --usage runs=1 \\
+        [--tag text-to-video] [--option 720p] [--top 10] [--descending]
+"""
+
+import csv
+import sys
+import argparse
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from pricing import parse_unit
+
+
+class Estimate(NamedTuple):
+    model_id: str
+    option: str
+    unit: str
+    price: float
+    cost: float
+    approximate: bool
+    unit_price: float
+
+
+def parse_prices(value: str):
+    """Split a bip_price_usd cell into (price, approximate) pairs; '0.2*' marks an approximate price."""
+    prices = []
+    for part in value.split('\n'):
+        part = part.strip()
+        if not part:
+            continue
+        approximate = part.endswith('*')
+        prices.append((float(part.rstrip('*')), approximate))
+    return prices
+
+
+def price_options(row: Mapping[str, str]):
+    """
+    Yield (option, price, approximate) for one catalog row. Options are paired
+    with prices by position; if the counts differ the pairing is unknown and
+    the prices are labelled 'price 1', 'price 2', ...
+    """
+    prices = parse_prices(row.get('bip_price_usd') or '')
+    options = [option.strip() for option in (row.get('options') or '').split('\n') if option.strip()]
+    if len(prices) > 1 and len(options) != len(prices):
+        options = [f'price {n}' for n in range(1, len(prices) + 1)]
+    elif len(prices) == 1 and len(options) != 1:
+        options = ['']
+    for option, (price, approximate) in zip(options, prices):
+        yield option, price, approximate
+
+
+class Vocabulary:
+    """Assigns consecutive integer codes to strings."""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def code(self, name: str) -> int:
+        code = self.codes.get(name)
+        if code is None:
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def get(self, name: Optional[str], default: int = -1) -> int:
+        return self.codes.get(name, default) if name is not None else default
+
+
+class CostEngine:
+    """Catalog prices as NumPy arrays, for costing a usage profile across all models at once."""
+
+    def __init__(self, rows: Iterable[Mapping[str, str]]):
+        self.units = Vocabulary()
+        self.bases = Vocabulary()
+        self.tags = Vocabulary()
+        self.options = Vocabulary()
+        self.model_ids: List[str] = []
+        # (model_id, bip_units) of priced rows whose unit parse_unit does not know; they cannot be costed
+        self.skipped: List[Tuple[str, str]] = []
+
+        model, price, unit_price, unit, base, tag, option, approximate, has_options = [], [], [], [], [], [], [], [], []
+        for row in rows:
+            entries = list(price_options(row))
+            if not entries:
+                continue
+            unit_name = row.get('bip_units') or ''
+            try:
+                parsed = parse_unit(unit_name)
+            except ValueError:
+                self.skipped.append((row['model_id'], unit_name))
+                continue
+            model_code = len(self.model_ids)
+            self.model_ids.append(row['model_id'])
+            unit_code = self.units.code(unit_name)
+            base_code = self.bases.code(parsed.base)
+            tag_code = self.tags.code(row.get('tag') or '')
+            for option_name, value, estimated in entries:
+                model.append(model_code)
+                price.append(value)
+                unit_price.append(parsed.per_base(value))
+                unit.append(unit_code)
+                base.append(base_code)
+                tag.append(tag_code)
+                option.append(self.options.code(option_name.lower()) if option_name else -1)
+                approximate.append(estimated)
+                has_options.append(bool(option_name))
+
+        self.model = np.array(model, dtype=np.int32)
+        self.price = np.array(price, dtype=np.float64)
+        self.unit_price = np.array(unit_price, dtype=np.float64)
+        self.unit = np.array(unit, dtype=np.int32)
+        self.base = np.array(base, dtype=np.int32)
+        self.tag = np.array(tag, dtype=np.int32)
+        self.option = np.array(option, dtype=np.int32)
+        self.approximate = np.array(approximate, dtype=bool)
+        self.has_options = np.array(has_options, dtype=bool)
+        self.masks: Dict[tuple, np.ndarray] = {}
+        for model_id, unit_name in self.skipped:
+            print(f"Warning: skipping {model_id}: unknown billing unit {unit_name!r}", file=sys.stderr)
+
+    @classmethod
+    def from_csv(cls, path: str = 'data/prices-v1.csv') -> 'CostEngine':
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            return cls(csv.DictReader(f))
+
+    def __len__(self):
+        return len(self.price)
+
+    def quantities(self, usage: Mapping[str, float]) -> np.ndarray:
+        """Quantity per base unit code; NaN for base units the profile does not mention"""
+        quantities = np.full(len(self.bases.names), np.nan)
+        for unit, quantity in usage.items():
+            parsed = parse_unit(unit)
+            code = self.bases.get(parsed.base)
+            if code >= 0:
+                current = quantities[code]
+                quantities[code] = parsed.to_base(quantity) + (0.0 if np.isnan(current) else current)
+        return quantities
+
+    def mask(self, tag: Optional[str] = None, option: Optional[str] = None) -> np.ndarray:
+        """
+        Entries matching the filters. With an option, models without options
+        are kept (their single price applies to every option). Masks are
+        computed once per filter combination.
+        """
+        key = (tag, option)
+        mask = self.masks.get(key)
+        if mask is not None:
+            return mask
+        mask = np.ones(len(self.price), dtype=bool)
+        if tag is not None:
+            mask &= self.tag == self.tags.get(tag)
+        if option is not None:
+            mask &= (self.option == self.options.get(option.lower())) | ~self.has_options
+        self.masks[key] = mask
+        return mask
+
+    def costs(self, usage: Mapping[str, float], tag: Optional[str] = None, option: Optional[str] = None) -> np.ndarray:
+        """Cost of every entry for the usage profile; NaN where the unit is not in the profile or the filters exclude it"""
+        costs = self.unit_price * self.quantities(usage)[self.base]
+        if tag is not None or option is not None:
+            costs[~self.mask(tag, option)] = np.nan
+        return costs
+
+    def top_k(self, usage: Mapping[str, float], k: int = 10, tag: Optional[str] = None,
+              option: Optional[str] = None, descending: bool = False) -> List[Estimate]:
+        """The k cheapest (or most expensive) entries for the usage profile, sorted by cost"""
+        costs = self.costs(usage, tag, option)
+        candidates = np.flatnonzero(~np.isnan(costs))
+        keys = -costs[candidates] if descending else costs[candidates]
+        if k < len(candidates):
+            nearest = np.sort(np.argpartition(keys, k - 1)[:k])
+            candidates, keys = candidates[nearest], keys[nearest]
+        # Stable sort so equal costs keep catalog order
+        ranked = candidates[np.argsort(keys, kind='stable')]
+        return [self.estimate(i, costs[i]) for i in ranked]
+
+    def estimate(self, i: int, cost: float) -> Estimate:
+        option = self.options.names[self.option[i]] if self.option[i] >= 0 else ''
+        return Estimate(self.model_ids[self.model[i]], option, self.units.names[self.unit[i]],
+                        float(self.price[i]), float(cost), bool(self.approximate[i]), float(self.unit_price[i]))
+
+
+def loop_costs(rows: Iterable[Mapping[str, str]], usage: Mapping[str, float], tag: Optional[str] = None,
+               option: Optional[str] = None) -> List[Estimate]:
+    """Per-row reference implementation of CostEngine.costs, used by tests/test_cost_engine.py and bench_cost.py"""
+    base_usage = {}
+    for unit, quantity in usage.items():
+        parsed = parse_unit(unit)
+        base_usage[parsed.base] = base_usage.get(parsed.base, 0.0) + parsed.to_base(quantity)
+
+    estimates = []
+    for row in rows:
+        if not row.get('bip_price_usd'):
+            continue
+        try:
+            unit = parse_unit(row.get('bip_units') or '')
+        except ValueError:
+            # CostEngine skips these rows too
+            continue
+        quantity = base_usage.get(unit.base)
+        if quantity is None or (tag is not None and row.get('tag') != tag):
+            continue
+        for option_name, price, approximate in price_options(row):
+            if option is not None and option_name and option_name.lower() != option.lower():
+                continue
+            estimates.append(Estimate(row['model_id'], option_name.lower(), row['bip_units'], price,
+                                      unit.per_base(price) * quantity, approximate, unit.per_base(price)))
+    return estimates
+
+
+
+# (usage profile, tag, option) queries shared by tests/test_cost_engine.py and bench_cost.py
+PROFILES = (
+    ({'output seconds': 10}, 'text-to-video', '720p'),
+    ({'output seconds': 5, 'runs': 1}, 'image-to-video', None),
+    ({'runs': 4, 'mega pixels': 4, 'output mega pixels': 4, 'compute seconds': 6}, 'text-to-image', None),
+    ({'input kilo tokens': 2, 'output kilo tokens': 0.5}, None, None),
+    ({'runs': 1}, None, 'quality'),
+    ({'output minutes': 1}, None, None),
+)
+
+def parse_usage(items: List[str]) -> Dict[str, float]:
+    usage = {}
+    for item in items:
+        unit, sep, quantity = item.rpartition('=')
+        if not sep:
+            raise argparse.ArgumentTypeError(f"usage must look like 'unit=quantity', got {item!r}")
+        usage[unit.strip()] = float(quantity)
+    return usage
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cost a usage profile across the whole price catalog')
+    parser.add_argument('catalog', nargs='?', default='data/prices-v1.csv', help='Price catalog CSV (default: data/prices-v1.csv)')
+    parser.add_argument('--usage', action='append', required=True, help="Quantity per billing unit, e.g. 'output seconds=10' (repeatable)")
+    parser.add_argument('--tag', help='Only models with this tag, e.g. text-to-video')
+    parser.add_argument('--option', help='Only this option, e.g. 720p (models without options are kept)')
+    parser.add_argument('--top', type=int, default=10, help='Number of results (default: 10)')
+    parser.add_argument('--descending', action='store_true', help='Most expensive first')
+    args = parser.parse_args()
+
+    try:
+        usage = parse_usage(args.usage)
+        bases = {unit: parse_unit(unit).base for unit in usage}
+    except (argparse.ArgumentTypeError, ValueError) as e:
+        parser.error(str(e))
+
+    engine = CostEngine.from_csv(args.catalog)
+    unknown = [unit for unit, base in bases.items() if engine.bases.get(base) < 0]
+    if unknown:
+        print(f"Warning: no catalog prices in units {unknown}; base units in catalog: {engine.bases.names}")
+
+    for estimate in engine.top_k(usage, args.top, args.tag, args.option, args.descending):
+        option = f' [{estimate.option}]' if estimate.option else ''
+        approximate = ' (approximate)' if estimate.approximate else ''
+        print(f'${estimate.cost:10.4f}  {estimate.model_id}{option}  '
+              f'{estimate.price} per {estimate.unit}{approximate}')
+
+
+if __name__ == '__main__':
+    main()
@@ -12,28 +12,146 @@ Options:
     --encoding ENCODING    Input file encoding (default: utf-8)
     --delimiter DELIMITER  CSV delimiter (default: ,)
     --quotechar QUOTECHAR  CSV quote character (default: ")
-    --array               Output as JSON array (default: array of objects)
-    --object              Output as single JSON object with row indices as keys
+    --format FORMAT       objects (default), object (row indices as keys), array (array of arrays)
+                          or columns (one array per column, see columnar.py)
     --pretty              Pretty print JSON output
     --validate            Validate JSON output before writing
+    --stream              Read and write one row at a time (memory does not grow with file size)
+    --ndjson              Write newline-delimited JSON, one row per line (implies --stream)
+    --typed               Infer a type per column from a sample and convert with it
+                          (number, bool, string, or newline-separated list of numbers)
+    --sample N            Rows used to infer column types with --typed (default: 1000)
+    --dictionary COLUMNS  Comma-separated columns to dictionary-encode with --format columns
+                          (default: columns with few distinct values)
+    --binary              With --format columns, write the compact binary layout instead of JSON
+    --incremental         Reconvert only rows added, changed or removed since the last run, using a
+                          manifest of row hashes (<output>.manifest), and append the differences to
+                          a changelog (<output>.changelog.ndjson by default)
+    --key COLUMN          Column identifying rows for --incremental (default: model_id)
+    --changelog PATH      Changelog file for --incremental
+    --report PATH         Write a JSON report of wall time, rows/s and peak RSS (see instrument.py)
+    --profile PATH        Profile the conversion with cProfile and dump the stats to PATH
 """
 
+import re
 import csv
 import json
+import hashlib
 import argparse
 import sys
+from datetime import datetime, timezone
+from itertools import chain, islice
 from pathlib import Path
-from typing import List, Dict, Any, Union, Optional
+from typing import List, Dict, Any, Callable, Iterator, Union, Optional, TextIO
+
+from columnar import build_columns, encode_binary
+from instrument import Recorder, add_arguments
+
+MANIFEST_VERSION = 1
+
+NUMBER_RE = re.compile(r'-?(?:\d+\.?\d*|\.\d+)')
+NULL_STRINGS = frozenset(('null', 'none'))
+BOOL_STRINGS = {'true': True, 'false': False}
+
+COLUMN_TYPES = ('bool', 'number', 'number-list', 'string')
+
+
+def is_number_list(value: str) -> bool:
+    """True for newline-separated numbers such as '0.15\\n0.3' (a single number counts too)."""
+    parts = value.split()
+    return bool(parts) and all(NUMBER_RE.fullmatch(part) for part in parts)
+
+
+def infer_column_type(values: List[str], tolerance: float = 0.01) -> str:
+    """
+    Most specific type that the non-empty sample values fit. Up to `tolerance`
+    of them may not fit; those cells fall back to clean_value when converted.
+    """
+    cells = [value.strip() for value in values if value and value.strip()]
+    if not cells:
+        return 'string'
+    allowed = int(len(cells) * tolerance)
+    
+    def fits(predicate) -> bool:
+        return sum(1 for cell in cells if not predicate(cell)) <= allowed
+    
+    if fits(lambda cell: cell.lower() in BOOL_STRINGS):
+        return 'bool'
+    if fits(NUMBER_RE.fullmatch):
+        return 'number'
+    if fits(is_number_list):
+        return 'number-list'
+    return 'string'
+
+
+def make_converter(column_type: str, fallback: Callable[[str], Any]) -> Callable[[str], Any]:
+    """Build the converter for one column; cells that do not fit the type go to fallback."""
+    # int() and float() also accept '1_000', '1e3', 'nan' and 'inf', which
+    # inference does not count as numbers; those cells go to the fallback.
+    if column_type == 'number':
+        def convert(value):
+            if not value or not NUMBER_RE.fullmatch(value):
+                return fallback(value)
+            try:
+                return int(value)
+            except ValueError:
+                return float(value)
+    elif column_type == 'number-list':
+        def convert(value):
+            if not value or not is_number_list(value):
+                return fallback(value)
+            return [float(part) for part in value.split()]
+    elif column_type == 'bool':
+        def convert(value):
+            if not value:
+                return None
+            flag = BOOL_STRINGS.get(value.strip().lower())
+            return flag if flag is not None else fallback(value)
+    elif column_type == 'string':
+        def convert(value):
+            if not value:
+                return None
+            value = value.strip()
+            if not value or value.lower() in NULL_STRINGS:
+                return None
+            return value
+    else:
+        raise ValueError(f"Unknown column type: {column_type}")
+    return convert
+
+
+def row_keys(headers: List[str], data_rows: List[List[str]], key_column: str) -> List[str]:
+    """Key of every row; repeated keys get '#2', '#3', ... appended."""
+    if key_column not in headers:
+        raise ValueError(f"Key column '{key_column}' not found in headers: {headers}")
+    key_idx = headers.index(key_column)
+    seen: Dict[str, int] = {}
+    keys = []
+    for row in data_rows:
+        key = row[key_idx] if key_idx < len(row) else ''
+        count = seen[key] = seen.get(key, 0) + 1
+        keys.append(key if count == 1 else f"{key}#{count}")
+    return keys
+
+
+def row_hash(row: List[str]) -> str:
+    # Unit/record separators cannot occur in the price CSVs
+    return hashlib.blake2b('\x1f'.join(row).encode('utf-8'), digest_size=8).hexdigest()
 
 
 class CSVToJSONConverter:
     """Safe CSV to JSON converter with validation and error handling."""
     
     def __init__(self, encoding: str = 'utf-8', delimiter: str = ',', 
-                 quotechar: str = '"'):
+                 quotechar: str = '"', typed: bool = False, sample_size: int = 1000):
         self.encoding = encoding
         self.delimiter = delimiter
         self.quotechar = quotechar
+        self.typed = typed
+        self.sample_size = sample_size
+        self.schema: Optional[Dict[str, str]] = None
+        # Data rows read by the last read_csv or iter_csv, for reporting
+        self.rows_read = 0
         
     def clean_value(self, value: str) -> Union[str, int, float, None]:
         """Clean and convert CSV values to appropriate JSON types."""
@@ -87,6 +205,7 @@ class CSVToJSONConverter:
                 # Always treat first row as headers
                 headers = rows[0]
                 data_rows = rows[1:]
+                self.rows_read = len(data_rows)
                 
                 return headers, data_rows
                 
@@ -97,14 +216,30 @@ class CSVToJSONConverter:
         except Exception as e:
             raise ValueError(f"Error reading file: {e}") from e
     
+    def infer_schema(self, headers: List[str], sample_rows: List[List[str]]) -> Dict[str, str]:
+        """Infer and remember a type per column from sample rows."""
+        self.schema = {
+            header: infer_column_type([row[col_idx] for row in sample_rows if col_idx < len(row)])
+            for col_idx, header in enumerate(headers)
+        }
+        print(f"Schema: {self.schema}")
+        return self.schema
+    
+    def column_converters(self, headers: List[str]) -> List[Callable[[str], Any]]:
+        """One converter per column: from the schema if one was inferred, else clean_value."""
+        if self.schema is None:
+            return [self.clean_value] * len(headers)
+        return [make_converter(self.schema.get(header, 'string'), self.clean_value) for header in headers]
+    
     def convert_to_objects(self, headers: List[str], data_rows: List[List[str]]) -> List[Dict[str, Any]]:
         """Convert CSV data to array of objects."""
+        converters = self.column_converters(headers)
         result = []
         
         for row in data_rows:
             obj = {}
             for col_idx, header in enumerate(headers):
-                value = self.clean_value(row[col_idx]) if col_idx < len(row) else None
+                value = converters[col_idx](row[col_idx]) if col_idx < len(row) else None
                 obj[header] = value
             result.append(obj)
         
@@ -112,12 +247,13 @@ class CSVToJSONConverter:
     
     def convert_to_object(self, headers: List[str], data_rows: List[List[str]]) -> Dict[str, Any]:
         """Convert CSV data to single object with row indices as keys."""
+        converters = self.column_converters(headers)
         result = {}
         
         for row_idx, row in enumerate(data_rows):
             row_obj = {}
             for col_idx, header in enumerate(headers):
-                value = self.clean_value(row[col_idx]) if col_idx < len(row) else None
+                value = converters[col_idx](row[col_idx]) if col_idx < len(row) else None
                 row_obj[header] = value
             result[str(row_idx)] = row_obj
         
@@ -125,17 +261,253 @@ class CSVToJSONConverter:
     
     def convert_to_array(self, headers: List[str], data_rows: List[List[str]]) -> List[List[Any]]:
         """Convert CSV data to array of arrays."""
+        converters = self.column_converters(headers)
         result = []
         
         for row in data_rows:
             cleaned_row = []
             for col_idx in range(len(headers)):
-                value = self.clean_value(row[col_idx]) if col_idx < len(row) else None
+                value = converters[col_idx](row[col_idx]) if col_idx < len(row) else None
                 cleaned_row.append(value)
             result.append(cleaned_row)
         
         return result
     
+    def iter_csv(self, file_path: Path) -> Iterator[List[str]]:
+        """Yield CSV rows one at a time, headers first, without loading the file."""
+        if not file_path.exists():
+            raise FileNotFoundError(f"Input file not found: {file_path}")
+        
+        if not file_path.is_file():
+            raise ValueError(f"Path is not a file: {file_path}")
+        
+        try:
+            with open(file_path, 'r', encoding=self.encoding, newline='') as csvfile:
+                reader = csv.reader(csvfile, delimiter=self.delimiter, quotechar=self.quotechar)
+                # The header is row 0, so the last index is the number of data rows
+                self.rows_read = 0
+                for self.rows_read, row in enumerate(reader):
+                    yield row
+                
+        except UnicodeDecodeError as e:
+            raise ValueError(f"Encoding error: {e}. Try specifying --encoding parameter.") from e
+        except csv.Error as e:
+            raise ValueError(f"CSV parsing error: {e}") from e
+    
+    def clean_row_object(self, headers: List[str], row: List[str],
+                         converters: List[Callable[[str], Any]]) -> Dict[str, Any]:
+        """Convert one CSV row to an object keyed by header."""
+        return {header: converters[col_idx](row[col_idx]) if col_idx < len(row) else None
+                for col_idx, header in enumerate(headers)}
+    
+    def clean_row_array(self, headers: List[str], row: List[str],
+                        converters: List[Callable[[str], Any]]) -> List[Any]:
+        """Convert one CSV row to an array with one value per header."""
+        return [converters[col_idx](row[col_idx]) if col_idx < len(row) else None
+                for col_idx in range(len(headers))]
+    
+    def write_stream(self, rows: Iterator[List[str]], headers: List[str], jsonfile: TextIO,
+                     output_format: str = 'objects', pretty: bool = False, ndjson: bool = False) -> int:
+        """
+        Write rows to jsonfile as they are read. The output is byte-identical
+        to json.dump of the fully converted data (or one JSON value per line
+        for NDJSON). Returns the number of rows written.
+        """
+        convert_row = self.clean_row_array if output_format == 'array' else self.clean_row_object
+        converters = self.column_converters(headers)
+        
+        if ndjson:
+            count = 0
+            for count, row in enumerate(rows, start=1):
+                jsonfile.write(json.dumps(convert_row(headers, row, converters), ensure_ascii=False))
+                jsonfile.write('\n')
+            return count
+        
+        # Match json.dump: ', ' between elements, or ',\n  ' with each element indented when pretty
+        indent = 2 if pretty else None
+        separator = ',\n  ' if pretty else ', '
+        opening, closing = ('{', '}') if output_format == 'object' else ('[', ']')
+        
+        count = 0
+        for row_idx, row in enumerate(rows):
+            element = json.dumps(convert_row(headers, row, converters), indent=indent, ensure_ascii=False)
+            if pretty:
+                element = element.replace('\n', '\n  ')
+            if output_format == 'object':
+                element = f'{json.dumps(str(row_idx))}: {element}'
+            jsonfile.write(separator if count else (opening + '\n  ' if pretty else opening))
+            jsonfile.write(element)
+            count += 1
+        
+        jsonfile.write(('\n' + closing if pretty else closing) if count else opening + closing)
+        return count
+    
+    def convert_stream(self, input_path: Path, output_path: Optional[Path] = None,
+                       output_format: str = 'objects', pretty: bool = False,
+                       ndjson: bool = False) -> Path:
+        """Convert CSV to JSON one row at a time; memory use does not depend on file size."""
+        if output_format == 'columns':
+            raise ValueError("The columns format needs every row at once and cannot be streamed")
+        if output_format not in ('objects', 'object', 'array'):
+            raise ValueError(f"Unknown output format: {output_format}")
+        if output_format == 'object' and ndjson:
+            raise ValueError("NDJSON output needs the 'objects' or 'array' format")
+        
+        rows = self.iter_csv(input_path)
+        headers = next(rows, None)
+        if headers is None:
+            raise ValueError("CSV file is empty")
+        
+        print(f"Streaming rows with {len(headers)} columns")
+        print(f"Headers: {headers}")
+        
+        if self.typed:
+            sample = list(islice(rows, self.sample_size))
+            self.infer_schema(headers, sample)
+            rows = chain(sample, rows)
+        
+        if output_path is None:
+            output_path = input_path.with_suffix('.ndjson' if ndjson else '.json')
+        
+        try:
+            with open(output_path, 'w', encoding='utf-8') as jsonfile:
+                count = self.write_stream(rows, headers, jsonfile, output_format, pretty, ndjson)
+        except OSError as e:
+            raise ValueError(f"Error writing JSON file: {e}") from e
+        
+        print(f"Wrote {count} data rows")
+        print(f"Successfully converted to: {output_path}")
+        return output_path
+    
+    def load_previous(self, output_path: Path, manifest_path: Path,
+                      settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        The previous run's rows as {key: (row hash, JSON bytes of the row)},
+        or None if there is no usable previous run.
+        """
+        if not manifest_path.exists() or not output_path.exists():
+            print("No previous manifest or output, converting every row")
+            return None
+        
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+            output_bytes = output_path.read_bytes()
+        except (OSError, ValueError) as e:
+            print(f"Unreadable manifest ({e}), converting every row")
+            return None
+        
+        if manifest.get('version') != MANIFEST_VERSION or manifest.get('settings') != settings:
+            print("Headers or conversion settings changed, converting every row")
+            return None
+        if manifest.get('output_sha256') != hashlib.sha256(output_bytes).hexdigest():
+            print(f"{output_path} was modified outside this script, converting every row")
+            return None
+        
+        return {key: (digest, output_bytes[start:end])
+                for key, digest, (start, end) in zip(manifest['keys'], manifest['hashes'], manifest['spans'])}
+    
+    def convert_incremental(self, input_path: Path, output_path: Optional[Path] = None,
+                            pretty: bool = False, key_column: str = 'model_id',
+                            changelog_path: Optional[Path] = None) -> Path:
+        """
+        Convert CSV to an array of objects, reusing the previous output for
+        rows whose raw CSV cells are unchanged. Rows are matched by key_column
+        through a manifest written next to the output. The manifest holds each
+        row's hash and its byte span in the output, so unchanged rows are
+        copied as bytes without being converted, parsed or serialized. Added,
+        changed and removed rows are appended as one entry to an NDJSON
+        changelog. The output is identical to a full conversion.
+        """
+        headers, data_rows = self.read_csv(input_path)
+        
+        if self.typed:
+            self.infer_schema(headers, data_rows[:self.sample_size])
+        
+        if output_path is None:
+            output_path = input_path.with_suffix('.json')
+        manifest_path = output_path.with_name(output_path.name + '.manifest')
+        if changelog_path is None:
+            changelog_path = output_path.with_name(output_path.name + '.changelog.ndjson')
+        
+        settings = {'headers': headers, 'key': key_column, 'schema': self.schema, 'pretty': pretty}
+        previous = self.load_previous(output_path, manifest_path, settings)
+        
+        keys = row_keys(headers, data_rows, key_column)
+        hashes = [row_hash(row) for row in data_rows]
+        converters = self.column_converters(headers)
+        
+        # Same layout as json.dump, see write_stream
+        opening, separator, closing = (b'[\n  ', b',\n  ', b'\n]') if pretty else (b'[', b', ', b']')
+        chunks = []
+        spans = []
+        position = 0
+        added = []
+        changed = []
+        converted = 0
+        for key, digest, row in zip(keys, hashes, data_rows):
+            chunk = separator if chunks else opening
+            chunks.append(chunk)
+            position += len(chunk)
+            
+            old = previous.get(key) if previous is not None else None
+            if old is not None and old[0] == digest:
+                element = old[1]
+            else:
+                obj = self.clean_row_object(headers, row, converters)
+                converted += 1
+                text = json.dumps(obj, indent=2 if pretty else None, ensure_ascii=False)
+                element = (text.replace('\n', '\n  ') if pretty else text).encode('utf-8')
+                if previous is not None and old is None:
+                    added.append(obj)
+                elif old is not None:
+                    old_obj = json.loads(old[1].decode('utf-8'))
+                    fields = {field: {'old': old_obj.get(field), 'new': value}
+                              for field, value in obj.items() if old_obj.get(field) != value}
+                    if fields:
+                        changed.append({'key': key, 'fields': fields})
+            
+            chunks.append(element)
+            spans.append((position, position + len(element)))
+            position += len(element)
+        chunks.append(closing if chunks else b'[]')
+        output_bytes = b''.join(chunks)
+        
+        current = set(keys)
+        removed = [json.loads(element.decode('utf-8')) for key, (_, element) in previous.items()
+                   if key not in current] if previous else []
+        
+        try:
+            output_path.write_bytes(output_bytes)
+            manifest = {
+                'version': MANIFEST_VERSION,
+                'settings': settings,
+                'output_sha256': hashlib.sha256(output_bytes).hexdigest(),
+                'keys': keys,
+                'hashes': hashes,
+                'spans': spans,
+            }
+            manifest_path.write_text(json.dumps(manifest, ensure_ascii=False), encoding='utf-8')
+            
+            if added or changed or removed:
+                entry = {
+                    'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                    'input': str(input_path),
+                    'added': added,
+                    'changed': changed,
+                    'removed': removed,
+                }
+                with open(changelog_path, 'a', encoding='utf-8') as changelog:
+                    changelog.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        except OSError as e:
+            raise ValueError(f"Error writing JSON file: {e}") from e
+        
+        print(f"Converted {converted} of {len(data_rows)} rows "
+              f"({len(added)} added, {len(changed)} changed, {len(removed)} removed)")
+        if added or changed or removed:
+            print(f"Changes appended to: {changelog_path}")
+        print(f"Successfully converted to: {output_path}")
+        return output_path
+    
     def validate_json(self, data: Any) -> bool:
         """Validate that data can be serialized to JSON."""
         try:
@@ -147,8 +519,11 @@ class CSVToJSONConverter:
     
     def convert(self, input_path: Path, output_path: Optional[Path] = None, 
                 output_format: str = 'objects', pretty: bool = False, 
-                validate: bool = False) -> Path:
+                validate: bool = False, dictionary: Optional[List[str]] = None,
+                binary: bool = False) -> Path:
         """Convert CSV to JSON with specified options."""
+        if binary and output_format != 'columns':
+            raise ValueError("Binary output is only available with the columns format")
         
         # Read CSV data
         headers, data_rows = self.read_csv(input_path)
@@ -156,6 +531,9 @@ class CSVToJSONConverter:
         print(f"Read {len(data_rows)} data rows with {len(headers)} columns")
         print(f"Headers: {headers}")
         
+        if self.typed:
+            self.infer_schema(headers, data_rows[:self.sample_size])
+        
         # Convert based on format
         if output_format == 'objects':
             json_data = self.convert_to_objects(headers, data_rows)
@@ -163,6 +541,8 @@ class CSVToJSONConverter:
             json_data = self.convert_to_object(headers, data_rows)
         elif output_format == 'array':
             json_data = self.convert_to_array(headers, data_rows)
+        elif output_format == 'columns':
+            json_data = build_columns(headers, self.convert_to_array(headers, data_rows), dictionary)
         else:
             raise ValueError(f"Unknown output format: {output_format}")
         
@@ -172,7 +552,15 @@ class CSVToJSONConverter:
         
         # Determine output path
         if output_path is None:
-            output_path = input_path.with_suffix('.json')
+            output_path = input_path.with_suffix('.bin' if binary else '.json')
+        
+        if binary:
+            try:
+                output_path.write_bytes(encode_binary(json_data))
+            except OSError as e:
+                raise ValueError(f"Error writing binary file: {e}") from e
+            print(f"Successfully converted to: {output_path}")
+            return output_path
         
         # Write JSON file
         try:
@@ -202,10 +590,20 @@ def main():
     parser.add_argument('--encoding', default='utf-8', help='Input file encoding (default: utf-8)')
     parser.add_argument('--delimiter', default=',', help='CSV delimiter (default: ,)')
     parser.add_argument('--quotechar', default='"', help='CSV quote character (default: ")')
-    parser.add_argument('--format', choices=['objects', 'object', 'array'], 
+    parser.add_argument('--format', choices=['objects', 'object', 'array', 'columns'], 
                        default='objects', help='Output format (default: objects)')
     parser.add_argument('--pretty', action='store_true', help='Pretty print JSON output')
     parser.add_argument('--validate', action='store_true', help='Validate JSON output before writing')
+    parser.add_argument('--stream', action='store_true', help='Read and write one row at a time (memory does not grow with file size)')
+    parser.add_argument('--ndjson', action='store_true', help='Write newline-delimited JSON, one row per line (implies --stream)')
+    parser.add_argument('--typed', action='store_true', help='Infer a type per column from a sample and convert with it')
+    parser.add_argument('--sample', type=int, default=1000, help='Rows used to infer column types with --typed (default: 1000)')
+    parser.add_argument('--dictionary', help='Comma-separated columns to dictionary-encode with --format columns (default: automatic)')
+    parser.add_argument('--binary', action='store_true', help='With --format columns, write the compact binary layout')
+    parser.add_argument('--incremental', action='store_true', help='Reconvert only rows changed since the last run (objects format)')
+    parser.add_argument('--key', default='model_id', help='Column identifying rows for --incremental (default: model_id)')
+    parser.add_argument('--changelog', help='Changelog file for --incremental (default: <output>.changelog.ndjson)')
+    add_arguments(parser)
     
     args = parser.parse_args()
     
@@ -213,20 +611,46 @@ def main():
     output_path = Path(args.output) if args.output else None
     
     try:
-        # Create converter and convert
-        converter = CSVToJSONConverter(
-            encoding=args.encoding,
-            delimiter=args.delimiter,
-            quotechar=args.quotechar
-        )
-        
-        result_path = converter.convert(
-            input_path=input_path,
-            output_path=output_path,
-            output_format=args.format,
-            pretty=args.pretty,
-            validate=args.validate
-        )
+        with Recorder('csv_to_json', args.report, args.profile) as recorder:
+            # Create converter and convert
+            converter = CSVToJSONConverter(
+                encoding=args.encoding,
+                delimiter=args.delimiter,
+                quotechar=args.quotechar,
+                typed=args.typed,
+                sample_size=args.sample
+            )
+            
+            if args.incremental:
+                if args.format != 'objects' or args.stream or args.ndjson or args.binary:
+                    raise ValueError("--incremental only supports the default objects format")
+                result_path = converter.convert_incremental(
+                    input_path=input_path,
+                    output_path=output_path,
+                    pretty=args.pretty,
+                    key_column=args.key,
+                    changelog_path=Path(args.changelog) if args.changelog else None
+                )
+            elif args.stream or args.ndjson:
+                # Every row is serialized on its own, so --validate has nothing left to check
+                result_path = converter.convert_stream(
+                    input_path=input_path,
+                    output_path=output_path,
+                    output_format=args.format,
+                    pretty=args.pretty,
+                    ndjson=args.ndjson
+                )
+            else:
+                result_path = converter.convert(
+                    input_path=input_path,
+                    output_path=output_path,
+                    output_format=args.format,
+                    pretty=args.pretty,
+                    validate=args.validate,
+                    dictionary=args.dictionary.split(',') if args.dictionary else None,
+                    binary=args.binary
+                )
+            recorder.rows = converter.rows_read
         
         print("Conversion completed successfully!")
         print(f"Output file: {result_path}")
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Add columns to a CSV from side tables keyed by model id, in one pass.
+
+Every side table is loaded once into a dict index. The main CSV is then
+streamed once, and each row gets one value per enrichment. N enrichments
+cost one read and one write of the main file instead of N full rewrites.
+Keys that no side table matches are reported per enrichment.
+
+A source is given as COLUMN=PATH[:FIELD]:
+
+    CSV   key in the first column, value in column FIELD (index or header
+          name, default 1, i.e. the second column)
+    JSON  a dict keyed by model id, or a list of schemas keyed by
+          'provider/name' (bak/fal-schemas.json); FIELD names the value.
+          Streamed entry by entry when ijson is installed
+
+If COLUMN is already in the header its values are replaced, so a run can be
+repeated. The output may be the input file; it is replaced only once
+fully written.
+
+Usage:
+    python enrich.py data/prices-v1.csv data/prices-v1.with-props.csv \\
+        --source description=bak/fal-schemas.json:desc --source tag=fal-tags2.csv
+"""
+
+import os
+import sys
+import csv
+import json
+import codecs
+import argparse
+from typing import Any, BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from atomic import atomic_write
+from instrument import Recorder, Stats, add_arguments
+
+# Unmatched keys printed per enrichment; the counts are always complete
+REPORT_LIMIT = 10
+
+
+class Enrichment(NamedTuple):
+    column: str
+    path: str
+    index: Dict[str, str]
+
+
+def cell_text(value: Any) -> str:
+    if value is None:
+        return ''
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+def load_csv_index(path: str, field: Optional[str] = None) -> Dict[str, str]:
+    """{first column: value column} for a CSV, with or without a header row; values are interned"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        value_column = 1
+        if field is not None and not field.isdigit():
+            header = next(reader, [])
+            if field not in header:
+                raise ValueError(f"{path} has no column {field!r}")
+            value_column = header.index(field)
+        elif field is not None:
+            value_column = int(field)
+
+        index = {}
+        for row in reader:
+            if len(row) > value_column:
+                index[row[0].strip()] = sys.intern(row[value_column].strip())
+        return index
+
+
+def seek_json_start(f: BinaryIO) -> bytes:
+    """
+    Move f to the first byte of the JSON value, past a UTF-8 BOM and any
+    amount of whitespace, and return that byte (b'' for an empty file).
+    """
+    offset = 0
+    if f.read(3) == codecs.BOM_UTF8:
+        offset = 3
+    f.seek(offset)
+    while True:
+        chunk = f.read(4096)
+        if not chunk:
+            return b''
+        stripped = chunk.lstrip(b' \t\r\n')
+        if stripped:
+            f.seek(offset + len(chunk) - len(stripped))
+            return stripped[:1]
+        offset += len(chunk)
+
+
+def iter_json_entries(path: str, stream: bool = True) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield (model id, entry) from a JSON dict keyed by model id or a list of
+    schemas keyed by 'provider/name'. With ijson installed entries are
+    parsed one at a time, so only one schema is in memory at once;
+    otherwise the whole file is loaded with json.load.
+    """
+    try:
+        import ijson
+    except ImportError:
+        ijson = None
+
+    with open(path, 'rb') as f:
+        if ijson is None or not stream:
+            data = json.load(f)
+            if isinstance(data, dict):
+                entries = data.items()
+            elif isinstance(data, list):
+                entries = ((None, entry) for entry in data)
+            else:
+                raise ValueError(f"{path} is neither a JSON object nor a list")
+        else:
+            first = seek_json_start(f)
+            if first == b'{':
+                entries = ijson.kvitems(f, '', use_float=True)
+            elif first == b'[':
+                entries = ((None, entry) for entry in ijson.items(f, 'item', use_float=True))
+            else:
+                raise ValueError(f"{path} is neither a JSON object nor a list")
+
+        for key, entry in entries:
+            if key is not None:
+                yield key, entry
+            elif isinstance(entry, dict):
+                yield f"{entry.get('provider')}/{entry.get('name')}", entry
+
+
+def load_json_index(path: str, field: str, stream: bool = True) -> Dict[str, str]:
+    """
+    {model id: field} for a JSON dict keyed by model id or a list of schemas.
+    Only the field is kept from each entry; values are interned, since
+    side-table columns such as tags repeat a few strings many times.
+    """
+    index = {}
+    for key, entry in iter_json_entries(path, stream):
+        index[key] = sys.intern(cell_text(entry.get(field) if isinstance(entry, dict) else entry))
+    return index
+
+
+def load_source(spec: str) -> Enrichment:
+    """Parse and load one COLUMN=PATH[:FIELD] source"""
+    column, sep, target = spec.partition('=')
+    if not sep or not column or not target:
+        raise ValueError(f"source must look like 'COLUMN=PATH[:FIELD]', got {spec!r}")
+    path, sep, field = target.rpartition(':')
+    if not sep or os.sep in field:
+        path, field = target, None
+
+    if path.endswith('.json'):
+        if not field:
+            raise ValueError(f"JSON source {path} needs a field, e.g. {column}={path}:desc")
+        index = load_json_index(path, field)
+    else:
+        index = load_csv_index(path, field)
+    return Enrichment(column, path, index)
+
+
+def enrich(input_path: str, output_path: str, enrichments: Sequence[Enrichment],
+           key_column: str = 'model_id', default: str = '', stats: Optional[Stats] = None) -> Dict[str, List[str]]:
+    """
+    Stream input_path to output_path, adding (or replacing) one column per
+    enrichment. Returns the unmatched keys per enrichment column; rows and
+    unmatched counts are also added to stats.
+    """
+    unmatched: Dict[str, List[str]] = {enrichment.column: [] for enrichment in enrichments}
+
+    # The input is closed before atomic_write renames the output, which may be the input
+    with atomic_write(output_path) as fout:
+        with open(input_path, 'r', encoding='utf-8', newline='') as fin:
+            reader = csv.reader(fin)
+            header = next(reader, None)
+            if header is None:
+                raise ValueError(f"{input_path} is empty")
+            if key_column not in header:
+                raise ValueError(f"{input_path} has no key column {key_column!r}")
+            key_idx = header.index(key_column)
+
+            # Existing columns are overwritten in place, new ones appended
+            header = list(header)
+            targets = []
+            for enrichment in enrichments:
+                if enrichment.column not in header:
+                    header.append(enrichment.column)
+                targets.append((header.index(enrichment.column), enrichment.index, unmatched[enrichment.column]))
+            width = len(header)
+
+            writer = csv.writer(fout)
+            writer.writerow(header)
+            rows = 0
+            for row in reader:
+                rows += 1
+                if len(row) < width:
+                    row.extend([''] * (width - len(row)))
+                key = row[key_idx]
+                for col_idx, index, missing in targets:
+                    value = index.get(key)
+                    if value is None:
+                        missing.append(key)
+                        value = default
+                    row[col_idx] = value
+                writer.writerow(row)
+
+    if stats is not None:
+        stats.rows += rows
+        for column, keys in unmatched.items():
+            stats.count('unmatched', column, len(keys))
+
+    return unmatched
+
+
+def report(unmatched: Dict[str, List[str]]):
+    for column, keys in unmatched.items():
+        if not keys:
+            print(f"{column}: every row matched")
+            continue
+        shown = ', '.join(keys[:REPORT_LIMIT])
+        more = f" and {len(keys) - REPORT_LIMIT} more" if len(keys) > REPORT_LIMIT else ''
+        print(f"{column}: {len(keys)} unmatched: {shown}{more}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Add columns to a CSV from side tables keyed by model id')
+    parser.add_argument('input', help='CSV file to enrich')
+    parser.add_argument('output', nargs='?', help='Output CSV (default: overwrite the input)')
+    parser.add_argument('--source', action='append', required=True, metavar='COLUMN=PATH[:FIELD]',
+                        help='Side table for one column (repeatable)')
+    parser.add_argument('--key', default='model_id', help='Key column of the input CSV (default: model_id)')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    output = args.output or args.input
+    with Recorder('enrich', args.report, args.profile) as recorder:
+        try:
+            enrichments = []
+            for spec in args.source:
+                with recorder.section(f'load {spec.partition("=")[0]}'):
+                    enrichments.append(load_source(spec))
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+
+        for enrichment in enrichments:
+            print(f"Loaded {len(enrichment.index)} keys for '{enrichment.column}' from {enrichment.path}")
+
+        try:
+            with recorder.section('join'):
+                unmatched = enrich(args.input, output, enrichments, args.key, stats=recorder)
+        except ValueError as e:
+            parser.error(str(e))
+    report(unmatched)
+    print(f"Wrote {output}")
+
+
+if __name__ == '__main__':
+    main()
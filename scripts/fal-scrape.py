@@ -1,51 +1,98 @@
-import re
 import os
 import json
+import argparse
 import requests
 
-f = open('links.txt')
-links = f.read().split('\n')
+from fal_fetch import DEFAULT_BASE_URL, PageFetcher
+from html_cache import HTMLCache
+from html_archive import PageArchive
+from price_extract import extract_price
+from instrument import Recorder, add_arguments
+
+parser = argparse.ArgumentParser(description='Scrape pricing snippets from fal.ai model pages')
+parser.add_argument('--links', default='links.txt', help='File with one model id per line (default: links.txt)')
+parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help=f'Model page base URL (default: {DEFAULT_BASE_URL})')
+parser.add_argument('--concurrent', action='store_true', help='Fetch pages with a concurrent worker pool')
+parser.add_argument('--workers', type=int, default=8, help='Concurrent workers (default: 8)')
+parser.add_argument('--rate', type=float, default=4.0, help='Max requests per second per host, 0 for unlimited (default: 4)')
+parser.add_argument('--retries', type=int, default=3, help='Retries per page with exponential backoff (default: 3)')
+parser.add_argument('--ttl', type=float, default=6 * 3600, help='Seconds before a cached page is revalidated (default: 6h)')
+parser.add_argument('--max-age', type=float, default=30 * 86400, help='Evict cached pages for unlisted models not checked for this many seconds (default: 30d)')
+parser.add_argument('--archive', help='Store page bodies compressed in this single SQLite file instead of fal-html/objects/')
+parser.add_argument('--output', default='fal-prices.json', help='Output JSON of price snippets (default: fal-prices.json)')
+parser.add_argument('--timeout', type=float, default=30.0, help='Request timeout in seconds (default: 30)')
+add_arguments(parser)
+args = parser.parse_args()
+
+recorder = Recorder('fal-scrape', args.report, args.profile).start()
+
+f = open(args.links)
+links = [link for link in f.read().split('\n') if link]
 f.close()
 
+cache = HTMLCache('fal-html', ttl=args.ttl, blobs=PageArchive(args.archive) if args.archive else None)
 for link in links:
-  filename = os.path.join('fal-html', link.replace('/', '_') + '.html')
-  if os.path.exists(filename):
-    continue
+  cache.adopt_file(link, os.path.join('fal-html', link.replace('/', '_') + '.html'))
+
+pending = [link for link in links if not cache.is_fresh(link)]
 
-  try:
-    response = requests.get(f'https://fal.ai/models/{link}')
-    with open(filename, 'w') as f:
-      f.write(response.text)
+def save_page(link, response):
+  if response.status_code != 304:
+    response.raise_for_status()
+  if cache.store(link, response):
+    print(f'Saved {link}')
 
-    print(f'Saved {filename}')
-  except Exception as e:
-    print(f'Error: {e}')
+with recorder.section('fetch'):
+  if args.concurrent:
+    fetcher = PageFetcher(args.base_url, workers=args.workers, rate=args.rate,
+                          retries=args.retries, timeout=args.timeout)
+    try:
+      fetcher.fetch_all(pending, save_page, headers_for=cache.conditional_headers)
+    finally:
+      fetcher.close()
+  else:
+    for link in pending:
+      try:
+        response = requests.get(f'{args.base_url}/{link}', headers=cache.conditional_headers(link), timeout=args.timeout)
+        save_page(link, response)
+      except Exception as e:
+        print(f'Error: {e}')
+recorder.count('pages', 'fetched', len(pending))
+recorder.count('pages', 'fresh in cache', len(links) - len(pending))
 
+cache.evict(keep=links, max_age=args.max_age)
+cache.save()
 
-regex = re.compile(r'<div class="flex items-center p-4 pt-4 text-sm text-content-light"><div><p>(.+?)</p></div></div>', re.DOTALL)
-regex2 = re.compile(r'<div class="flex flex-col items-start space-y-3"><div class="space-y-3"><p>(.+?)</p></div></div>', re.DOTALL)
 
 prices = {}
+rule_hits = {}
+
+unparsed = [link for link in links if not cache.cached_snippet(link)[0]]
+for link, html in cache.iter_pages(unparsed):
+  with recorder.section('extract_price'):
+    snippet, rule = extract_price(html)
+  cache.set_snippet(link, snippet, rule)
 
 for link in links:
-  filename = os.path.join('fal-html', link.replace('/', '_') + '.html')
-  if not os.path.exists(filename):
+  found, snippet = cache.cached_snippet(link)
+  if not found:
     continue
 
-  with open(filename, 'r') as f:
-    html = f.read()
-
-  match = regex.search(html)
-  if match:
-    #print(link, match.group(1))
-    prices[link] = match.group(1)
+  rule = cache.entries[link].get('rule')
+  rule_hits[rule] = rule_hits.get(rule, 0) + 1
+  recorder.count('rules', rule or 'no match')
+  if snippet is not None:
+    prices[link] = snippet
   else:
-    match = regex2.search(html)
-    if match:
-      #print(link, match.group(1))
-      prices[link] = match.group(1)
-    else:
-      print(f'No match found for {link}')
-
-# print(json.dumps(prices, indent=2))
-#print('done!')
\ No newline at end of file
+    print(f'No match found for {link}')
+
+cache.save()
+
+with open(args.output, 'w', encoding='utf-8') as f:
+  json.dump(prices, f, indent=2)
+
+for rule, hits in rule_hits.items():
+  print(f'{rule or "no match"}: {hits} pages')
+recorder.rows = len(links)
+recorder.stop()
+print(f'Wrote {len(prices)} prices to {args.output}')
@@ -0,0 +1,179 @@
+"""
+Concurrent page fetcher used by fal-scrape.py.
+
+Pages are fetched by a bounded thread pool that shares one keep-alive
+requests.Session, so connections to fal.ai are reused across workers.
+Request starts are spaced out per host, failed requests are retried with
+exponential backoff, and a progress line with throughput is printed as
+pages complete.
+
+The base URL is configurable so the fetcher can be pointed at a local
+stand-in server, e.g.:
+
+    python -m http.server 8000 -d fixtures
+    python fal-scrape.py --concurrent --links fixtures/links.txt \\
+        --base-url http://localhost:8000/models
+"""
+
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = 'https://fal.ai/models'
+
+# Responses worth retrying; anything else is returned to the caller as-is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HostRateLimiter:
+    """Spaces out request starts so no host sees more than `rate` per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host: str):
+        if not self.interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class Progress:
+    """Thread-safe page counter that prints a progress and throughput line."""
+
+    def __init__(self, total: int, stream=sys.stderr, every: float = 1.0):
+        self.total = total
+        self.stream = stream
+        self.every = every
+        self.done = 0
+        self.failed = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, nbytes: int = 0, failed: bool = False):
+        with self._lock:
+            self.done += 1
+            self.bytes += nbytes
+            if failed:
+                self.failed += 1
+
+            now = time.monotonic()
+            if now - self._last_report >= self.every or self.done == self.total:
+                self._last_report = now
+                self.report()
+
+    def report(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        print(
+            f'[{self.done}/{self.total}] '
+            f'{self.done / elapsed:.1f} pages/s, '
+            f'{self.bytes / elapsed / 1024:.1f} KiB/s, '
+            f'{self.failed} failed',
+            file=self.stream
+        )
+
+
+class PageFetcher:
+    """Fetches model pages concurrently over a shared connection pool."""
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, workers: int = 8,
+                 rate: float = 4.0, retries: int = 3, backoff: float = 0.5,
+                 timeout: float = 30.0):
+        self.base_url = base_url.rstrip('/')
+        self.workers = max(1, workers)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limiter = HostRateLimiter(rate)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def url_for(self, link: str) -> str:
+        return f'{self.base_url}/{link}'
+
+    def retry_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Exponential backoff, honouring a numeric Retry-After header if present."""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return float(retry_after)
+        return self.backoff * (2 ** attempt)
+
+    def fetch(self, link: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """Fetch a single page, retrying on connection errors and retryable statuses."""
+        url = self.url_for(link)
+        host = urlsplit(url).netloc
+
+        for attempt in range(self.retries + 1):
+            self.limiter.wait(host)
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except requests.exceptions.RequestException:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.retry_delay(attempt))
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                time.sleep(self.retry_delay(attempt, response))
+                continue
+
+            return response
+
+    def fetch_all(self, links: Iterable[str],
+                  on_page: Callable[[str, requests.Response], None],
+                  headers_for: Optional[Callable[[str], Dict[str, str]]] = None,
+                  progress: Optional[Progress] = None) -> Progress:
+        """
+        Fetch every link and hand each response to `on_page`.
+
+        `on_page` and `headers_for` are always called from the calling thread,
+        so they can write files or update shared state without locking.
+        Errors are printed and counted, not raised.
+        """
+        links = list(links)
+        if progress is None:
+            progress = Progress(len(links))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # headers_for runs here rather than in the workers, so it can read
+            # caller state (e.g. a SQLite-backed cache) bound to this thread
+            futures = {
+                pool.submit(self.fetch, link, headers_for(link) if headers_for else None): link
+                for link in links
+            }
+            for future in as_completed(futures):
+                link = futures[future]
+                try:
+                    response = future.result()
+                    on_page(link, response)
+                except Exception as e:
+                    print(f'Error: {link}: {e}')
+                    progress.update(failed=True)
+                    continue
+                progress.update(len(response.content))
+
+        return progress
+
+    def close(self):
+        self.session.close()
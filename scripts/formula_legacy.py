@@ -1,6 +1,11 @@
-import json
+"""
+Reference copy of the original strip_html / create_inference_formula from
+process_prices.py, kept unchanged so tests/test_formula.py and
+bench_strip.py can check that the pricing package produces identical
+output.
+"""
+
 import re
-import csv
 from html.parser import HTMLParser
 
 class HTMLStripper(HTMLParser):
@@ -231,23 +236,3 @@ def create_inference_formula(text):
     
     # Default: return first price with generic unit
     return f"unit * {prices[0]}"
-
-# Load JSON data
-with open('fal-prices.json', 'r', encoding='utf-8') as f:
-    data = json.load(f)
-
-# Create CSV
-with open('fal-prices.csv', 'w', newline='', encoding='utf-8') as csvfile:
-    writer = csv.writer(csvfile)
-    
-    # Write header
-    writer.writerow(['Model ID', 'Plain Text', 'Inference Formula'])
-    
-    # Process each entry
-    for key, html_value in data.items():
-        plain_text = strip_html(html_value)
-        formula = create_inference_formula(plain_text)
-        writer.writerow([key, plain_text, formula])
-
-print(f"Created fal-prices.csv with {len(data)} entries")
-
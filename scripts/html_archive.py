@@ -0,0 +1,78 @@
+"""
+Single-file compressed page archive for fal-scrape.py.
+
+Page bodies are stored zlib-compressed in one SQLite database, keyed by
+their content hash, instead of one uncompressed file per page. It plugs
+into HTMLCache as a drop-in replacement for the objects/ directory:
+
+    cache = HTMLCache('fal-html', blobs=PageArchive('fal-html.sqlite'))
+"""
+
+import zlib
+import sqlite3
+from typing import Iterable, Iterator, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+)
+"""
+
+
+class PageArchive:
+    """Content-addressed, zlib-compressed blob store in a single SQLite file."""
+
+    def __init__(self, path: str = 'fal-html.sqlite', level: int = 6):
+        self.path = path
+        self.level = level
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute(SCHEMA)
+        self.db.commit()
+
+    def has(self, sha: str) -> bool:
+        row = self.db.execute('SELECT 1 FROM blobs WHERE sha256 = ?', (sha,)).fetchone()
+        return row is not None
+
+    def put(self, sha: str, body: bytes):
+        self.db.execute(
+            'INSERT OR IGNORE INTO blobs (sha256, size, data) VALUES (?, ?, ?)',
+            (sha, len(body), zlib.compress(body, self.level))
+        )
+
+    def get(self, sha: str) -> Optional[bytes]:
+        row = self.db.execute('SELECT data FROM blobs WHERE sha256 = ?', (sha,)).fetchone()
+        if row is None:
+            return None
+        return zlib.decompress(row[0])
+
+    def get_many(self, shas: Iterable[str]) -> Iterator[Tuple[str, bytes]]:
+        """Stream (sha, body) pairs for the given hashes, one row at a time."""
+        cursor = self.db.cursor()
+        for sha in shas:
+            row = cursor.execute('SELECT data FROM blobs WHERE sha256 = ?', (sha,)).fetchone()
+            if row is not None:
+                yield sha, zlib.decompress(row[0])
+
+    def delete(self, sha: str):
+        self.db.execute('DELETE FROM blobs WHERE sha256 = ?', (sha,))
+
+    def hashes(self) -> Iterator[str]:
+        for (sha,) in self.db.execute('SELECT sha256 FROM blobs').fetchall():
+            yield sha
+
+    def stats(self) -> Tuple[int, int, int]:
+        """Returns (blob count, raw bytes, compressed bytes)."""
+        count, raw, packed = self.db.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM blobs'
+        ).fetchone()
+        return count, raw, packed
+
+    def flush(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
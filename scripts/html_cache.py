@@ -0,0 +1,239 @@
+"""
+Conditional-GET page cache for fal-scrape.py.
+
+Each cached page keeps its ETag / Last-Modified validators so a refresh
+can send If-None-Match / If-Modified-Since and get a cheap 304 back.
+Bodies are stored content-addressed by SHA-256, so identical pages share
+one blob, and the price snippet extracted from a body is remembered
+against its hash so unchanged pages skip parsing entirely.
+
+Layout under the cache root (default: fal-html/):
+
+    index.json                 per-link validators, hashes and timestamps
+    objects/ab/abcdef....html  page bodies, keyed by content hash
+
+Bodies can instead live in a single compressed archive by passing
+blobs=PageArchive(...) (see html_archive.py).
+"""
+
+import os
+import json
+import time
+import hashlib
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+INDEX_FILE = 'index.json'
+OBJECTS_DIR = 'objects'
+
+
+def content_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+class DirectoryStore:
+    """Content-addressed blob store with one file per body under objects/."""
+
+    def __init__(self, root: str):
+        self.root = os.path.join(root, OBJECTS_DIR)
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, sha: str) -> str:
+        return os.path.join(self.root, sha[:2], sha + '.html')
+
+    def has(self, sha: str) -> bool:
+        return os.path.exists(self.path(sha))
+
+    def put(self, sha: str, body: bytes):
+        path = self.path(sha)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    def get(self, sha: str) -> Optional[bytes]:
+        try:
+            with open(self.path(sha), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def get_many(self, shas: Iterable[str]) -> Iterator[Tuple[str, bytes]]:
+        for sha in shas:
+            body = self.get(sha)
+            if body is not None:
+                yield sha, body
+
+    def delete(self, sha: str):
+        try:
+            os.remove(self.path(sha))
+        except FileNotFoundError:
+            pass
+
+    def hashes(self) -> Iterator[str]:
+        for prefix in os.listdir(self.root):
+            for name in os.listdir(os.path.join(self.root, prefix)):
+                if name.endswith('.html'):
+                    yield name[:-len('.html')]
+
+    def flush(self):
+        pass
+
+
+class HTMLCache:
+    """Page cache with HTTP validators, TTL and content-addressed bodies."""
+
+    def __init__(self, root: str = 'fal-html', ttl: float = 6 * 3600, blobs=None):
+        self.root = root
+        self.ttl = ttl
+        self.index_path = os.path.join(root, INDEX_FILE)
+        self.entries: Dict[str, dict] = {}
+
+        os.makedirs(root, exist_ok=True)
+        self.blobs = blobs if blobs is not None else DirectoryStore(root)
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    # Entries
+
+    def entry(self, link: str) -> Optional[dict]:
+        entry = self.entries.get(link)
+        if entry is None or not self.blobs.has(entry['sha256']):
+            return None
+        return entry
+
+    def is_fresh(self, link: str, now: Optional[float] = None) -> bool:
+        """True if the page was checked within the TTL and needs no request at all."""
+        entry = self.entry(link)
+        if entry is None:
+            return False
+        now = time.time() if now is None else now
+        return now - entry['checked_at'] < self.ttl
+
+    def conditional_headers(self, link: str) -> Dict[str, str]:
+        entry = self.entry(link)
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, link: str, response) -> bool:
+        """
+        Record a response for `link`. Returns True if the page body changed.
+
+        A 304 only refreshes the entry's check time; any other response is
+        expected to be a successful 200 with a body.
+        """
+        now = time.time()
+        entry = self.entries.get(link)
+
+        if response.status_code == 304 and entry is not None:
+            entry['checked_at'] = now
+            return False
+
+        body = response.content
+        sha = content_hash(body)
+        self.blobs.put(sha, body)
+
+        changed = entry is None or entry['sha256'] != sha
+        new_entry = {
+            'sha256': sha,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': now,
+            'checked_at': now,
+        }
+        if not changed and 'rule' in entry:
+            new_entry['snippet'] = entry['snippet']
+            new_entry['rule'] = entry['rule']
+        self.entries[link] = new_entry
+        return changed
+
+    def adopt_file(self, link: str, filename: str):
+        """Import a page saved by the old one-file-per-model layout, without validators."""
+        if link in self.entries or not os.path.exists(filename):
+            return
+        with open(filename, 'rb') as f:
+            body = f.read()
+        sha = content_hash(body)
+        self.blobs.put(sha, body)
+        mtime = os.path.getmtime(filename)
+        self.entries[link] = {
+            'sha256': sha,
+            'etag': None,
+            'last_modified': None,
+            'fetched_at': mtime,
+            'checked_at': mtime,
+        }
+
+    def get(self, link: str) -> Optional[str]:
+        entry = self.entry(link)
+        if entry is None:
+            return None
+        return self.blobs.get(entry['sha256']).decode('utf-8', errors='replace')
+
+    def iter_pages(self, links: Iterable[str]) -> Iterator[Tuple[str, str]]:
+        """Stream (link, html) for every cached link, reading one body at a time."""
+        by_sha: Dict[str, List[str]] = {}
+        for link in links:
+            entry = self.entries.get(link)
+            if entry is not None:
+                by_sha.setdefault(entry['sha256'], []).append(link)
+
+        for sha, body in self.blobs.get_many(by_sha):
+            html = body.decode('utf-8', errors='replace')
+            for link in by_sha[sha]:
+                yield link, html
+
+    # Parsed snippets
+
+    def cached_snippet(self, link: str):
+        """
+        Returns (True, snippet) if the snippet was already extracted from the
+        current body, else (False, None). The snippet itself may be None for
+        pages where nothing matched.
+        """
+        entry = self.entry(link)
+        if entry is None or 'rule' not in entry:
+            return False, None
+        return True, entry['snippet']
+
+    def set_snippet(self, link: str, snippet: Optional[str], rule: Optional[str] = None):
+        self.entries[link]['snippet'] = snippet
+        self.entries[link]['rule'] = rule
+
+    # Maintenance
+
+    def evict(self, keep: Iterable[str] = (), max_age: float = 30 * 86400) -> int:
+        """
+        Drop entries not in `keep` that were not checked within `max_age`
+        seconds, then delete blobs no entry references. Returns the number
+        of blobs deleted.
+        """
+        keep = set(keep)
+        cutoff = time.time() - max_age
+        for link in list(self.entries):
+            if link not in keep and self.entries[link]['checked_at'] < cutoff:
+                del self.entries[link]
+
+        referenced = {entry['sha256'] for entry in self.entries.values()}
+        removed = 0
+        for sha in list(self.blobs.hashes()):
+            if sha not in referenced:
+                self.blobs.delete(sha)
+                removed += 1
+        return removed
+
+    def save(self):
+        self.blobs.flush()
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
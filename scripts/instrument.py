@@ -0,0 +1,247 @@
+"""
+Timing and profiling instrumentation shared by the pipeline scripts.
+
+A script wraps its work in a Recorder and reports where the time went:
+
+    with Recorder('process_prices', args.report, args.profile) as recorder:
+        for row in rows:
+            with recorder.section('strip_html'):
+                ...
+            recorder.count('rules', rule_name)
+        recorder.rows = count
+
+On exit the recorder writes a JSON report (--report) with wall time, rows
+per second, peak RSS of the process and of its children, time and calls
+per section, event counts (e.g. formula rule hits) and pricing cache
+statistics. With --profile the run is also profiled with cProfile and the
+stats dumped for `python -m pstats` or snakeviz; only the main process is
+profiled. Without either option the recorder only times sections, which
+costs about half a microsecond per section.
+
+Work done in worker processes is timed in a Stats object of its own, which
+is returned with the results and merged into the recorder.
+
+To check a run against a saved baseline (stage reports or pipeline.json
+from pipeline.py --report):
+
+    python instrument.py baseline/pipeline.json reports/pipeline.json [--tolerance 0.2]
+
+exits non-zero if any stage's rows/s dropped by more than the tolerance.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import cProfile
+from time import perf_counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPORT_VERSION = 1
+
+
+def peak_rss_mb(who: str = 'self') -> Optional[float]:
+    """Peak resident set size in MB of this process ('self') or its waited-for children ('children')"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who == 'self' else resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(usage.ru_maxrss / scale, 1)
+
+
+class Section:
+    """A plain class rather than @contextmanager: sections wrap per-row work, so entering one must be cheap"""
+
+    __slots__ = ('entry', 'started')
+
+    def __init__(self, entry: list):
+        self.entry = entry
+
+    def __enter__(self):
+        self.started = perf_counter()
+
+    def __exit__(self, exc_type, exc, tb):
+        entry = self.entry
+        entry[0] += perf_counter() - self.started
+        entry[1] += 1
+        return False
+
+
+class Stats:
+    """Rows processed, wall time and calls per named section and event counts; picklable and mergeable"""
+
+    def __init__(self):
+        self.rows = 0
+        self.sections: Dict[str, list] = {}
+        self.counts: Dict[str, Dict[str, int]] = {}
+
+    def section(self, name: str) -> 'Section':
+        """Context manager adding its wall time to the named section"""
+        entry = self.sections.get(name)
+        if entry is None:
+            entry = self.sections[name] = [0.0, 0]
+        return Section(entry)
+
+    def add_time(self, name: str, seconds: float, calls: int = 1):
+        entry = self.sections.get(name)
+        if entry is None:
+            self.sections[name] = [seconds, calls]
+        else:
+            entry[0] += seconds
+            entry[1] += calls
+
+    def count(self, group: str, key: Any, n: int = 1):
+        counts = self.counts.setdefault(group, {})
+        key = str(key)
+        counts[key] = counts.get(key, 0) + n
+
+    def merge(self, other: 'Stats'):
+        self.rows += other.rows
+        for name, (seconds, calls) in other.sections.items():
+            self.add_time(name, seconds, calls)
+        for group, counts in other.counts.items():
+            for key, n in counts.items():
+                self.count(group, key, n)
+
+
+def pricing_caches() -> Dict[str, Dict[str, int]]:
+    """LRU cache statistics of the pricing functions this process called (not those of worker processes)"""
+    pricing = sys.modules.get('pricing')
+    if pricing is None:
+        return {}
+    return {name: info._asdict() for name, info in pricing.cache_info(loaded_only=True).items()
+            if info.hits or info.misses}
+
+
+class Recorder(Stats):
+    """Stats for one run of a stage, written as a JSON report when the run ends"""
+
+    def __init__(self, stage: str, report_path: Optional[str] = None, profile_path: Optional[str] = None):
+        super().__init__()
+        self.stage = stage
+        self.report_path = report_path
+        self.profile_path = profile_path
+        self.extra: Dict[str, Any] = {}
+        self.profiler = None
+
+    def __enter__(self) -> 'Recorder':
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop(ok=exc_type is None)
+        return False
+
+    def start(self) -> 'Recorder':
+        """Start timing (and profiling); for scripts that cannot wrap their work in a with block"""
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        if self.profile_path:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        return self
+
+    def stop(self, ok: bool = True) -> Dict[str, Any]:
+        """Stop timing, write the report and the profile if requested, and return the report"""
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.profile_path)
+        report = self.report(ok)
+        if self.report_path:
+            directory = os.path.dirname(os.path.abspath(self.report_path))
+            os.makedirs(directory, exist_ok=True)
+            with open(self.report_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        return report
+
+    def report(self, ok: bool = True) -> Dict[str, Any]:
+        wall = time.perf_counter() - self.started
+        sections = {
+            name: {'seconds': round(seconds, 6), 'calls': calls, 'share': round(seconds / wall, 4) if wall else None}
+            for name, (seconds, calls) in sorted(self.sections.items(), key=lambda item: -item[1][0])
+        }
+        return {
+            'version': REPORT_VERSION,
+            'stage': self.stage,
+            'ok': ok,
+            'started': self.started_at.isoformat(timespec='seconds'),
+            'argv': sys.argv,
+            'wall_seconds': round(wall, 6),
+            'cpu_seconds': round(time.process_time() - self.cpu_started, 6),
+            'rows': self.rows,
+            'rows_per_second': round(self.rows / wall, 1) if wall else None,
+            'peak_rss_mb': peak_rss_mb('self'),
+            'peak_rss_children_mb': peak_rss_mb('children'),
+            'sections': sections,
+            'counts': {group: dict(sorted(counts.items(), key=lambda item: -item[1]))
+                       for group, counts in self.counts.items()},
+            'caches': pricing_caches(),
+            'profile': self.profile_path,
+            **self.extra,
+        }
+
+
+def add_arguments(parser):
+    """Add --report and --profile to a script's argument parser"""
+    parser.add_argument('--report', help='Write a JSON report of timings, rows/s, peak RSS and rule hits to this file')
+    parser.add_argument('--profile', help='Profile the run with cProfile and dump the stats to this file')
+
+
+def stage_reports(report: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Stage name -> stage report, from a pipeline.json or a single stage report"""
+    if 'stages' in report:
+        return {name: result['report'] for name, result in report['stages'].items() if 'report' in result}
+    return {report['stage']: report}
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = 0.2) -> List[str]:
+    """Print rows/s and section time changes per stage; return the stages whose rows/s regressed"""
+    regressions = []
+    old_stages, new_stages = stage_reports(baseline), stage_reports(current)
+    for name, new in new_stages.items():
+        old = old_stages.get(name)
+        if old is None or not old.get('rows_per_second') or not new.get('rows_per_second'):
+            print(f"{name}: no baseline to compare with")
+            continue
+        change = new['rows_per_second'] / old['rows_per_second'] - 1
+        flag = ' REGRESSION' if change < -tolerance else ''
+        print(f"{name}: {old['rows_per_second']:.0f} -> {new['rows_per_second']:.0f} rows/s ({change:+.0%}), "
+              f"peak RSS {old['peak_rss_mb']} -> {new['peak_rss_mb']} MB{flag}")
+        for section, timing in new['sections'].items():
+            before = old['sections'].get(section)
+            if before and before['calls'] and timing['calls']:
+                per_call = timing['seconds'] / timing['calls'] * 1e6
+                per_call_before = before['seconds'] / before['calls'] * 1e6
+                print(f"    {section}: {per_call_before:.1f} -> {per_call:.1f} us per call")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare instrumentation reports against a baseline')
+    parser.add_argument('baseline', help='Baseline report (stage report or pipeline.json)')
+    parser.add_argument('current', help='Report to check')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed drop in rows/s, as a fraction (default: 0.2)')
+    args = parser.parse_args()
+
+    reports = []
+    for path in (args.baseline, args.current):
+        with open(path, 'r', encoding='utf-8') as f:
+            reports.append(json.load(f))
+    regressions = compare(reports[0], reports[1], args.tolerance)
+    if regressions:
+        print(f"Regressed: {', '.join(regressions)}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
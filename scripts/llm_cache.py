@@ -0,0 +1,85 @@
+"""
+Persistent cache of LLM responses for process_llm.py.
+
+Responses are stored in SQLite keyed by a hash of everything that shapes
+the answer: model, prompt template, plain text and temperature. Rerunning
+over the same CSV only pays for rows whose text changed. When the template
+or model changes, old entries simply stop matching; prune() drops them.
+"""
+
+import time
+import sqlite3
+import hashlib
+from typing import Optional, Sequence
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    template_hash TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+
+def template_hash(template: str) -> str:
+    return hashlib.sha256(template.encode('utf-8')).hexdigest()
+
+
+def response_key(model: str, template: str, plain_text: str, temperature: float) -> str:
+    parts = (model, template_hash(template), plain_text, repr(temperature))
+    return hashlib.sha256('\x00'.join(parts).encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """SQLite-backed response cache with hit/miss counters."""
+
+    def __init__(self, path: str = 'llm-cache.sqlite'):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.db = sqlite3.connect(path)
+        self.db.execute(SCHEMA)
+        self.db.commit()
+
+    def get(self, model: str, template: str, plain_text: str, temperature: float) -> Optional[str]:
+        return self.get_any(model, (template,), plain_text, temperature)
+
+    def get_any(self, model: str, templates: Sequence[str], plain_text: str, temperature: float) -> Optional[str]:
+        """The response cached under the first of templates that has one; counts one hit or miss."""
+        for template in templates:
+            key = response_key(model, template, plain_text, temperature)
+            row = self.db.execute('SELECT response FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                self.hits += 1
+                return row[0]
+        self.misses += 1
+        return None
+
+    def put(self, model: str, template: str, plain_text: str, temperature: float, response: str):
+        key = response_key(model, template, plain_text, temperature)
+        self.db.execute(
+            'INSERT OR REPLACE INTO responses (key, model, template_hash, response, created_at) VALUES (?, ?, ?, ?, ?)',
+            (key, model, template_hash(template), response, time.time())
+        )
+        self.db.commit()
+
+    def prune(self, model: str, *templates: str) -> int:
+        """Delete entries made with a different model or with none of the templates. Returns the count removed."""
+        placeholders = ', '.join('?' * len(templates))
+        cursor = self.db.execute(
+            f'DELETE FROM responses WHERE model != ? OR template_hash NOT IN ({placeholders})',
+            (model, *(template_hash(template) for template in templates))
+        )
+        self.db.commit()
+        self.db.execute('VACUUM')
+        return cursor.rowcount
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"LLM cache: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate)"
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenRouter /chat/completions endpoint, for running
+process_llm.py without an API key or network access.
+
+The reply to each request is "stub: <last line of the prompt>", i.e. an
+echo of the plain-text pricing row. Batched prompts (lines of the form
+"[n] text") get one "[n] stub: text" line per slot. Latency (with random
+jitter, so replies arrive out of order), periodic 429 responses and batched
+replies with a missing slot can be simulated. Requests seen and the most
+requests in flight at once are counted per server; tests start one with
+make_server(port=0).
+
+Usage:
+    python llm_stub_server.py [--port 8799] [--latency 0.2] [--jitter 0.1] [--rate-limit-every 5] [--drop-slot-every 3]
+    LLM_API_BASE=http://localhost:8799 OPENROUTER_API_KEY=stub \\
+        python process_llm.py fal-prices-plain.csv out.csv --concurrency 8
+"""
+
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SLOT_RE = re.compile(r'^\[(\d+)\] (.*)$', re.MULTILINE)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Options and counters; make_server gives every server a subclass of its own
+    latency = 0.0
+    jitter = 0.0
+    rate_limit_every = 0
+    drop_slot_every = 0
+    requests_seen = 0
+    batches_seen = 0
+    rate_limited = 0
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload, headers=None):
+        # The client can act on the reply as soon as it is sent, so the request stops counting first
+        self.done()
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self.path.endswith('/chat/completions'):
+            self.send_json(404, {'error': {'message': 'not found'}})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+
+        stats = type(self)
+        with stats.lock:
+            stats.requests_seen += 1
+            count = stats.requests_seen
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+        self.counted = True
+        try:
+            self.reply(request, count)
+        finally:
+            self.done()
+
+    def done(self):
+        """Stop counting this request as in flight (once)"""
+        if getattr(self, 'counted', False):
+            self.counted = False
+            stats = type(self)
+            with stats.lock:
+                stats.in_flight -= 1
+
+    def reply(self, request, count):
+        stats = type(self)
+        if self.rate_limit_every and count % self.rate_limit_every == 0:
+            with stats.lock:
+                stats.rate_limited += 1
+            self.send_json(429, {'error': {'message': 'rate limited'}}, {'Retry-After': '0'})
+            return
+
+        time.sleep(self.latency + random.uniform(0, self.jitter))
+
+        prompt = request['messages'][-1]['content']
+        slots = SLOT_RE.findall(prompt)
+        if slots:
+            with stats.lock:
+                stats.batches_seen += 1
+                batch_count = stats.batches_seen
+            if self.drop_slot_every and batch_count % self.drop_slot_every == 0:
+                slots = slots[:-1]
+            content = '\n'.join(f'[{n}] stub: {text}' for n, text in slots)
+        else:
+            lines = [line for line in prompt.strip().split('\n') if line.strip()]
+            content = f'stub: {lines[-1] if lines else ""}'
+        self.send_json(200, {
+            'model': request.get('model'),
+            'choices': [{'message': {'role': 'assistant', 'content': content}}],
+            'usage': {
+                'prompt_tokens': len(prompt) // 4,
+                'completion_tokens': len(content) // 4,
+            },
+        })
+
+
+def make_server(port: int = 8799, **options) -> ThreadingHTTPServer:
+    """
+    A stub server on 127.0.0.1 (port 0 picks a free one) whose handler class
+    carries the options (latency, jitter, rate_limit_every, drop_slot_every)
+    and this server's counters, as server.RequestHandlerClass.
+    """
+    handler = type('StubHandler', (StubHandler,), dict(options, lock=threading.Lock()))
+    return ThreadingHTTPServer(('127.0.0.1', port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stub /chat/completions server')
+    parser.add_argument('--port', type=int, default=8799, help='Port to listen on (default: 8799)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before each reply (default: 0)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Up to this many extra seconds of random latency (default: 0)')
+    parser.add_argument('--rate-limit-every', type=int, default=0, help='Answer every Nth request with 429 (default: never)')
+    parser.add_argument('--drop-slot-every', type=int, default=0, help='Leave the last slot out of every Nth batched reply (default: never)')
+    args = parser.parse_args()
+
+    server = make_server(args.port, latency=args.latency, jitter=args.jitter,
+                         rate_limit_every=args.rate_limit_every, drop_slot_every=args.drop_slot_every)
+    print(f'Stub LLM listening on http://127.0.0.1:{args.port}')
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Run the price data pipeline, rebuilding only stages whose inputs changed.
+
+Each stage is one of the scripts in this directory, with its input and
+output files declared in STAGES (paths relative to the repository root):
+
+    scrape   links.txt            -> fal-prices.json          (network; only when named)
+    prices   fal-prices.json      -> fal-prices-plain2.csv
+    units    fal-prices-plain2.csv -> fal-prices-units.csv
+    tags     fal-prices-units.csv + fal-tags2.csv -> fal-prices-plain2.with-tags.csv
+    props    data/prices-v1.csv + bak/fal-schemas.json -> data/prices-v1.with-props.csv
+    json     data/prices-v1.csv   -> src/data/prices-v1.json
+
+A stage's fingerprint is the content hash of its inputs, its script (and
+the pricing package where used) and its command line. A stage reruns when
+the fingerprint differs from the last successful run, or when an output is
+missing or was changed by hand. Fingerprints and output hashes are kept in
+.pipeline-state.json; file hashes are reused while size and mtime match.
+
+A stage that reproduces its previous outputs byte for byte does not make
+its dependents stale. Stages run as soon as the stages producing their
+inputs are done, up to --jobs at once. --dry-run reports every stage
+downstream of a stale stage as one that would run, since whether a rebuild
+changes its outputs is only known by running it.
+
+With --report DIR every stage that runs writes its own report (wall time,
+rows/s, peak RSS, time per section, formula rule hits; see instrument.py),
+and DIR/pipeline.json collects them with the status of every stage.
+--profile adds a cProfile dump per stage.
+
+Usage:
+    python scripts/pipeline.py [STAGE ...] [--jobs 4] [--force] [--dry-run] [--list]
+        [--report DIR [--profile]]
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(SCRIPTS)
+STATE_FILE = '.pipeline-state.json'
+STATE_VERSION = 1
+
+
+class Stage(NamedTuple):
+    name: str
+    script: str
+    args: Tuple[str, ...]
+    inputs: Tuple[str, ...]
+    outputs: Tuple[str, ...]
+    # Modules and packages in scripts/ the script imports, hashed into the fingerprint
+    depends: Tuple[str, ...] = ()
+    # Only run when named on the command line (e.g. network access)
+    explicit: bool = False
+
+
+STAGES = (
+    Stage('scrape', 'fal-scrape.py', ('--links', 'links.txt', '--output', 'fal-prices.json'),
+          inputs=('links.txt',), outputs=('fal-prices.json',),
+          depends=('fal_fetch.py', 'html_cache.py', 'html_archive.py', 'price_extract.py'),
+          explicit=True),
+    Stage('prices', 'process_prices.py', ('fal-prices.json', 'fal-prices-plain2.csv', '--workers', '0'),
+          inputs=('fal-prices.json',), outputs=('fal-prices-plain2.csv',), depends=('pricing',)),
+    Stage('units', 'process_units.py', ('fal-prices-plain2.csv', 'fal-prices-units.csv'),
+          inputs=('fal-prices-plain2.csv',), outputs=('fal-prices-units.csv',), depends=('pricing',)),
+    Stage('tags', 'enrich.py', ('fal-prices-units.csv', 'fal-prices-plain2.with-tags.csv',
+                                '--key', 'Model ID', '--source', 'Tag=fal-tags2.csv'),
+          inputs=('fal-prices-units.csv', 'fal-tags2.csv'), outputs=('fal-prices-plain2.with-tags.csv',)),
+    Stage('props', 'enrich.py', ('data/prices-v1.csv', 'data/prices-v1.with-props.csv',
+                                 '--source', 'description=bak/fal-schemas.json:desc'),
+          inputs=('data/prices-v1.csv', 'bak/fal-schemas.json'), outputs=('data/prices-v1.with-props.csv',)),
+    Stage('json', 'csv_to_json.py', ('data/prices-v1.csv', 'src/data/prices-v1.json'),
+          inputs=('data/prices-v1.csv',), outputs=('src/data/prices-v1.json',), depends=('columnar.py',)),
+)
+
+
+class FileHasher:
+    """sha256 of files and directories, reusing digests recorded for the same size and mtime"""
+
+    def __init__(self, root: str, known: Dict[str, List]):
+        self.root = root
+        self.known = known
+
+    def file(self, path: str) -> Optional[str]:
+        """Digest of a file, None if it does not exist; relative paths are under root"""
+        full = os.path.join(self.root, path)
+        try:
+            stat = os.stat(full)
+        except FileNotFoundError:
+            return None
+        signature = [stat.st_size, stat.st_mtime_ns]
+        entry = self.known.get(path)
+        if entry is not None and entry[:2] == signature:
+            return entry[2]
+
+        digest = hashlib.sha256()
+        with open(full, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        self.known[path] = signature + [digest.hexdigest()]
+        return digest.hexdigest()
+
+    def path(self, path: str) -> Optional[str]:
+        """Digest of a file, or of every .py file under a directory"""
+        full = os.path.join(self.root, path)
+        if not os.path.isdir(full):
+            return self.file(path)
+        digest = hashlib.sha256()
+        for directory, dirs, files in os.walk(full):
+            dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+            for name in sorted(files):
+                if name.endswith('.py'):
+                    member = os.path.join(directory, name)
+                    digest.update(f'{os.path.relpath(member, full)}\0{self.file(member)}\0'.encode('utf-8'))
+        return digest.hexdigest()
+
+
+def stage_command(stage: Stage, extra: Sequence[str] = ()) -> List[str]:
+    return [sys.executable, os.path.join(SCRIPTS, stage.script)] + list(stage.args) + list(extra)
+
+
+def fingerprint(stage: Stage, hasher: FileHasher) -> Dict[str, Optional[str]]:
+    """Digest per input, script and dependency, plus the command line"""
+    parts = {'command': json.dumps([stage.script] + list(stage.args))}
+    for name in (stage.script,) + stage.depends:
+        parts[f'scripts/{name}'] = hasher.path(os.path.join(SCRIPTS, name))
+    for path in stage.inputs:
+        parts[path] = hasher.path(path)
+    return parts
+
+
+def stale_reason(stage: Stage, parts: Dict[str, Optional[str]], hasher: FileHasher,
+                 record: Optional[Dict]) -> Optional[str]:
+    """Why the stage must run, or None if its outputs are up to date"""
+    if record is None:
+        return 'never built'
+    for key, digest in parts.items():
+        if record['fingerprint'].get(key) != digest:
+            return 'command changed' if key == 'command' else f'{key} changed'
+    for path in stage.outputs:
+        digest = hasher.file(path)
+        if digest is None:
+            return f'{path} missing'
+        if record['outputs'].get(path) != digest:
+            return f'{path} modified'
+    return None
+
+
+def dependencies(stages: Sequence[Stage]) -> Dict[str, Set[str]]:
+    """Stage name -> names of the stages producing its inputs"""
+    producers = {output: stage.name for stage in stages for output in stage.outputs}
+    return {stage.name: {producers[path] for path in stage.inputs if path in producers}
+            for stage in stages}
+
+
+def select(stages: Sequence[Stage], targets: Sequence[str]) -> List[Stage]:
+    """The named stages and everything upstream of them; by default every non-explicit stage"""
+    by_name = {stage.name: stage for stage in stages}
+    unknown = [name for name in targets if name not in by_name]
+    if unknown:
+        raise ValueError(f"unknown stages {unknown}; stages are {list(by_name)}")
+    if not targets:
+        return [stage for stage in stages if not stage.explicit]
+
+    deps = dependencies(stages)
+    wanted: Set[str] = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in wanted:
+            wanted.add(name)
+            # Upstream explicit stages only run when named themselves
+            pending.extend(dep for dep in deps[name] if not by_name[dep].explicit or dep in targets)
+    return [stage for stage in stages if stage.name in wanted]
+
+
+def run_stage(stage: Stage, root: str, extra: Sequence[str] = ()) -> Tuple[int, str, float]:
+    started = time.perf_counter()
+    for path in stage.outputs:
+        directory = os.path.dirname(os.path.join(root, path))
+        os.makedirs(directory, exist_ok=True)
+    process = subprocess.run(stage_command(stage, extra), cwd=root, capture_output=True, text=True)
+    return process.returncode, process.stdout + process.stderr, time.perf_counter() - started
+
+
+class Pipeline:
+    def __init__(self, stages: Sequence[Stage], root: str = ROOT, jobs: int = 4,
+                 force: bool = False, dry_run: bool = False, report_dir: Optional[str] = None,
+                 profile: bool = False):
+        self.stages = list(stages)
+        self.root = root
+        self.jobs = max(1, jobs)
+        self.force = force
+        self.dry_run = dry_run
+        self.report_dir = os.path.abspath(report_dir) if report_dir else None
+        self.profile = profile
+        # Stage name -> status, reason and seconds of this run, for the report
+        self.results: Dict[str, Dict] = {}
+        self.state_path = os.path.join(root, STATE_FILE)
+        self.state = self.load_state()
+        self.hasher = FileHasher(root, self.state['hashes'])
+
+    def load_state(self) -> Dict:
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') == STATE_VERSION:
+                return state
+        except (OSError, ValueError):
+            pass
+        return {'version': STATE_VERSION, 'stages': {}, 'hashes': {}}
+
+    def save_state(self):
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    def check(self, stage: Stage) -> Tuple[Optional[str], Dict[str, Optional[str]]]:
+        """(reason to run or None, fingerprint); reason starts with 'missing' if an input does not exist"""
+        parts = fingerprint(stage, self.hasher)
+        missing = [path for path in stage.inputs if parts[path] is None]
+        if missing:
+            return f"missing input {', '.join(missing)}", parts
+        if self.force:
+            return 'forced', parts
+        return stale_reason(stage, parts, self.hasher, self.state['stages'].get(stage.name)), parts
+
+    def finish(self, stage: Stage, parts: Dict[str, Optional[str]]):
+        self.state['stages'][stage.name] = {
+            'fingerprint': parts,
+            'outputs': {path: self.hasher.file(path) for path in stage.outputs},
+        }
+        self.save_state()
+
+    def instrument_flags(self, stage: Stage) -> List[str]:
+        """--report/--profile arguments for a stage script (see instrument.py)"""
+        if not self.report_dir:
+            return []
+        flags = ['--report', os.path.join(self.report_dir, f'{stage.name}.json')]
+        if self.profile:
+            flags += ['--profile', os.path.join(self.report_dir, f'{stage.name}.prof')]
+        return flags
+
+    def write_report(self, seconds: float):
+        """pipeline.json in the report directory: this run's stage results with each stage's own report"""
+        stages = {}
+        for stage in self.stages:
+            result = dict(self.results.get(stage.name, {'status': 'not reached'}))
+            path = os.path.join(self.report_dir, f'{stage.name}.json')
+            if result['status'] in ('ran', 'failed') and os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    result['report'] = json.load(f)
+            stages[stage.name] = result
+        report = {'root': os.path.abspath(self.root), 'jobs': self.jobs, 'wall_seconds': round(seconds, 6), 'stages': stages}
+        with open(os.path.join(self.report_dir, 'pipeline.json'), 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {os.path.join(self.report_dir, 'pipeline.json')}")
+
+    def run(self) -> int:
+        """Run stale stages in dependency order; returns the number of failed or blocked stages"""
+        deps = dependencies(self.stages)
+        names = {stage.name for stage in self.stages}
+        waiting = {stage.name: stage for stage in self.stages}
+        done: Set[str] = set()
+        failed: Set[str] = set()
+        # Stages a dry run would rebuild; everything downstream of them would run too
+        stale: Set[str] = set()
+        running = {}
+        started = time.perf_counter()
+        if self.report_dir:
+            os.makedirs(self.report_dir, exist_ok=True)
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            while waiting or running:
+                for name, stage in list(waiting.items()):
+                    upstream = deps[name] & names
+                    if upstream & failed:
+                        reason = f"{', '.join(sorted(upstream & failed))} failed"
+                        print(f"[{name}] skipped: {reason}")
+                        self.results[name] = {'status': 'blocked', 'reason': reason}
+                        failed.add(name)
+                        del waiting[name]
+                    elif upstream <= done and len(running) < self.jobs:
+                        del waiting[name]
+                        if self.dry_run and upstream & stale:
+                            # Its inputs would be rebuilt first, so the current hashes say nothing
+                            reason, parts = f"{', '.join(sorted(upstream & stale))} stale", None
+                        else:
+                            reason, parts = self.check(stage)
+                        if reason is None:
+                            print(f"[{name}] up to date")
+                            self.results[name] = {'status': 'up to date'}
+                            done.add(name)
+                        elif reason.startswith('missing'):
+                            print(f"[{name}] cannot run: {reason}")
+                            self.results[name] = {'status': 'blocked', 'reason': reason}
+                            failed.add(name)
+                        elif self.dry_run:
+                            print(f"[{name}] would run: {reason}")
+                            self.results[name] = {'status': 'stale', 'reason': reason}
+                            stale.add(name)
+                            done.add(name)
+                        else:
+                            print(f"[{name}] running: {reason}")
+                            self.results[name] = {'status': 'running', 'reason': reason}
+                            future = pool.submit(run_stage, stage, self.root, self.instrument_flags(stage))
+                            running[future] = (stage, parts)
+
+                if not running:
+                    # Stages still waiting are now ready or blocked by a failure
+                    if waiting:
+                        continue
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage, parts = running.pop(future)
+                    code, output, seconds = future.result()
+                    lines = output.strip().splitlines()
+                    self.results[stage.name].update(status='ran' if code == 0 else 'failed', seconds=round(seconds, 6))
+                    if code == 0:
+                        self.finish(stage, parts)
+                        done.add(stage.name)
+                        summary = f": {lines[-1]}" if lines else ''
+                        print(f"[{stage.name}] done in {seconds:.2f}s{summary}")
+                    else:
+                        failed.add(stage.name)
+                        print(f"[{stage.name}] failed with exit code {code} after {seconds:.2f}s")
+                        for line in lines[-20:]:
+                            print(f"[{stage.name}]   {line}")
+
+        if not self.dry_run:
+            self.save_state()
+        if self.report_dir:
+            self.write_report(time.perf_counter() - started)
+        return len(failed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the price data pipeline, rebuilding only stale stages')
+    parser.add_argument('stages', nargs='*', help='Stages to bring up to date, with their upstream stages (default: all but scrape)')
+    parser.add_argument('--root', default=ROOT, help='Directory the stage paths are relative to (default: the repository root)')
+    parser.add_argument('--jobs', type=int, default=4, help='Stages run at once (default: 4)')
+    parser.add_argument('--force', action='store_true', help='Run the selected stages even if up to date')
+    parser.add_argument('--dry-run', action='store_true', help='Only report which stages would run and why')
+    parser.add_argument('--list', action='store_true', help='List the stages with their inputs and outputs')
+    parser.add_argument('--report', metavar='DIR', help='Write a JSON report per stage that runs, and pipeline.json with all of them, to DIR')
+    parser.add_argument('--profile', action='store_true', help='With --report, also dump a cProfile file per stage that runs')
+    args = parser.parse_args()
+
+    if args.list:
+        for stage in STAGES:
+            note = ' (only when named)' if stage.explicit else ''
+            print(f"{stage.name:>7}: {stage.script} {' + '.join(stage.inputs)} -> {', '.join(stage.outputs)}{note}")
+        return 0
+
+    try:
+        stages = select(STAGES, args.stages)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.profile and not args.report:
+        parser.error('--profile needs --report DIR')
+
+    failures = Pipeline(stages, args.root, args.jobs, args.force, args.dry_run, args.report, args.profile).run()
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
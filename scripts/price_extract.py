@@ -0,0 +1,56 @@
+"""
+Price snippet extraction from fal.ai model pages.
+
+Each rule is a literal opening anchor and closing marker around the
+pricing paragraph. The anchor is located with a plain substring scan and
+the closing marker is only looked for within a bounded window after it,
+so a page with an unterminated or missing block costs one linear scan
+instead of a DOTALL backtracking search over the whole document.
+"""
+
+from typing import NamedTuple, Optional, Tuple
+
+
+class Rule(NamedTuple):
+    name: str
+    anchor: str
+    close: str
+
+
+# Checked in order; the first rule that matches wins
+RULES = (
+    Rule(
+        'content-light',
+        '<div class="flex items-center p-4 pt-4 text-sm text-content-light"><div><p>',
+        '</p></div></div>'
+    ),
+    Rule(
+        'space-y-3',
+        '<div class="flex flex-col items-start space-y-3"><div class="space-y-3"><p>',
+        '</p></div></div>'
+    ),
+)
+
+# Longest pricing paragraph we expect, in characters
+WINDOW = 8192
+
+
+def match_rule(html: str, rule: Rule, window: int = WINDOW) -> Optional[str]:
+    start = html.find(rule.anchor)
+    while start != -1:
+        body = start + len(rule.anchor)
+        # The snippet is never empty, hence body + 1
+        end = html.find(rule.close, body + 1, body + window + len(rule.close))
+        if end != -1:
+            return html[body:end]
+        start = html.find(rule.anchor, body)
+    return None
+
+
+def extract_price(html: str, window: int = WINDOW) -> Tuple[Optional[str], Optional[str]]:
+    """Returns (snippet, rule name) for the first matching rule, or (None, None)."""
+    for rule in RULES:
+        snippet = match_rule(html, rule, window)
+        if snippet is not None:
+            return snippet, rule.name
+    return None, None
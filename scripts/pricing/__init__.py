@@ -0,0 +1,74 @@
+"""
+Pricing text helpers shared by the pipeline scripts.
+
+    from pricing import strip_html, create_inference_formula, determine_unit
+    from pricing import compile_formula
+
+Importing the package does no work: each submodule is imported on first
+use of one of its names. Measure with
+
+    python -X importtime -c "import pricing"
+    python bench_import.py
+
+The pure functions are memoized with LRU caches (strip_html on the raw
+HTML, formulas on the lowercased text, units on the raw text or unit name,
+compiled formulas on the formula string), so they are cheap to call repeatedly
+from a long-running process.
+"""
+
+import sys
+import importlib
+
+_EXPORTS = {
+    'HTMLStripper': 'pricing.text',
+    'strip_html': 'pricing.text',
+    'FORMULA_RULES': 'pricing.formula',
+    'create_inference_formula': 'pricing.formula',
+    'extract_price': 'pricing.formula',
+    'match_formula_rule': 'pricing.formula',
+    'determine_unit': 'pricing.units',
+    'Unit': 'pricing.units',
+    'parse_unit': 'pricing.units',
+    'CompiledFormula': 'pricing.evaluate',
+    'FormulaError': 'pricing.evaluate',
+    'compile_formula': 'pricing.evaluate',
+    'evaluate_formula': 'pricing.evaluate',
+}
+
+_CACHED = ('strip_html', 'match_lowercase', 'determine_unit', 'parse_unit', 'compile_formula')
+
+__all__ = sorted(_EXPORTS) + ['cache_clear', 'cache_info']
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'pricing' has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+def _cached_functions(loaded_only=False):
+    for module_name in sorted(set(_EXPORTS.values())):
+        if loaded_only and module_name not in sys.modules:
+            continue
+        module = importlib.import_module(module_name)
+        for name in _CACHED:
+            if hasattr(module, name):
+                yield name, getattr(module, name)
+
+
+def cache_clear():
+    """Empty every memoization cache in the package"""
+    for _, function in _cached_functions():
+        function.cache_clear()
+
+
+def cache_info(loaded_only=False):
+    """Cache statistics per memoized function; with loaded_only, submodules not yet imported are skipped"""
+    return {name: function.cache_info() for name, function in _cached_functions(loaded_only)}
@@ -0,0 +1,223 @@
+"""
+Evaluation of inference formulas, as produced by create_inference_formula.
+
+A formula is one or more lines. Each line is an arithmetic expression,
+optionally prefixed by a variant label:
+
+    duration <= 5 ? 0.8 : 0.8 + ((duration - 5) * 0.2)
+    (step / 1000) * 0.5
+    480p: second * 0.1
+    with audio: second * 0.40
+
+Expressions support numbers, variables, + - * /, unary minus, comparisons
+(< <= > >= == !=), the ternary `cond ? a : b` and parentheses. A formula is
+parsed once into nested closures (no eval), and compiled formulas are
+memoized by their source text.
+"""
+
+import re
+import operator
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, Mapping, Optional
+
+CACHE_SIZE = 4096
+
+TOKEN_RE = re.compile(r'\s*(?:(\d+\.?\d*|\.\d+)|([A-Za-z_]\w*)|(<=|>=|==|!=|[-+*/()<>?:]))')
+
+BINARY_OPS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+COMPARISONS = ('<', '<=', '>', '>=', '==', '!=')
+
+Expression = Callable[[Mapping[str, float]], float]
+
+class FormulaError(ValueError):
+    """A formula that cannot be parsed or evaluated."""
+
+def tokenize(source):
+    """Split an expression into (kind, value) tokens; kind is 'num', 'name' or 'op'"""
+    tokens = []
+    pos = 0
+    source = source.rstrip()
+    while pos < len(source):
+        match = TOKEN_RE.match(source, pos)
+        if not match:
+            raise FormulaError(f"unexpected {source[pos:].strip()[:1]!r} in {source!r}")
+        number, name, op = match.groups()
+        if number is not None:
+            tokens.append(('num', float(number)))
+        elif name is not None:
+            tokens.append(('name', name))
+        else:
+            tokens.append(('op', op))
+        pos = match.end()
+    return tokens
+
+class Parser:
+    """Recursive-descent parser building a closure per expression node."""
+
+    def __init__(self, source):
+        self.source = source
+        self.tokens = tokenize(source)
+        self.pos = 0
+        self.variables = set()
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, op=None):
+        kind, value = self.peek()
+        if kind is None or (op is not None and value != op):
+            expected = repr(op) if op else 'more input'
+            raise FormulaError(f"expected {expected} in {self.source!r}")
+        self.pos += 1
+        return kind, value
+
+    def parse(self):
+        expression = self.ternary()
+        if self.pos != len(self.tokens):
+            raise FormulaError(f"unexpected {self.peek()[1]!r} in {self.source!r}")
+        return expression
+
+    def ternary(self):
+        condition = self.comparison()
+        if self.peek() != ('op', '?'):
+            return condition
+        self.take('?')
+        if_true = self.ternary()
+        self.take(':')
+        if_false = self.ternary()
+        return lambda env: if_true(env) if condition(env) else if_false(env)
+
+    def comparison(self):
+        left = self.additive()
+        kind, value = self.peek()
+        if kind == 'op' and value in COMPARISONS:
+            self.take()
+            return self.binary(BINARY_OPS[value], left, self.additive())
+        return left
+
+    def additive(self):
+        left = self.term()
+        while self.peek() in (('op', '+'), ('op', '-')):
+            _, value = self.take()
+            left = self.binary(BINARY_OPS[value], left, self.term())
+        return left
+
+    def term(self):
+        left = self.unary()
+        while self.peek() in (('op', '*'), ('op', '/')):
+            _, value = self.take()
+            left = self.binary(BINARY_OPS[value], left, self.unary())
+        return left
+
+    def unary(self):
+        if self.peek() == ('op', '-'):
+            self.take()
+            operand = self.unary()
+            return lambda env: -operand(env)
+        return self.primary()
+
+    def primary(self):
+        kind, value = self.take()
+        if kind == 'num':
+            return lambda env: value
+        if kind == 'name':
+            self.variables.add(value)
+            return lambda env: env[value]
+        if value == '(':
+            inner = self.ternary()
+            self.take(')')
+            return inner
+        raise FormulaError(f"unexpected {value!r} in {self.source!r}")
+
+    @staticmethod
+    def binary(op, left, right):
+        return lambda env: op(left(env), right(env))
+
+def split_label(line):
+    """Split "480p: second * 0.1" into ('480p', 'second * 0.1'); unlabeled lines give None"""
+    label, sep, rest = line.partition(':')
+    # The ':' of a ternary comes after its '?', so a '?' means no label
+    if not sep or '?' in label:
+        return None, line
+    return label.strip(), rest
+
+class CompiledFormula:
+    """
+    A parsed formula: one expression per variant label (None if unlabeled).
+
+    Call it with the variables the formula uses, plus `variant` when it has
+    more than one labeled branch.
+    """
+
+    def __init__(self, source, branches: Dict[Optional[str], Expression], variables: FrozenSet[str]):
+        self.source = source
+        self.branches = branches
+        self.variables = variables
+        self.labels = [label for label in branches if label is not None]
+        self.lookup = {label.lower(): expression for label, expression in branches.items() if label is not None}
+
+    def __repr__(self):
+        return f"CompiledFormula({self.source!r})"
+
+    def branch(self, variant=None) -> Expression:
+        if variant is not None:
+            expression = self.branches.get(variant) or self.lookup.get(variant.lower())
+            if expression is None:
+                raise FormulaError(f"unknown variant {variant!r}; expected one of {self.labels}")
+            return expression
+        if len(self.branches) == 1:
+            return next(iter(self.branches.values()))
+        if not self.branches:
+            raise FormulaError("empty formula")
+        raise FormulaError(f"formula has variants {self.labels}; pass variant=")
+
+    def __call__(self, variant=None, **variables) -> float:
+        return self.evaluate(variables, variant)
+
+    def evaluate(self, variables: Mapping[str, float], variant=None) -> float:
+        try:
+            return self.branch(variant)(variables)
+        except KeyError as e:
+            raise FormulaError(f"missing variable {e.args[0]!r} for {self.source!r}") from None
+        except ZeroDivisionError:
+            raise FormulaError(f"division by zero in {self.source!r}") from None
+
+    def evaluate_all(self, variables: Mapping[str, float]) -> Dict[Optional[str], float]:
+        """Cost of every variant"""
+        return {label: self.evaluate(variables, label) for label in self.branches}
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_formula(formula) -> CompiledFormula:
+    """Parse a formula string once; repeated calls with the same text are cached"""
+    branches = {}
+    variables = set()
+    for line in formula.splitlines():
+        if not line.strip():
+            continue
+        label, source = split_label(line)
+        # Some descriptions end in a full stop that sticks to the last price
+        source = source.strip().rstrip('.')
+        if not source:
+            raise FormulaError(f"missing expression in {line!r}")
+        if label in branches:
+            raise FormulaError(f"duplicate variant {label!r} in {formula!r}")
+        parser = Parser(source)
+        branches[label] = parser.parse()
+        variables |= parser.variables
+    return CompiledFormula(formula, branches, frozenset(variables))
+
+def evaluate_formula(formula, variant=None, **variables) -> float:
+    """Evaluate a formula string, compiling it on first use"""
+    return compile_formula(formula).evaluate(variables, variant)
@@ -0,0 +1,374 @@
+"""
+Inference formulas from plain-text pricing descriptions.
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable, FrozenSet, List, NamedTuple, Optional, Tuple
+
+CACHE_SIZE = 4096
+
+def extract_price(text):
+    """Extract price value from text"""
+    # Look for $X.XX patterns
+    price_match = re.search(r'\$([\d.]+)', text)
+    if price_match:
+        return float(price_match.group(1))
+    return None
+
+class FormulaRule(NamedTuple):
+    """
+    One pricing pattern. `when` lists keyword groups: the rule is tried if all
+    keywords of any group occur in the text (None means always try it).
+    `build` returns the formula, or None to fall through to the next rule.
+    """
+    name: str
+    when: Optional[Tuple[FrozenSet[str], ...]]
+    build: Callable[[str, List[str]], Optional[str]]
+
+def rule(name, build, *groups):
+    when = tuple(frozenset(group) for group in groups) if groups else None
+    return FormulaRule(name, when, build)
+
+def per_unit(template):
+    """Rule builder that prices the first $ amount with a fixed template."""
+    def build(text_lower, prices):
+        return template.format(prices[0])
+    return build
+
+def trie_regex(words):
+    """Regex source matching any of `words`, factored into a prefix trie."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Greedy optional, so the longest keyword at a position wins
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+class KeywordScanner:
+    """Finds which of a fixed set of keywords occur anywhere in a text."""
+
+    def __init__(self, keywords):
+        keywords = set(keywords)
+        self.pattern = re.compile(trie_regex(keywords))
+        # Keywords that are prefixes of a longer match start at the same place
+        self.prefixes = {
+            keyword: frozenset(other for other in keywords if keyword.startswith(other))
+            for keyword in keywords
+        }
+
+    def scan(self, text):
+        found = set()
+        search = self.pattern.search
+        match = search(text)
+        while match:
+            found |= self.prefixes[match.group()]
+            match = search(text, match.start() + 1)
+        return found
+
+class FormulaRuleSet:
+    """
+    Ordered formula rules compiled for dispatch: the keywords of every rule
+    are found in one scan, and only rules whose keyword guards hold are
+    tried, still in their declared order.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.scanner = KeywordScanner(
+            keyword for formula_rule in rules for group in formula_rule.when or () for keyword in group
+        )
+        # Few distinct keyword combinations occur, so dispatch plans are memoized
+        self.plans = {}
+
+    def candidates(self, text_lower):
+        """Rules whose keyword guards hold for text_lower, in declared order"""
+        keywords = frozenset(self.scanner.scan(text_lower))
+        plan = self.plans.get(keywords)
+        if plan is None:
+            plan = tuple(
+                formula_rule for formula_rule in self.rules
+                if formula_rule.when is None or any(group <= keywords for group in formula_rule.when)
+            )
+            self.plans[keywords] = plan
+        return plan
+
+# This pattern captures: $0.001, $0.00125, $1.2345, etc.
+PRICE_RE = re.compile(r'\$(\d+\.\d+)')
+
+DURATION_RE = re.compile(r'for\s+(\d+)s?\s+video.*?cost\s+\$([\d.]+)')
+ADDITIONAL_RE = re.compile(r'additional.*?\$([\d.]+)')
+AUDIO_OFF_BEFORE_RE = re.compile(r'\$([\d.]+)[^$]*?\(audio off\)')
+AUDIO_OFF_AFTER_RE = re.compile(r'audio off[^$]*?\$([\d.]+)')
+AUDIO_ON_BEFORE_RE = re.compile(r'\$([\d.]+)[^$]*?\(audio on\)')
+AUDIO_ON_AFTER_RE = re.compile(r'audio on[^$]*?\$([\d.]+)')
+STEP_RE = re.compile(r'\$([\d.]+)\s+per.*?step')
+TRAINING_STEPS_RE = re.compile(r'\$([\d.]+).*?1000-step')
+TIMES_RE = re.compile(r'for\s+\$([\d.]+).*?(\d+)\s+times')
+MINUTES_RE = re.compile(r'for\s+\$([\d.]+).*?(\d+)\s+minutes?')
+SECONDS_RE = re.compile(r'for\s+\$([\d.]+).*?(\d+)\s+seconds?')
+
+RESOLUTIONS = ('480p', '720p', '1080p')
+# A lookahead, so resolutions inside a price token (e.g. "$0.1080p") are still seen
+RESOLUTION_TOKEN_RE = re.compile(r'(?=(480p|720p|1080p)|\$([\d.]+))')
+# Prices followed by these words describe something else ("for $1 you can...")
+NOT_PRICE_CONTEXT = r'(?!\s*(?:you|you can|per|times|minutes?|seconds?|for))'
+
+class ResolutionPatterns(NamedTuple):
+    dash: re.Pattern
+    before: re.Pattern
+    after: re.Pattern
+    after_dollar_suffix: re.Pattern
+
+RESOLUTION_PATTERNS = {
+    resolution: ResolutionPatterns(
+        dash=re.compile(rf'{resolution}\s*-\s*\$([\d.]+)'),
+        before=re.compile(rf'\$([\d.]+)[^$]*?{resolution}'),
+        after=re.compile(rf'{resolution}[^$]*?\$([\d.]+){NOT_PRICE_CONTEXT}'),
+        after_dollar_suffix=re.compile(rf'{resolution}[^$]*?([\d.]+)\${NOT_PRICE_CONTEXT}'),
+    )
+    for resolution in RESOLUTIONS
+}
+
+QUALITY_PATTERNS = {
+    quality: re.compile(rf'{quality}\s+quality.*?\$([\d.]+)')
+    for quality in ('low', 'medium', 'high', 'best')
+}
+
+def resolution_positions(text_lower):
+    """
+    One pass over the text collecting the first position of each resolution
+    and every $price token as (position, digits)
+    """
+    first_seen = {}
+    price_tokens = []
+    for match in RESOLUTION_TOKEN_RE.finditer(text_lower):
+        resolution, digits = match.groups()
+        if resolution:
+            first_seen.setdefault(resolution, match.start())
+        else:
+            price_tokens.append((match.start(), digits))
+    return first_seen, price_tokens
+
+def first_price_position(price_tokens, price):
+    """Position of the first "$<price>" in the text, as str.find would report it"""
+    for position, digits in price_tokens:
+        if digits.startswith(price):
+            return position
+    return -1
+
+def formula_for_resolutions(text_lower, prices):
+    """Handle resolution-based pricing (480p, 720p, 1080p)"""
+    # Extract prices associated with resolutions
+    # Pattern: "$X.YY for 480p" or "480p - $X.YY" or "for 480p , $X.YY"
+    price_patterns = []
+    first_seen, price_tokens = resolution_positions(text_lower)
+
+    for resolution in RESOLUTIONS:
+        if resolution not in first_seen:
+            continue
+        patterns = RESOLUTION_PATTERNS[resolution]
+
+        # Try pattern: "480p - $0.10" (most specific)
+        dash_match = patterns.dash.search(text_lower)
+        if dash_match:
+            price_patterns.append((resolution, dash_match.group(1)))
+            continue
+
+        # Try pattern: "$0.10 for 480p" or "$0.10 per second for 480p"
+        before_match = patterns.before.search(text_lower)
+        if before_match:
+            # Make sure this price isn't already used by a previous resolution
+            price = before_match.group(1)
+            # Check if this price is closer to this resolution than others
+            price_pos = first_price_position(price_tokens, price)
+            res_pos = first_seen[resolution]
+            if price_pos < res_pos:  # Price comes before resolution
+                # Check if there's a closer resolution before this one
+                found_closer = any(
+                    price_pos < other_pos < res_pos
+                    for other_res, other_pos in first_seen.items() if other_res != resolution
+                )
+                if not found_closer:
+                    price_patterns.append((resolution, price))
+                    continue
+
+        # Try pattern: "480p $0.10" or "480p resolution and $0.10"
+        # Limit search to avoid matching prices after "for $X" patterns
+        after_match = patterns.after.search(text_lower)
+        if after_match:
+            price_patterns.append((resolution, after_match.group(1)))
+        else:
+            # Try pattern: "480p resolution and 0.4$" (dollar sign after number)
+            after_match2 = patterns.after_dollar_suffix.search(text_lower)
+            if after_match2:
+                price_patterns.append((resolution, after_match2.group(1)))
+
+    if len(price_patterns) >= 2:
+        # Build multi-line format for resolutions
+        unit = 'second' if 'per second' in text_lower else 'video' if 'per video' in text_lower else 'unit'
+        lines = []
+        for res, price in price_patterns:
+            lines.append(f"{res}: {unit} * {price}")
+        return '\n'.join(lines)
+    return None
+
+def formula_for_duration(text_lower, prices):
+    """Handle "for 5s video" patterns with additional seconds"""
+    duration_match = DURATION_RE.search(text_lower)
+    if not duration_match:
+        return None
+
+    duration = duration_match.group(1)
+    base_price = duration_match.group(2)
+
+    # Check for additional seconds pricing
+    additional_match = ADDITIONAL_RE.search(text_lower)
+    if additional_match:
+        additional_price = additional_match.group(1)
+        return f"duration <= {duration} ? {base_price} : {base_price} + ((duration - {duration}) * {additional_price})"
+
+    # Calculate per-second rate
+    per_second = float(base_price) / float(duration)
+    return f"duration * {per_second:.3f}"
+
+def formula_for_audio(text_lower, prices):
+    """Handle audio on/off variants"""
+    # Find prices in order: audio off first, then audio on
+    # Match pattern like "$0.10 (audio off)" or "audio off) or $0.15"
+    audio_off_match = AUDIO_OFF_BEFORE_RE.search(text_lower) or AUDIO_OFF_AFTER_RE.search(text_lower)
+    audio_on_match = AUDIO_ON_BEFORE_RE.search(text_lower) or AUDIO_ON_AFTER_RE.search(text_lower)
+
+    if audio_off_match and audio_on_match:
+        return f"with audio: second * {audio_on_match.group(1)}\nno audio: second * {audio_off_match.group(1)}"
+    return None
+
+def formula_for_steps(text_lower, prices):
+    """Handle step-based pricing"""
+    step_match = STEP_RE.search(text_lower)
+    if step_match:
+        return f"step * {step_match.group(1)}"
+    return f"step * {prices[0]}"
+
+def formula_for_training_steps(text_lower, prices):
+    """Handle per 1000-step training run"""
+    match = TRAINING_STEPS_RE.search(text_lower)
+    if match:
+        price_per_1000 = match.group(1)
+        return f"(step / 1000) * {price_per_1000}"
+    return None
+
+def formula_for_images(text_lower, prices):
+    # Check for vector style pricing
+    if 'vector style' in text_lower and len(prices) >= 2:
+        return f"vector style: image * {prices[1]}\nstandard: image * {prices[0]}"
+    return f"image * {prices[0]}"
+
+def formula_for_runs(text_lower, prices):
+    """Handle "for $X you can run/generate Y times/minutes" patterns"""
+    times_match = TIMES_RE.search(text_lower)
+    if times_match:
+        dollar_amount = float(times_match.group(1))
+        runs = float(times_match.group(2))
+        price_per_run = dollar_amount / runs
+        return f"run * {price_per_run:.4f}"
+
+    minutes_match = MINUTES_RE.search(text_lower)
+    if minutes_match:
+        dollar_amount = float(minutes_match.group(1))
+        minutes = float(minutes_match.group(2))
+        price_per_minute = dollar_amount / minutes
+        return f"minute * {price_per_minute:.4f}"
+
+    seconds_match = SECONDS_RE.search(text_lower)
+    if seconds_match:
+        dollar_amount = float(seconds_match.group(1))
+        seconds = float(seconds_match.group(2))
+        price_per_second = dollar_amount / seconds
+        return f"second * {price_per_second:.4f}"
+
+    return None
+
+def formula_for_quality(text_lower, prices):
+    """Handle quality-based pricing"""
+    quality_prices = {}
+    for quality, pattern in QUALITY_PATTERNS.items():
+        match = pattern.search(text_lower)
+        if match:
+            quality_prices[quality] = match.group(1)
+    
+    if len(quality_prices) >= 2:
+        lines = []
+        for quality, price in quality_prices.items():
+            quality_var = quality.capitalize()
+            lines.append(f"{quality_var} quality: {price}")
+        return '\n'.join(lines)
+    return None
+
+# Checked in order; more specific patterns first
+FORMULA_RULES = (
+    # Resolution-based pricing is checked early
+    rule('resolution', formula_for_resolutions, ('480p', '720p'), ('480p', '1080p')),
+    # Keywords the duration and runs patterns cannot match without
+    rule('duration', formula_for_duration, ('for', 'video', 'cost')),
+    rule('audio', formula_for_audio, ('audio off', 'audio on')),
+    # 'per.*step' is matched literally, as it always has been
+    rule('step', formula_for_steps, ('per step',), ('per.*step',)),
+    rule('training-steps', formula_for_training_steps, ('1000-step', 'training run')),
+    rule('compute-second', per_unit('computeSecond * {}'), ('compute second',)),
+    rule('video-second', per_unit('videoSecond * {}'), ('video second',)),
+    rule('audio-second', per_unit('audioSecond * {}'), ('audio second',)),
+    rule('image', formula_for_images, ('per image',), ('per generation',)),
+    rule('video', per_unit('video * {}'), ('per video',)),
+    rule('megapixel', per_unit('megapixel * {}'), ('per megapixel',)),
+    rule('second', per_unit('second * {}'), ('per second',)),
+    rule('minute', per_unit('minute * {}'), ('per minute',)),
+    rule('kilo-character', per_unit('(character / 1000) * {}'), ('per 1000 character',), ('per 1000 characters',)),
+    rule('character', per_unit('character * {}'), ('per character',)),
+    rule('training-run', per_unit('trainingRun * {}'), ('per training run',)),
+    # Check for video-related contexts
+    rule('video-cost', per_unit('video * {}'), ('video', 'cost')),
+    # Check for image-related contexts
+    rule('image-cost', per_unit('image * {}'), ('image', 'cost'), ('generation', 'cost')),
+    rule('runs', formula_for_runs, ('for', 'times'), ('for', 'minute'), ('for', 'second')),
+    rule('quality', formula_for_quality, ('low quality',), ('medium quality',), ('high quality',)),
+)
+
+FORMULA_RULE_SET = FormulaRuleSet(FORMULA_RULES)
+
+def match_formula_rule(text):
+    """Returns (rule name, formula) for the first pricing rule matching text"""
+    # Every rule works on the lowercased text, and lowercasing never changes
+    # which prices are found, so that is the cache key
+    return match_lowercase(text.lower())
+
+@lru_cache(maxsize=CACHE_SIZE)
+def match_lowercase(text_lower):
+    # Extract all price values. Replacing &nbsp; and collapsing whitespace
+    # first can never change what this pattern matches, so it is skipped.
+    prices = PRICE_RE.findall(text_lower)
+
+    if not prices:
+        return None, ""
+
+    for formula_rule in FORMULA_RULE_SET.candidates(text_lower):
+        formula = formula_rule.build(text_lower, prices)
+        if formula is not None:
+            return formula_rule.name, formula
+
+    # Default: return first price with generic unit
+    return 'default', f"unit * {prices[0]}"
+
+def create_inference_formula(text):
+    """Create inference formula from pricing description"""
+    return match_formula_rule(text)[1]
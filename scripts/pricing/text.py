@@ -0,0 +1,99 @@
+"""
+HTML snippet to plain text.
+"""
+
+import re
+import threading
+from functools import lru_cache
+from html import unescape
+from html.parser import HTMLParser
+
+CACHE_SIZE = 4096
+
+class HTMLStripper(HTMLParser):
+    """Collects the text of an HTML fragment. Reusable: strip() resets it per call."""
+    def __init__(self):
+        super().__init__()
+        self.text = []
+        
+    def handle_data(self, data):
+        self.text.append(data.strip())
+    
+    def get_text(self):
+        return ' '.join(self.text).strip()
+
+    def strip(self, html_string):
+        self.reset()
+        self.text = []
+        self.feed(html_string)
+        return self.get_text()
+
+# One reusable parser per thread: an HTMLParser keeps its state between
+# feed() calls, so threads must not share one
+_local = threading.local()
+
+def thread_stripper():
+    stripper = getattr(_local, 'stripper', None)
+    if stripper is None:
+        stripper = _local.stripper = HTMLStripper()
+    return stripper
+
+# HTMLParser holds back trailing text that might end in a cut-off entity
+# (an '&' in the last 34 chars not followed by whitespace or ';'). Since
+# strip_html never calls close(), that text is dropped; the fast path
+# reproduces this so both paths agree.
+PARTIAL_ENTITY_WINDOW = 34
+ENTITY_END_RE = re.compile(r'[\s;]')
+
+# Attribute-free tags such as <strong>, </p> or <br/>
+SIMPLE_TAG_RE = re.compile(r'<([a-zA-Z][a-zA-Z0-9]*)\s*/?>|</[a-zA-Z][a-zA-Z0-9]*\s*>')
+# Their content is not text, so they always go through the parser
+CDATA_TAGS = {'script', 'style'}
+
+def strip_text_run(text):
+    """What HTMLParser contributes for a trailing run of text with no '<'"""
+    if '&' in text:
+        amppos = text.rfind('&', max(0, len(text) - PARTIAL_ENTITY_WINDOW))
+        if amppos >= 0 and not ENTITY_END_RE.search(text, amppos):
+            return None
+        text = unescape(text)
+    return text.strip()
+
+def strip_simple_tags(html_string):
+    """
+    Fast path for snippets whose only markup is attribute-free tags: the text
+    between tags is what HTMLParser would hand to handle_data. Returns None
+    if the snippet needs the real parser.
+    """
+    parts = SIMPLE_TAG_RE.split(html_string)
+    # split() interleaves text runs with the captured start tag names
+    runs = parts[::2]
+    for name in parts[1::2]:
+        if name and name.lower() in CDATA_TAGS:
+            return None
+
+    text = []
+    for run in runs[:-1]:
+        if '<' in run:
+            return None
+        if run:
+            text.append(unescape(run).strip())
+
+    last = runs[-1]
+    if '<' in last:
+        return None
+    if last:
+        last = strip_text_run(last)
+        if last is not None:
+            text.append(last)
+    return ' '.join(text).strip()
+
+@lru_cache(maxsize=CACHE_SIZE)
+def strip_html(html_string):
+    """Extract plain text from HTML string"""
+    # Most pricing snippets are plain text or only use simple inline tags,
+    # which don't need the parser at all
+    text = strip_simple_tags(html_string)
+    if text is None:
+        text = thread_stripper().strip(html_string)
+    return text
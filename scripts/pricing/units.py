@@ -0,0 +1,127 @@
+"""
+Billing units: detection from plain-text pricing descriptions, and parsing
+of catalog unit names ('output mega pixels', 'input kilo tokens', ...) into
+a base unit and a scale, so prices can be compared per base unit.
+"""
+
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+CACHE_SIZE = 4096
+
+DIGIT_SECONDS_RE = re.compile(r'\ds ')
+
+# Direction of the billed quantity; 'output mega pixels' and 'mega pixels'
+# measure the same thing, so the qualifier is kept out of the base unit
+QUALIFIERS = ('input', 'output')
+
+# Words that name a different quantity: compute seconds are GPU time, not media duration
+KINDS = ('compute',)
+
+PREFIXES = {
+    'kilo': 1e3,
+    'mega': 1e6,
+    'giga': 1e9,
+}
+
+# Unit word (as written in the catalog) -> (dimension, scale)
+DIMENSIONS = {
+    'second': ('second', 1.0),
+    'seconds': ('second', 1.0),
+    'minute': ('second', 60.0),
+    'minutes': ('second', 60.0),
+    'hour': ('second', 3600.0),
+    'hours': ('second', 3600.0),
+    'pixel': ('pixel', 1.0),
+    'pixels': ('pixel', 1.0),
+    'token': ('token', 1.0),
+    'tokens': ('token', 1.0),
+    'video token': ('video token', 1.0),
+    'video tokens': ('video token', 1.0),
+    'character': ('character', 1.0),
+    'characters': ('character', 1.0),
+    'step': ('step', 1.0),
+    'steps': ('step', 1.0),
+    'iteration': ('iteration', 1.0),
+    'iterations': ('iteration', 1.0),
+    'run': ('run', 1.0),
+    'runs': ('run', 1.0),
+}
+
+class Unit(NamedTuple):
+    """A parsed billing unit: `scale` base units of `dimension`, e.g. 'output mega pixels' is 1e6 pixels with qualifier 'output'."""
+    name: str
+    qualifier: str
+    dimension: str
+    scale: float
+
+    @property
+    def base(self):
+        """Name of the base unit; prices in the same base unit are comparable whatever their qualifier"""
+        return self.dimension
+
+    def per_base(self, price):
+        """Price per single base unit"""
+        return price / self.scale
+
+    def to_base(self, quantity):
+        """Quantity of this unit expressed in base units"""
+        return quantity * self.scale
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_unit(name):
+    """Parse a catalog unit name into a Unit; raises ValueError for unknown units"""
+    words = name.lower().split()
+    qualifier = ''
+    if words and words[0] in QUALIFIERS:
+        qualifier = words.pop(0)
+    kind = words.pop(0) if words and words[0] in KINDS else ''
+    scale = 1.0
+    if words and words[0] in PREFIXES:
+        scale = PREFIXES[words.pop(0)]
+    elif words:
+        # Prefix written as part of the word: 'megapixels'
+        for prefix, factor in PREFIXES.items():
+            if words[0].startswith(prefix) and words[0][len(prefix):] in DIMENSIONS:
+                words[0] = words[0][len(prefix):]
+                scale = factor
+                break
+    unit = DIMENSIONS.get(' '.join(words))
+    if unit is None:
+        raise ValueError(f"unknown unit {name!r}")
+    dimension, factor = unit
+    if kind:
+        dimension = f"{kind} {dimension}"
+    return Unit(name, qualifier, dimension, scale * factor)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def determine_unit(text):
+    """Determine unit based on Plain Text content"""
+    if not text:
+        return "unit"
+    
+    text_lower = text.lower()
+    
+    # Check for " second" string (with space before)
+    if " second" in text_lower:
+        return "Seconds"
+    
+    # Check for regex pattern "\ds " (digit followed by 's' and space)
+    if DIGIT_SECONDS_RE.search(text):
+        return "Seconds"
+    
+    # Check for "megapixel"
+    if "megapixel" in text_lower:
+        return "megapixel"
+    
+    # Check for "token"
+    if "token" in text_lower:
+        return "token"
+    
+    # Check for "minute"
+    if "minute" in text_lower:
+        return "minute"
+    
+    # Default
+    return "unit"
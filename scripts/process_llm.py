@@ -1,15 +1,28 @@
 import csv
 import os
+import re
 import requests
 import json
-from typing import Optional
+import asyncio
+import argparse
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from requests.adapters import HTTPAdapter
 import dotenv
+
+from llm_cache import LLMCache
+from instrument import Recorder, Stats, add_arguments
+
 dotenv.load_dotenv()
 
 # OpenRouter configuration for free LLM
 LLM_API_KEY: Optional[str] = os.getenv('OPENROUTER_API_KEY')  # Set via environment variable
-LLM_API_BASE: str = 'https://openrouter.ai/api/v1'
+LLM_API_BASE: str = os.getenv('LLM_API_BASE', 'https://openrouter.ai/api/v1')  # Point at a local stub for testing
 LLM_MODEL: str = 'microsoft/wizardlm-2-8x22b'  # Free model on OpenRouter
+LLM_TEMPERATURE: float = 0.1
+LLM_MAX_TOKENS: int = 1000  # Completion tokens per answer
+LLM_MAX_BATCH_TOKENS: int = int(os.getenv('LLM_MAX_BATCH_TOKENS', '8000'))  # Cap for one batched request
+
+CHECKPOINT_SUFFIX = '.checkpoint'
 
 # TODO: Set your prompt template here
 # {plain_text} will be replaced with the actual plain text from each row
@@ -30,17 +43,64 @@ if generation is per X tokens, output "<price> / X", for example per 1M tokens t
 {plain_text}
 """
 
-def query_llm(plain_text: str) -> str:
+# Batched mode: several rows share one copy of PROMPT_TEMPLATE. The rows are
+# numbered and the answers must come back under the same numbers.
+BATCH_INSTRUCTIONS = """the text below contains several pricing formulas, one per numbered line.
+translate each one separately. start each answer on a new line with the same number in square brackets,
+for example "[2] seconds * 0.05", and put any further lines of that answer (such as resolutions) right after it.
+
+"""
+
+SLOT_RE = re.compile(r'^[ \t]*\[(\d+)\][ \t]*', re.MULTILINE)
+
+# Cache key template for answers parsed out of a batched prompt. They come
+# from a different prompt than single-row answers, so they are cached apart.
+BATCH_PROMPT_TEMPLATE = PROMPT_TEMPLATE.replace('{plain_text}', BATCH_INSTRUCTIONS + '{plain_text}')
+
+def build_request(plain_text: str) -> Tuple[Dict[str, str], Dict[str, Any]]:
     """
-    Query the LLM using OpenRouter API.
+    Build the headers and JSON body for one chat completion request.
     """
+    return build_prompt_request(PROMPT_TEMPLATE.format(plain_text=plain_text))
+
+def build_batch_prompt(plain_texts: List[str]) -> str:
+    """
+    Pack several plain-text rows into one prompt with numbered slots [1]..[N].
+    """
+    numbered = '\n'.join(f"[{n}] {' '.join(plain_text.splitlines())}" for n, plain_text in enumerate(plain_texts, start=1))
+    return PROMPT_TEMPLATE.format(plain_text=BATCH_INSTRUCTIONS + numbered)
+
+def parse_batch_response(content: str, count: int, truncated: bool = False) -> List[Optional[str]]:
+    """
+    Split a batched reply back into one answer per slot.
     
-    if not LLM_API_KEY:
-        print("Error: OPENROUTER_API_KEY environment variable not set")
-        return "Error: API key not configured"
-    
-    prompt = PROMPT_TEMPLATE.format(plain_text=plain_text)
-    
+    Slots that are missing, empty, out of range or answered twice are None.
+    If the reply was cut off (truncated), the last slot in it may be
+    incomplete and is None as well.
+    """
+    answers: List[Optional[str]] = [None] * count
+    seen = set()
+    matches = list(SLOT_RE.finditer(content))
+    for match, following in zip(matches, matches[1:] + [None]):
+        n = int(match.group(1))
+        answer = content[match.end():following.start() if following else len(content)].strip()
+        if not 1 <= n <= count:
+            continue
+        if n in seen:
+            answers[n - 1] = None
+            continue
+        seen.add(n)
+        answers[n - 1] = answer or None
+    if truncated and matches:
+        n = int(matches[-1].group(1))
+        if 1 <= n <= count:
+            answers[n - 1] = None
+    return answers
+
+def build_prompt_request(prompt: str, max_tokens: int = LLM_MAX_TOKENS) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    """
+    Build the headers and JSON body for a chat completion request with a ready-made prompt.
+    """
     headers = {
         "Authorization": f"Bearer {LLM_API_KEY}",
         "Content-Type": "application/json",
@@ -53,9 +113,21 @@ def query_llm(plain_text: str) -> str:
         "messages": [
             {"role": "user", "content": prompt}
         ],
-        "max_tokens": 1000,
-        "temperature": 0.1
+        "max_tokens": max_tokens,
+        "temperature": LLM_TEMPERATURE
     }
+    return headers, data
+
+def query_llm(plain_text: str) -> str:
+    """
+    Query the LLM using OpenRouter API.
+    """
+    
+    if not LLM_API_KEY:
+        print("Error: OPENROUTER_API_KEY environment variable not set")
+        return "Error: API key not configured"
+    
+    headers, data = build_request(plain_text)
     
     try:
         response = requests.post(
@@ -76,72 +148,392 @@ def query_llm(plain_text: str) -> str:
         print(f"Error parsing OpenRouter response: {e}")
         return f"Error parsing response: {str(e)}"
 
-def process_csv(input_file: str = 'fal-prices-plain.csv', output_file: Optional[str] = None):
+class AsyncLLMClient:
+    """
+    Concurrent LLM client for asyncio code.
+
+    At most `concurrency` requests are in flight at once, sharing one pooled
+    requests.Session (each blocking call runs in a worker thread). Rate
+    limits (429) and transient server errors are retried with exponential
+    backoff, honouring Retry-After when the server sends it.
+
+    Requests sent and tokens used are counted in `usage`.
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, concurrency: int = 8, retries: int = 5, backoff: float = 1.0, timeout: float = 30.0):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.usage = {'requests': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'slot_retries': 0}
+
+    def retry_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return float(retry_after)
+        return self.backoff * (2 ** attempt)
+
+    def post(self, headers: Dict[str, str], data: Dict[str, Any]) -> requests.Response:
+        return self.session.post(
+            f"{LLM_API_BASE}/chat/completions",
+            headers=headers,
+            data=json.dumps(data),
+            timeout=self.timeout
+        )
+
+    async def complete(self, prompt: str, max_tokens: int = LLM_MAX_TOKENS) -> str:
+        """
+        Send one prompt and return the reply. Errors are returned as "Error: ..." strings.
+        """
+        content, _ = await self.request(prompt, max_tokens)
+        return content
+
+    async def request(self, prompt: str, max_tokens: int = LLM_MAX_TOKENS) -> Tuple[str, Optional[str]]:
+        """
+        Like complete, but returns (reply, finish reason); the reason is 'length' if max_tokens cut the reply off.
+        """
+        if not LLM_API_KEY:
+            return "Error: API key not configured", None
+
+        headers, data = build_prompt_request(prompt, max_tokens)
+
+        async with self.semaphore:
+            for attempt in range(self.retries + 1):
+                self.usage['requests'] += 1
+                try:
+                    response = await asyncio.to_thread(self.post, headers, data)
+                except requests.exceptions.RequestException as e:
+                    if attempt == self.retries:
+                        print(f"Error calling OpenRouter API: {e}")
+                        return f"Error: {str(e)}", None
+                    await asyncio.sleep(self.retry_delay(attempt))
+                    continue
+
+                if response.status_code in self.RETRY_STATUSES and attempt < self.retries:
+                    await asyncio.sleep(self.retry_delay(attempt, response))
+                    continue
+
+                try:
+                    response.raise_for_status()
+                    result = response.json()
+                    choice = result["choices"][0]
+                    content = choice["message"]["content"].strip()
+                except requests.exceptions.RequestException as e:
+                    print(f"Error calling OpenRouter API: {e}")
+                    return f"Error: {str(e)}", None
+                except (KeyError, IndexError, ValueError) as e:
+                    print(f"Error parsing OpenRouter response: {e}")
+                    return f"Error parsing response: {str(e)}", None
+
+                usage = result.get("usage") or {}
+                self.usage['prompt_tokens'] += usage.get("prompt_tokens", 0)
+                self.usage['completion_tokens'] += usage.get("completion_tokens", 0)
+                return content, choice.get("finish_reason")
+
+    async def query(self, plain_text: str) -> str:
+        """
+        Async equivalent of query_llm. Errors are returned as "Error: ..." strings.
+        """
+        return await self.complete(PROMPT_TEMPLATE.format(plain_text=plain_text))
+
+    async def query_batch(self, plain_texts: List[str]) -> List[Tuple[str, str]]:
+        """
+        Translate several texts with one request; returns (answer, template)
+        pairs, template being the prompt template the answer came from.
+        Slots missing from the reply (or a failed request) fall back to one
+        query per text, answered with PROMPT_TEMPLATE. The reply is capped at
+        LLM_MAX_BATCH_TOKENS; slots cut off by the cap are retried the same way.
+        """
+        if len(plain_texts) == 1:
+            return [(await self.query(plain_texts[0]), PROMPT_TEMPLATE)]
+
+        max_tokens = min(LLM_MAX_TOKENS * len(plain_texts), LLM_MAX_BATCH_TOKENS)
+        content, finish_reason = await self.request(build_batch_prompt(plain_texts), max_tokens=max_tokens)
+        if content.startswith('Error'):
+            answers = [None] * len(plain_texts)
+        else:
+            answers = parse_batch_response(content, len(plain_texts), truncated=finish_reason == 'length')
+        answers = [(answer, BATCH_PROMPT_TEMPLATE) if answer is not None else None for answer in answers]
+
+        missing = [i for i, answer in enumerate(answers) if answer is None]
+        if missing:
+            reason = 'the request failed' if content.startswith('Error') else 'missing from the reply'
+            print(f"Batch of {len(plain_texts)}: {len(missing)} answer(s) {reason}, querying them one at a time")
+            self.usage['slot_retries'] += len(missing)
+            retried = await asyncio.gather(*(self.query(plain_texts[i]) for i in missing))
+            for i, answer in zip(missing, retried):
+                answers[i] = (answer, PROMPT_TEMPLATE)
+        return answers
+
+    async def query_all(self, plain_texts: List[str], batch_size: int = 1) -> List[Tuple[str, str]]:
+        """
+        Query every text concurrently; (answer, template) pairs come back in
+        input order. With batch_size above 1, texts are packed batch_size to
+        a request.
+        """
+        if batch_size <= 1:
+            answers = await asyncio.gather(*(self.query(plain_text) for plain_text in plain_texts))
+            return [(answer, PROMPT_TEMPLATE) for answer in answers]
+        batches = [plain_texts[i:i + batch_size] for i in range(0, len(plain_texts), batch_size)]
+        answers = await asyncio.gather(*(self.query_batch(batch) for batch in batches))
+        return [answer for batch_answers in answers for answer in batch_answers]
+
+    def stats(self) -> str:
+        return (f"LLM requests: {self.usage['requests']}, prompt tokens: {self.usage['prompt_tokens']}, "
+                f"completion tokens: {self.usage['completion_tokens']}, slot retries: {self.usage['slot_retries']}")
+
+    def close(self):
+        self.session.close()
+
+def input_signature(input_file: str) -> List[int]:
+    """
+    Size and modification time of the input; a checkpoint only applies to the file it was made for.
+    """
+    stat = os.stat(input_file)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def load_checkpoint(checkpoint_file: str, input_file: str) -> Optional[Dict[str, Any]]:
+    """
+    Return the saved progress for input_file, or None if there is nothing to resume.
+    """
+    if not os.path.exists(checkpoint_file):
+        return None
+    with open(checkpoint_file, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    if state.get('input') != os.path.abspath(input_file):
+        print(f"Ignoring checkpoint {checkpoint_file}: it was made for {state.get('input')}")
+        return None
+    if state.get('signature') != input_signature(input_file):
+        print(f"Ignoring checkpoint {checkpoint_file}: {input_file} changed since it was made")
+        return None
+    return state
+
+def save_checkpoint(checkpoint_file: str, state: Dict[str, Any]):
+    """
+    Atomically replace the checkpoint file, so it is never left half-written.
+    """
+    tmp_file = checkpoint_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, checkpoint_file)
+
+def iter_batches(reader: csv.DictReader, start_row: int, batch_size: int):
+    """
+    Yield lists of (row number, model id, plain text) for rows after start_row.
+    """
+    batch = []
+    for idx, row in enumerate(reader, start=1):
+        if idx <= start_row:
+            continue
+        
+        model_id = row.get('Model ID', '')
+        plain_text = row.get('Plain Text', '')
+        
+        if not plain_text.strip():
+            print(f"Row {idx}: Skipping empty Plain Text")
+            continue
+        
+        batch.append((idx, model_id, plain_text))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def answer_batch(batch: List[Tuple[int, str, str]], query_many, cache: Optional[LLMCache] = None,
+                 templates: Sequence[str] = (PROMPT_TEMPLATE,)) -> List[str]:
+    """
+    Responses for one batch: cached ones from the cache, the rest through query_many.
+    
+    query_many returns (response, template) pairs, and each response is
+    cached under the template it was produced with. Cached responses are
+    looked up under templates, in order.
+    """
+    responses = [None] * len(batch)
+    if cache is not None:
+        for i, (_, _, plain_text) in enumerate(batch):
+            responses[i] = cache.get_any(LLM_MODEL, templates, plain_text, LLM_TEMPERATURE)
+    to_query = [i for i, response in enumerate(responses) if response is None]
+    
+    fresh = query_many([batch[i] for i in to_query]) if to_query else []
+    for i, (llm_response, template) in zip(to_query, fresh):
+        responses[i] = llm_response
+        if cache is not None and not llm_response.startswith('Error'):
+            cache.put(LLM_MODEL, template, batch[i][2], LLM_TEMPERATURE, llm_response)
+    return responses
+
+def process_csv(input_file: str = 'fal-prices-plain.csv', output_file: Optional[str] = None,
+                concurrency: int = 1, cache: Optional[LLMCache] = None, resume: bool = True,
+                batch_size: int = 1, stats: Optional[Stats] = None) -> Optional[int]:
     """
     Read CSV file and query LLM for each row's Plain Text column.
     
+    Rows are streamed: each batch of responses is appended to output_file
+    and flushed to disk before the next batch is read, and the progress is
+    recorded in '<output_file>.checkpoint'. If a run is interrupted, the next
+    run picks up after the last completed batch, unless the input's size or
+    modification time changed since. The checkpoint never moves past a row
+    whose response is an error, so running again retries from the first
+    failed row (rows after it are answered from the cache). The checkpoint
+    is removed once the whole input has been processed without errors.
+    
     Args:
         input_file: Path to input CSV file (default: 'fal-prices-plain.csv')
         output_file: Optional path to output CSV file with LLM responses
+        concurrency: Requests in flight at once; above 1 uses AsyncLLMClient
+        cache: Optional LLMCache; rows with a cached response are not re-queried.
+            Answers are cached under the template of the prompt they came from
+            (batched or single-row); batched runs reuse either kind
+        resume: Continue from an existing checkpoint instead of starting over
+        batch_size: Rows packed into one request; above 1 uses AsyncLLMClient
+        stats: Optional Stats; time waiting for the LLM, time writing output,
+            rows processed in this run and request/token/cache counts are added
+    
+    Returns:
+        Number of rows in the output (including rows from earlier runs)
     """
     if not os.path.exists(input_file):
         print(f"Error: File '{input_file}' not found")
         return
     
-    results = []
+    checkpoint_file = output_file + CHECKPOINT_SUFFIX if output_file else None
+    state = load_checkpoint(checkpoint_file, input_file) if checkpoint_file and resume else None
+    if state and (not os.path.exists(output_file) or os.path.getsize(output_file) < state['offset']):
+        print(f"Ignoring checkpoint {checkpoint_file}: {output_file} is missing or shorter than recorded")
+        state = None
     
-    with open(input_file, 'r', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        
-        if 'Plain Text' not in reader.fieldnames:
-            print(f"Error: 'Plain Text' column not found in CSV")
-            print(f"Available columns: {reader.fieldnames}")
-            return
-        
-        total_rows = sum(1 for _ in reader)
-        csvfile.seek(0)  # Reset to beginning
-        reader = csv.DictReader(csvfile)  # Recreate reader
-        
-        print(f"Processing {total_rows} rows from {input_file}...")
-        
-        for idx, row in enumerate(reader, start=1):
-            model_id = row.get('Model ID', '')
-            plain_text = row.get('Plain Text', '')
+    if concurrency > 1 or batch_size > 1:
+        client = AsyncLLMClient(concurrency=concurrency)
+        loop = asyncio.new_event_loop()
+        query_many = lambda items: loop.run_until_complete(
+            client.query_all([plain_text for _, _, plain_text in items], batch_size=batch_size))
+        window = concurrency * max(batch_size, 1) * 4
+    else:
+        client = loop = None
+        def query_many(items):
+            responses = []
+            for idx, model_id, plain_text in items:
+                print(f"Processing row {idx}: {model_id}")
+                responses.append((query_llm(plain_text), PROMPT_TEMPLATE))
+            return responses
+        window = 1
+    
+    # Batched runs can reuse single-row answers; single-row runs only their own
+    templates = (BATCH_PROMPT_TEMPLATE, PROMPT_TEMPLATE) if batch_size > 1 else (PROMPT_TEMPLATE,)
+    stats = stats if stats is not None else Stats()
+    def timed_query(items):
+        with stats.section('llm'):
+            return query_many(items)
+    
+    outfile = writer = None
+    try:
+        with open(input_file, 'r', encoding='utf-8', newline='') as csvfile:
+            reader = csv.DictReader(csvfile)
             
-            if not plain_text.strip():
-                print(f"Row {idx}: Skipping empty Plain Text")
-                continue
+            if 'Plain Text' not in reader.fieldnames:
+                print(f"Error: 'Plain Text' column not found in CSV")
+                print(f"Available columns: {reader.fieldnames}")
+                return
             
-            print(f"Processing row {idx}/{total_rows}: {model_id}")
+            if output_file:
+                fieldnames = ['Model ID', 'Plain Text', 'LLM Response']
+                if state:
+                    # Drop anything written after the last checkpoint, then append
+                    outfile = open(output_file, 'r+', newline='', encoding='utf-8')
+                    outfile.truncate(state['offset'])
+                    outfile.seek(state['offset'])
+                    writer = csv.DictWriter(outfile, fieldnames=fieldnames)
+                    print(f"Resuming {input_file} after row {state['row']} ({state['written']} rows already in {output_file})")
+                else:
+                    outfile = open(output_file, 'w', newline='', encoding='utf-8')
+                    writer = csv.DictWriter(outfile, fieldnames=fieldnames)
+                    writer.writeheader()
+                    state = {'input': os.path.abspath(input_file), 'signature': input_signature(input_file),
+                             'row': 0, 'written': 0, 'offset': 0}
+            else:
+                state = {'row': 0, 'written': 0}
             
-            llm_response = query_llm(plain_text)
+            print(f"Processing rows from {input_file}...")
             
-            result = {
-                'Model ID': model_id,
-                'Plain Text': plain_text,
-                'LLM Response': llm_response
-            }
-            print(result)
-            results.append(result)
-    
-    # Optionally write results to output file
+            failed = 0
+            for batch in iter_batches(reader, state['row'], window):
+                responses = answer_batch(batch, timed_query, cache, templates)
+                stats.rows += len(batch)
+                
+                with stats.section('write'):
+                    for (idx, model_id, plain_text), llm_response in zip(batch, responses):
+                        result = {
+                            'Model ID': model_id,
+                            'Plain Text': plain_text,
+                            'LLM Response': llm_response
+                        }
+                        print(result)
+                        if writer:
+                            writer.writerow(result)
+                    
+                    state['row'] = batch[-1][0]
+                    state['written'] += len(batch)
+                    failed += sum(1 for llm_response in responses if llm_response.startswith('Error'))
+                    if outfile:
+                        outfile.flush()
+                        os.fsync(outfile.fileno())
+                        state['offset'] = outfile.tell()
+                        # The checkpoint stays before the first failed row, so a rerun retries it
+                        if not failed:
+                            save_checkpoint(checkpoint_file, state)
+    finally:
+        if outfile:
+            outfile.close()
+        if client:
+            client.close()
+            loop.close()
+    
+    if cache is not None:
+        print(cache.stats())
+        stats.count('cache', 'hits', cache.hits)
+        stats.count('cache', 'misses', cache.misses)
+    if client:
+        print(client.stats())
+        for name, value in client.usage.items():
+            stats.count('llm', name, value)
+    
+    if failed:
+        print(f"{failed} rows failed; run again to retry them")
+    elif checkpoint_file and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
     if output_file:
-        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['Model ID', 'Plain Text', 'LLM Response']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(results)
         print(f"\nResults written to {output_file}")
     
-    return results
+    return state['written']
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Translate plain-text pricing to formulas with an LLM')
+    parser.add_argument('input', nargs='?', default='fal-prices-plain.csv', help='Input CSV (default: fal-prices-plain.csv)')
+    parser.add_argument('output', nargs='?', default='llm_responses.csv', help='Output CSV (default: llm_responses.csv)')
+    parser.add_argument('--concurrency', type=int, default=1, help='Requests in flight at once (default: 1)')
+    parser.add_argument('--batch-size', type=int, default=1, help='Rows packed into one request (default: 1)')
+    parser.add_argument('--cache', default='llm-cache.sqlite', help='Response cache file (default: llm-cache.sqlite)')
+    parser.add_argument('--no-cache', action='store_true', help='Query every row, ignoring the response cache')
+    parser.add_argument('--restart', action='store_true', help='Ignore any checkpoint and rewrite the output from the first row')
+    parser.add_argument('--prune-cache', action='store_true', help='Drop cached responses from other models or prompt templates first')
+    add_arguments(parser)
+    args = parser.parse_args()
+
     print("AI Price Table Processor using OpenRouter")
     print("=" * 50)
     print("To use this script:")
     print("1. Get a free API key from https://openrouter.ai/")
     print("2. Set your API key: export OPENROUTER_API_KEY=your_key_here")
-    print("3. Run: python process_llm.py")
+    print("3. Run: python process_llm.py [input.csv] [output.csv] [--concurrency 8] [--batch-size 10]")
     print("=" * 50)
     
     if not LLM_API_KEY:
@@ -149,11 +541,19 @@ if __name__ == '__main__':
         print("Please set your API key and try again.")
         exit(1)
     
+    cache = None if args.no_cache else LLMCache(args.cache)
+    if cache is not None and args.prune_cache:
+        print(f"Pruned {cache.prune(LLM_MODEL, PROMPT_TEMPLATE, BATCH_PROMPT_TEMPLATE)} stale cache entries")
+    
     # Process the CSV file
-    # You can specify output file: process_csv('fal-prices-plain.csv', 'llm_responses.csv')
-    csv_results = process_csv('fal-prices-plain.csv', 'llm_responses.csv')
+    try:
+        with Recorder('process_llm', args.report, args.profile) as recorder:
+            written = process_csv(args.input, args.output, concurrency=args.concurrency, cache=cache,
+                                  resume=not args.restart, batch_size=args.batch_size, stats=recorder)
+    finally:
+        if cache is not None:
+            cache.close()
     
-    if csv_results:
-        print(f"\nSuccessfully processed {len(csv_results)} rows!")
-        print("Results saved to 'llm_responses.csv'")
-
+    if written:
+        print(f"\nSuccessfully processed {written} rows!")
+        print(f"Results saved to '{args.output}'")
@@ -1,81 +1,71 @@
 import csv
-import re
+import sys
+import argparse
+from itertools import chain
 
-def determine_unit(text):
-    """Determine unit based on Plain Text content"""
-    if not text:
-        return "unit"
-    
-    text_lower = text.lower()
-    
-    # Check for " second" string (with space before)
-    if " second" in text_lower:
-        return "Seconds"
-    
-    # Check for regex pattern "\ds " (digit followed by 's' and space)
-    if re.search(r'\ds ', text):
-        return "Seconds"
-    
-    # Check for "megapixel"
-    if "megapixel" in text_lower:
-        return "megapixel"
-    
-    # Check for "token"
-    if "token" in text_lower:
-        return "token"
-    
-    # Check for "minute"
-    if "minute" in text_lower:
-        return "minute"
-    
-    # Default
-    return "unit"
+from atomic import atomic_write
+from instrument import Recorder, Stats, add_arguments
+from pricing import determine_unit
 
-# Read the CSV file
-input_file = 'fal-prices-plain2.csv'
-output_file = 'fal-prices-plain2.csv'  # Overwrite the same file
+HEADER = ['Model ID', 'Plain Text', 'Units']
 
-rows = []
-with open(input_file, 'r', encoding='utf-8') as csvfile:
-    reader = csv.reader(csvfile)
-    
-    # Check if first row is header
+def is_header(row):
+    # process_prices.py output has a third 'Inference Formula' column, which is dropped
+    return (len(row) >= 2 and
+            row[0].lower() == 'model id' and
+            row[1].lower() == 'plain text')
+
+def iter_unit_rows(reader, stats=None):
+    """Yield the header, then [model id, plain text, unit] for each row, one at a time"""
+    stats = stats if stats is not None else Stats()
     first_row = next(reader, None)
     if first_row is None:
-        print("File is empty")
-        exit(1)
-    
-    # Check if first row looks like a header
-    has_header = (len(first_row) == 2 and 
-                  first_row[0].lower() == 'model id' and 
-                  first_row[1].lower() == 'plain text')
+        return
     
-    if has_header:
-        # Save header and update it
-        header = ['Model ID', 'Plain Text', 'Units']
-        rows.append(header)
-    else:
-        # No header, add one and process first row as data
-        rows.append(['Model ID', 'Plain Text', 'Units'])
-        model_id = first_row[0] if len(first_row) > 0 else ""
-        plain_text = first_row[1] if len(first_row) > 1 else ""
-        unit = determine_unit(plain_text)
-        rows.append([model_id, plain_text, unit])
-    
-    # Process remaining rows
-    for row in reader:
+    yield HEADER
+    # Without a header the first row is data
+    rows = reader if is_header(first_row) else chain([first_row], reader)
+    for row in rows:
         if len(row) < 2:
             continue
-        model_id = row[0]
-        plain_text = row[1]
-        unit = determine_unit(plain_text)
-        rows.append([model_id, plain_text, unit])
+        with stats.section('determine_unit'):
+            unit = determine_unit(row[1])
+        stats.count('units', unit)
+        yield [row[0], row[1], unit]
+
+def write_rows(f, rows):
+    """Write rows to an open CSV file; returns the number of rows written"""
+    writer = csv.writer(f)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
 
-# Write the updated CSV
-with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-    writer = csv.writer(csvfile)
-    writer.writerows(rows)
+def main():
+    parser = argparse.ArgumentParser(description="Add a 'Units' column to a model id / plain text price CSV")
+    parser.add_argument('input', nargs='?', default='fal-prices-plain2.csv', help='Input CSV (default: fal-prices-plain2.csv)')
+    parser.add_argument('output', nargs='?', help='Output CSV (default: rewrite the input in place)')
+    add_arguments(parser)
+    args = parser.parse_args()
 
-print(f"Processed {len(rows) - 1} rows (excluding header)")
-print(f"Added 'Units' column to {output_file}")
+    output_file = args.output or args.input
+    with Recorder('process_units', args.report, args.profile) as recorder:
+        # The input is closed before atomic_write renames the output over it
+        with atomic_write(output_file) as outfile:
+            with open(args.input, 'r', newline='', encoding='utf-8') as csvfile:
+                rows = iter_unit_rows(csv.reader(csvfile), recorder)
+                # Only pull the first row here, so an empty input is left untouched
+                header = next(rows, None)
+                if header is None:
+                    print("File is empty")
+                    sys.exit(1)
+                
+                count = write_rows(outfile, chain([header], rows))
+        recorder.rows = count - 1
+    
+    print(f"Processed {count - 1} rows (excluding header)")
+    print(f"Added 'Units' column to {output_file}")
 
+if __name__ == '__main__':
+    main()
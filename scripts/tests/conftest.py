@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT = os.path.dirname(SCRIPTS)
+FIXTURES = os.path.join(SCRIPTS, 'fixtures')
+
+# The scripts import each other as top-level modules
+sys.path.insert(0, SCRIPTS)
+
+
+@pytest.fixture
+def catalog_path():
+    return os.path.join(ROOT, 'data', 'prices-v1.csv')
@@ -0,0 +1,62 @@
+import os
+import stat
+
+import pytest
+
+from atomic import atomic_write
+from enrich import Enrichment, enrich
+
+
+def test_keeps_mode_of_replaced_file(tmp_path):
+    path = os.path.join(tmp_path, 'out.csv')
+    with open(path, 'w') as f:
+        f.write('old\n')
+    os.chmod(path, 0o644)
+
+    with atomic_write(path) as f:
+        f.write('new\n')
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+    with open(path) as f:
+        assert f.read() == 'new\n'
+    assert os.listdir(tmp_path) == ['out.csv']
+
+
+def test_new_file_gets_umask_mode(tmp_path):
+    path = os.path.join(tmp_path, 'out.csv')
+    umask = os.umask(0o022)
+    try:
+        with atomic_write(path) as f:
+            f.write('new\n')
+    finally:
+        os.umask(umask)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+
+
+def test_error_leaves_old_file(tmp_path):
+    path = os.path.join(tmp_path, 'out.csv')
+    with open(path, 'w') as f:
+        f.write('old\n')
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as f:
+            f.write('partial')
+            raise RuntimeError
+
+    with open(path) as f:
+        assert f.read() == 'old\n'
+    assert os.listdir(tmp_path) == ['out.csv']
+
+
+def test_enrich_in_place(tmp_path):
+    path = os.path.join(tmp_path, 'prices.csv')
+    with open(path, 'w', newline='') as f:
+        f.write('model_id,price\r\na/one,1\r\nb/two,2\r\n')
+    os.chmod(path, 0o640)
+
+    unmatched = enrich(path, path, [Enrichment('tag', 'tags.csv', {'a/one': 'image'})])
+
+    assert unmatched == {'tag': ['b/two']}
+    with open(path, newline='') as f:
+        assert f.read() == 'model_id,price,tag\r\na/one,1,image\r\nb/two,2,\r\n'
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
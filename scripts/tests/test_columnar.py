@@ -0,0 +1,35 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import columnar
+from conftest import ROOT
+from csv_to_json import CSVToJSONConverter
+
+# One column per binary encoding, and a dictionary too large for uint8 codes
+HEADERS = ['name', 'tag', 'price', 'mixed', 'wide']
+ROWS = [[f'model-{i} ☕', ['image', 'video'][i % 2], None if i % 7 == 0 else i / 8,
+         [1, 'two', None, [3], {'four': 4}][i % 5], f'value-{i % 300}'] for i in range(1200)]
+
+
+def round_trips(table, rows):
+    assert columnar.table_rows(json.loads(json.dumps(table, ensure_ascii=False))) == rows
+    assert columnar.table_rows(columnar.decode_binary(columnar.encode_binary(table))) == rows
+
+
+def test_catalog_round_trip():
+    converter = CSVToJSONConverter()
+    headers, data_rows = converter.read_csv(Path(ROOT, 'data', 'prices-v1.csv'))
+    table = columnar.build_columns(headers, converter.convert_to_array(headers, data_rows))
+    round_trips(table, converter.convert_to_objects(headers, data_rows))
+
+
+@pytest.mark.parametrize('dictionary', [None, ['tag', 'wide'], HEADERS, []])
+def test_encodings_round_trip(dictionary):
+    table = columnar.build_columns(HEADERS, ROWS, dictionary)
+    round_trips(table, [dict(zip(HEADERS, row)) for row in ROWS])
+
+
+def test_empty_table_round_trip():
+    round_trips(columnar.build_columns(HEADERS, []), [])
@@ -0,0 +1,87 @@
+import csv
+
+import pytest
+
+from cost_engine import PROFILES, CostEngine, loop_costs
+from pricing import parse_unit
+
+
+# Multi-option, mismatched, approximate and per-minute prices
+SMALL_CATALOG = [
+    {'model_id': 'a/video', 'tag': 'text-to-video', 'options': '480p\n720p', 'bip_units': 'output seconds', 'bip_price_usd': '0.15\n0.3'},
+    {'model_id': 'b/video', 'tag': 'text-to-video', 'options': '720p', 'bip_units': 'output seconds', 'bip_price_usd': '0.2*'},
+    {'model_id': 'c/video', 'tag': 'text-to-video', 'options': 'fast', 'bip_units': 'output minutes', 'bip_price_usd': '6\n9'},
+    {'model_id': 'd/image', 'tag': 'text-to-image', 'options': '', 'bip_units': 'runs', 'bip_price_usd': '0.04'},
+    {'model_id': 'e/image', 'tag': 'text-to-image', 'options': '', 'bip_units': 'mega pixels', 'bip_price_usd': ''},
+]
+
+
+def read_rows(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def test_catalog_units_parse(catalog_path):
+    unknown = set()
+    for row in read_rows(catalog_path):
+        if row['bip_price_usd']:
+            try:
+                parse_unit(row['bip_units'])
+            except ValueError:
+                unknown.add(row['bip_units'])
+    assert not unknown, f"add these units to pricing/units.py: {sorted(unknown)}"
+
+
+def test_unknown_units_are_skipped(capsys):
+    rows = [
+        {'model_id': 'a', 'bip_units': 'images', 'bip_price_usd': '0.1'},
+        {'model_id': 'b', 'bip_units': '', 'bip_price_usd': '0.1'},
+        {'model_id': 'c', 'bip_units': 'runs', 'bip_price_usd': '0.2'},
+    ]
+    engine = CostEngine(rows)
+    assert engine.skipped == [('a', 'images'), ('b', '')]
+    assert [estimate.model_id for estimate in engine.top_k({'runs': 1})] == ['c']
+    assert 'skipping a' in capsys.readouterr().err
+    assert [estimate.model_id for estimate in loop_costs(rows, {'runs': 1})] == ['c']
+
+
+def cost_table(estimates):
+    return sorted((estimate.model_id, estimate.option, round(estimate.cost, 12)) for estimate in estimates)
+
+
+@pytest.mark.parametrize('usage, tag, option', PROFILES)
+def test_engine_matches_loop(catalog_path, usage, tag, option):
+    rows = read_rows(catalog_path)
+    engine = CostEngine(rows)
+    expected = cost_table(loop_costs(rows, usage, tag, option))
+    assert cost_table(engine.top_k(usage, len(engine), tag, option)) == expected
+
+
+@pytest.mark.parametrize('usage, tag, option', PROFILES)
+def test_engine_matches_loop_on_small_catalog(usage, tag, option):
+    engine = CostEngine(SMALL_CATALOG)
+    expected = cost_table(loop_costs(SMALL_CATALOG, usage, tag, option))
+    assert cost_table(engine.top_k(usage, len(engine), tag, option)) == expected
+
+
+def test_small_catalog_costs():
+    engine = CostEngine(SMALL_CATALOG)
+    assert cost_table(engine.top_k({'output seconds': 10}, len(engine), 'text-to-video')) == [
+        ('a/video', '480p', 1.5), ('a/video', '720p', 3.0), ('b/video', '720p', 2.0),
+        ('c/video', 'price 1', 1.0), ('c/video', 'price 2', 1.5)]
+    assert [estimate.model_id for estimate in engine.top_k({'output seconds': 10}, 10, option='720p')] == ['b/video', 'a/video']
+
+
+def test_qualified_and_plain_units_compare():
+    assert parse_unit('output mega pixels').base == parse_unit('mega pixels').base == 'pixel'
+    assert parse_unit('output mega pixels').qualifier == 'output'
+    assert parse_unit('compute seconds').base != parse_unit('output seconds').base
+
+    rows = [
+        {'model_id': 'a/image', 'bip_units': 'mega pixels', 'bip_price_usd': '0.03'},
+        {'model_id': 'b/image', 'bip_units': 'output mega pixels', 'bip_price_usd': '0.02'},
+    ]
+    engine = CostEngine(rows)
+    for usage in ({'mega pixels': 2}, {'output mega pixels': 2}):
+        assert cost_table(engine.top_k(usage, 10)) == [('a/image', '', 0.06), ('b/image', '', 0.04)]
+        assert cost_table(loop_costs(rows, usage)) == [('a/image', '', 0.06), ('b/image', '', 0.04)]
@@ -0,0 +1,19 @@
+import codecs
+import json
+import os
+
+import pytest
+
+from enrich import iter_json_entries
+
+SCHEMA = {'provider': 'fal-ai', 'name': 'flux', 'desc': 'Images'}
+
+
+@pytest.mark.parametrize('data', [[SCHEMA], {'fal-ai/flux': SCHEMA}])
+@pytest.mark.parametrize('prefix', [b'', codecs.BOM_UTF8, b' \n' * 100, codecs.BOM_UTF8 + b'\t' * 5000])
+@pytest.mark.parametrize('stream', [True, False])
+def test_leading_bom_and_whitespace(tmp_path, data, prefix, stream):
+    path = os.path.join(tmp_path, 'side.json')
+    with open(path, 'wb') as f:
+        f.write(prefix + json.dumps(data).encode('utf-8'))
+    assert list(iter_json_entries(path, stream)) == [('fal-ai/flux', SCHEMA)]
@@ -0,0 +1,38 @@
+import json
+import os
+
+import pytest
+
+import pricing
+from conftest import FIXTURES
+
+# (formula, variant, variables, expected cost)
+EXPECTED = (
+    ('duration <= 5 ? 0.8 : 0.8 + ((duration - 5) * 0.2)', None, {'duration': 5}, 0.8),
+    ('duration <= 5 ? 0.8 : 0.8 + ((duration - 5) * 0.2)', None, {'duration': 8}, 1.4),
+    ('(step / 1000) * 0.5', None, {'step': 3000}, 1.5),
+    ('480p: second * 0.1\n720p: second * 0.2', '480p', {'second': 4}, 0.4),
+    ('480p: second * 0.1\n720p: second * 0.2', '720p', {'second': 4}, 0.8),
+    ('with audio: second * 0.40\nno audio: second * 0.25', 'no audio', {'second': 10}, 2.5),
+    ('vector style: image * 0.08\nstandard: image * 0.04', 'Vector Style', {'image': 2}, 0.16),
+    ('(character / 1000) * 0.025', None, {'character': 2000}, 0.05),
+    ('Low quality: 0.011\nMedium quality: 0.042\nBest quality: 0.25.', 'best quality', {}, 0.25),
+    ('-1 + 2 * (3 - 1) / 4', None, {}, 0.0),
+)
+
+
+def corpus_formulas():
+    with open(os.path.join(FIXTURES, 'fal-prices.json'), 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    formulas = (pricing.create_inference_formula(pricing.strip_html(html)) for html in data.values())
+    return sorted({formula for formula in formulas if formula})
+
+
+@pytest.mark.parametrize('formula', corpus_formulas())
+def test_corpus_formulas_compile(formula):
+    pricing.compile_formula(formula)
+
+
+@pytest.mark.parametrize('formula, variant, variables, expected', EXPECTED)
+def test_evaluate(formula, variant, variables, expected):
+    assert pricing.evaluate_formula(formula, variant, **variables) == pytest.approx(expected, abs=1e-9)
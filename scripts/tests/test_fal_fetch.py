@@ -0,0 +1,223 @@
+import hashlib
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import FIXTURES, SCRIPTS
+from fal_fetch import HostRateLimiter, PageFetcher, Progress
+from html_cache import HTMLCache
+
+with open(os.path.join(FIXTURES, 'links.txt')) as f:
+    LINKS = [link for link in f.read().split('\n') if link]
+
+
+def fixture_page(link):
+    with open(os.path.join(FIXTURES, 'models', link), 'rb') as f:
+        return f.read()
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Serves scripts/fixtures with an ETag per file; paths in `failures` answer 503 that many times first"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.seen.append((self.path, dict(self.headers)))
+            remaining = server.failures.get(self.path, 0)
+            if remaining:
+                server.failures[self.path] = remaining - 1
+        if remaining:
+            self.send_error(503)
+            return
+
+        path = self.translate_path(self.path)
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                etag = '"' + hashlib.sha256(f.read()).hexdigest()[:16] + '"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self.etag = etag
+        super().do_GET()
+
+    def end_headers(self):
+        etag = getattr(self, 'etag', None)
+        if etag:
+            self.send_header('ETag', etag)
+            self.etag = None
+        super().end_headers()
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(FixtureHandler, directory=FIXTURES))
+    server.lock = threading.Lock()
+    server.seen = []
+    server.failures = {}
+    server.base_url = f'http://127.0.0.1:{server.server_port}/models'
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def fetch_all(fetcher, links, headers_for=None):
+    pages = {}
+    threads = set()
+
+    def on_page(link, response):
+        threads.add(threading.current_thread())
+        response.raise_for_status()
+        pages[link] = response
+
+    progress = fetcher.fetch_all(links, on_page, headers_for, Progress(len(links), stream=io.StringIO()))
+    # on_page always runs in the calling thread
+    assert threads <= {threading.current_thread()}
+    return pages, progress
+
+
+def test_fetch_all(server):
+    fetcher = PageFetcher(server.base_url, workers=3, rate=0)
+    try:
+        pages, progress = fetch_all(fetcher, LINKS)
+    finally:
+        fetcher.close()
+    assert {link: response.content for link, response in pages.items()} == {link: fixture_page(link) for link in LINKS}
+    assert (progress.done, progress.failed) == (len(LINKS), 0)
+
+
+def test_failing_url_is_retried(server):
+    failing = '/models/' + LINKS[0]
+    server.failures[failing] = 2
+    fetcher = PageFetcher(server.base_url, workers=3, rate=0, retries=3, backoff=0.01)
+    try:
+        pages, progress = fetch_all(fetcher, LINKS)
+    finally:
+        fetcher.close()
+    assert pages[LINKS[0]].content == fixture_page(LINKS[0])
+    assert [path for path, _ in server.seen].count(failing) == 3
+    assert progress.failed == 0
+
+
+def test_failures_after_the_last_retry_are_counted(server):
+    server.failures['/models/' + LINKS[0]] = 5
+    fetcher = PageFetcher(server.base_url, workers=3, rate=0, retries=1, backoff=0.01)
+    try:
+        pages, progress = fetch_all(fetcher, LINKS)
+    finally:
+        fetcher.close()
+    assert sorted(pages) == sorted(LINKS[1:])
+    assert (progress.done, progress.failed) == (len(LINKS), 1)
+
+
+def test_rate_limiter_spaces_requests_per_host():
+    limiter = HostRateLimiter(rate=50)
+    started = time.monotonic()
+    for _ in range(6):
+        limiter.wait('a.example')
+    # Five intervals of 20 ms after the first request
+    assert time.monotonic() - started >= 0.1
+
+    started = time.monotonic()
+    limiter.wait('b.example')
+    assert time.monotonic() - started < 0.02
+
+
+def test_cache_revalidates_with_etag(server, tmp_path):
+    cache = HTMLCache(os.path.join(tmp_path, 'fal-html'))
+    fetcher = PageFetcher(server.base_url, workers=3, rate=0)
+    try:
+        pages, _ = fetch_all(fetcher, LINKS, cache.conditional_headers)
+        assert all(cache.store(link, response) for link, response in pages.items())
+        first_check = {link: cache.entries[link]['checked_at'] for link in LINKS}
+
+        pages, _ = fetch_all(fetcher, LINKS, cache.conditional_headers)
+    finally:
+        fetcher.close()
+
+    assert {response.status_code for response in pages.values()} == {304}
+    assert not any(cache.store(link, response) for link, response in pages.items())
+    for link in LINKS:
+        assert cache.get(link) == fixture_page(link).decode('utf-8')
+        assert cache.entries[link]['checked_at'] >= first_check[link]
+    revalidations = [headers for path, headers in server.seen[len(LINKS):]]
+    assert all('If-None-Match' in headers for headers in revalidations)
+
+
+def test_ttl_and_eviction(tmp_path):
+    cache = HTMLCache(os.path.join(tmp_path, 'fal-html'), ttl=60)
+
+    class Response:
+        status_code = 200
+        headers = {}
+
+        def __init__(self, body):
+            self.content = body
+
+    cache.store('a/fresh', Response(b'<p>a</p>'))
+    cache.store('b/old', Response(b'<p>b</p>'))
+    cache.store('c/old-shared', Response(b'<p>a</p>'))
+    cache.store('d/old-kept', Response(b'<p>d</p>'))
+    now = time.time()
+    assert cache.is_fresh('a/fresh', now + 30)
+    assert not cache.is_fresh('a/fresh', now + 90)
+
+    for link in ('b/old', 'c/old-shared', 'd/old-kept'):
+        cache.entries[link]['checked_at'] = now - 3600
+    assert cache.evict(keep=['d/old-kept'], max_age=600) == 1
+
+    assert sorted(cache.entries) == ['a/fresh', 'd/old-kept']
+    assert cache.get('a/fresh') == '<p>a</p>'
+    assert sorted(cache.blobs.hashes()) == sorted(entry['sha256'] for entry in cache.entries.values())
+
+
+def test_adopts_legacy_files(tmp_path):
+    root = os.path.join(tmp_path, 'fal-html')
+    cache = HTMLCache(root)
+    legacy = os.path.join(root, 'fal-ai_flux_dev.html')
+    with open(legacy, 'wb') as f:
+        f.write(fixture_page('fal-ai/flux/dev'))
+    os.utime(legacy, (1000, 1000))
+
+    cache.adopt_file('fal-ai/flux/dev', legacy)
+    cache.adopt_file('fal-ai/missing', os.path.join(root, 'fal-ai_missing.html'))
+    assert list(cache.entries) == ['fal-ai/flux/dev']
+    assert cache.entries['fal-ai/flux/dev']['checked_at'] == 1000
+    assert cache.conditional_headers('fal-ai/flux/dev') == {}
+    assert cache.get('fal-ai/flux/dev') == fixture_page('fal-ai/flux/dev').decode('utf-8')
+
+    # An entry that already exists is not replaced
+    with open(legacy, 'wb') as f:
+        f.write(b'<p>changed</p>')
+    cache.adopt_file('fal-ai/flux/dev', legacy)
+    assert cache.get('fal-ai/flux/dev') == fixture_page('fal-ai/flux/dev').decode('utf-8')
+
+
+def test_scrape_follows_link_order(server, tmp_path):
+    # Reversed, so output in completion or fixture order would not pass
+    links = LINKS[::-1]
+    with open(os.path.join(tmp_path, 'links.txt'), 'w') as f:
+        f.write('\n'.join(links) + '\n')
+    command = [sys.executable, os.path.join(SCRIPTS, 'fal-scrape.py'), '--concurrent', '--workers', '3',
+               '--rate', '0', '--base-url', server.base_url, '--output', 'prices.json']
+    result = subprocess.run(command, cwd=tmp_path, check=True, capture_output=True, text=True)
+
+    with open(os.path.join(tmp_path, 'prices.json')) as f:
+        prices = json.load(f)
+    # The whisper fixture has no price on it
+    assert 'No match found for fal-ai/whisper/large' in result.stdout
+    assert list(prices) == [link for link in links if link != 'fal-ai/whisper/large']
+    assert '$0.025' in prices['fal-ai/flux/dev']
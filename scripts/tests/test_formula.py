@@ -0,0 +1,17 @@
+import json
+import os
+
+import pytest
+
+import formula_legacy
+import pricing
+from conftest import FIXTURES
+
+with open(os.path.join(FIXTURES, 'fal-prices.json'), 'r', encoding='utf-8') as f:
+    CORPUS = json.load(f)
+
+
+@pytest.mark.parametrize('model_id', sorted(CORPUS))
+def test_rules_match_legacy_if_chain(model_id):
+    text = formula_legacy.strip_html(CORPUS[model_id])
+    assert pricing.create_inference_formula(text) == formula_legacy.create_inference_formula(text)
@@ -0,0 +1,70 @@
+import csv
+import json
+from pathlib import Path
+
+import pytest
+
+from csv_to_json import CSVToJSONConverter
+
+HEADERS = ['model_id', 'options', 'bip_price_usd', 'notes']
+ROWS = [
+    ['a/one', '', '0.025', ''],
+    ['b/two', '480p\n720p', '0.15\n0.3', 'café'],
+    ['c/three', '', '1', ''],
+    ['c/three', '', '2', 'repeated key'],
+]
+
+# Each edit is applied to the rows of the previous step
+EDITS = (
+    ('no change', lambda rows: rows),
+    ('price', lambda rows: [rows[0][:2] + ['0.03', '']] + rows[1:]),
+    ('added', lambda rows: rows + [['d/four', '', '0.5', 'new']]),
+    ('removed', lambda rows: rows[1:]),
+    ('reordered', lambda rows: rows[::-1]),
+    ('repeated key changed', lambda rows: [row[:2] + ['3'] + row[3:] if row[3] == 'repeated key' else row for row in rows]),
+    ('emptied', lambda rows: []),
+    ('refilled', lambda rows: ROWS),
+)
+
+
+def write_csv(path, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS)
+        writer.writerows(rows)
+
+
+@pytest.mark.parametrize('pretty', [False, True])
+def test_incremental_matches_full(tmp_path, pretty):
+    source = Path(tmp_path, 'prices.csv')
+    incremental = Path(tmp_path, 'incremental.json')
+    full = Path(tmp_path, 'full.json')
+    converter = CSVToJSONConverter()
+
+    rows = ROWS
+    write_csv(source, rows)
+    converter.convert_incremental(source, incremental, pretty)
+    for name, edit in EDITS:
+        rows = edit(rows)
+        write_csv(source, rows)
+        converter.convert_incremental(source, incremental, pretty)
+        converter.convert(source, full, pretty=pretty)
+        assert incremental.read_bytes() == full.read_bytes(), name
+
+
+def test_changelog_records_edits(tmp_path):
+    source = Path(tmp_path, 'prices.csv')
+    output = Path(tmp_path, 'prices.json')
+    converter = CSVToJSONConverter()
+
+    write_csv(source, ROWS)
+    converter.convert_incremental(source, output)
+    write_csv(source, [ROWS[0][:2] + ['0.03', '']] + ROWS[1:3] + [['d/four', '', '0.5', '']])
+    converter.convert_incremental(source, output)
+
+    with open(Path(tmp_path, 'prices.json.changelog.ndjson'), encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f]
+    assert len(entries) == 1
+    assert entries[0]['changed'] == [{'key': 'a/one', 'fields': {'bip_price_usd': {'old': 0.025, 'new': 0.03}}}]
+    assert [row['model_id'] for row in entries[0]['added']] == ['d/four']
+    assert [row['notes'] for row in entries[0]['removed']] == ['repeated key']
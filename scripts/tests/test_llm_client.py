@@ -0,0 +1,81 @@
+import asyncio
+import csv
+import os
+import threading
+
+import pytest
+
+import process_llm
+from llm_stub_server import make_server
+from process_llm import AsyncLLMClient
+
+TEXTS = [f'${n}.00 per image' for n in range(1, 25)]
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Start a stub /chat/completions server with the given options; returns its handler class"""
+    servers = []
+
+    def start(**options):
+        server = make_server(0, **options)
+        threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        servers.append(server)
+        monkeypatch.setattr(process_llm, 'LLM_API_BASE', f'http://127.0.0.1:{server.server_port}')
+        monkeypatch.setattr(process_llm, 'LLM_API_KEY', 'stub')
+        return server.RequestHandlerClass
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def query_all(texts, concurrency, batch_size=1, retries=5):
+    client = AsyncLLMClient(concurrency=concurrency, retries=retries, backoff=0.01)
+    try:
+        answers = asyncio.run(client.query_all(texts, batch_size=batch_size))
+    finally:
+        client.close()
+    return [answer for answer, _ in answers], client.usage
+
+
+def test_answers_stay_in_input_order(stub):
+    stats = stub(jitter=0.02)
+    answers, usage = query_all(TEXTS, concurrency=4)
+    assert answers == [f'stub: {text}' for text in TEXTS]
+    assert 1 < stats.max_in_flight <= 4
+    assert usage['requests'] == stats.requests_seen == len(TEXTS)
+    assert usage['prompt_tokens'] > 0 and usage['completion_tokens'] > 0
+
+
+def test_rate_limited_requests_are_retried(stub):
+    stats = stub(rate_limit_every=3)
+    # Enough retries that no request is rate limited on every attempt
+    answers, usage = query_all(TEXTS, concurrency=4, retries=20)
+    assert answers == [f'stub: {text}' for text in TEXTS]
+    assert stats.rate_limited > 0
+    assert usage['requests'] == stats.requests_seen == len(TEXTS) + stats.rate_limited
+
+
+def test_batches_fall_back_for_dropped_slots(stub):
+    stats = stub(jitter=0.01, drop_slot_every=2)
+    answers, usage = query_all(TEXTS, concurrency=3, batch_size=5)
+    assert answers == [f'stub: {text}' for text in TEXTS]
+    assert stats.batches_seen == 5
+    assert usage['slot_retries'] == 2
+    assert usage['requests'] == stats.requests_seen == 5 + 2
+
+
+def test_process_csv_against_stub(stub, tmp_path):
+    stub(jitter=0.01, drop_slot_every=3)
+    input_file = os.path.join(tmp_path, 'plain.csv')
+    output_file = os.path.join(tmp_path, 'out.csv')
+    with open(input_file, 'w', newline='') as f:
+        csv.writer(f).writerows([['Model ID', 'Plain Text']] + [[f'm/{n}', text] for n, text in enumerate(TEXTS)])
+
+    assert process_llm.process_csv(input_file, output_file, concurrency=4, batch_size=3) == len(TEXTS)
+    with open(output_file, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [row['Model ID'] for row in rows] == [f'm/{n}' for n in range(len(TEXTS))]
+    assert [row['LLM Response'] for row in rows] == [f'stub: {text}' for text in TEXTS]
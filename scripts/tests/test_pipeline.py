@@ -0,0 +1,33 @@
+import os
+
+from pipeline import Pipeline, Stage
+
+STAGES = (
+    Stage('first', 'process_units.py', ('a.csv', 'b.csv'), inputs=('a.csv',), outputs=('b.csv',)),
+    Stage('second', 'process_units.py', ('b.csv', 'c.csv'), inputs=('b.csv',), outputs=('c.csv',)),
+    Stage('third', 'process_units.py', ('c.csv', 'd.csv'), inputs=('c.csv',), outputs=('d.csv',)),
+)
+
+
+def write(root, name, text):
+    with open(os.path.join(root, name), 'w') as f:
+        f.write(text)
+
+
+def test_dry_run_marks_downstream_stages_stale(tmp_path):
+    for name in ('a.csv', 'b.csv', 'c.csv', 'd.csv'):
+        write(tmp_path, name, name)
+    built = Pipeline(STAGES, root=str(tmp_path))
+    for stage in STAGES:
+        built.finish(stage, built.check(stage)[1])
+
+    assert Pipeline(STAGES, root=str(tmp_path), dry_run=True).run() == 0
+    write(tmp_path, 'a.csv', 'changed')
+    pipeline = Pipeline(STAGES, root=str(tmp_path), dry_run=True)
+    assert pipeline.run() == 0
+
+    assert pipeline.results == {
+        'first': {'status': 'stale', 'reason': 'a.csv changed'},
+        'second': {'status': 'stale', 'reason': 'first stale'},
+        'third': {'status': 'stale', 'reason': 'second stale'},
+    }
@@ -0,0 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from pricing.text import HTMLStripper, strip_html
+
+
+def test_strip_html_from_several_threads():
+    snippets = [f'<span class="price">${n}.00</span> per <a href="/units">{n} images</a>' for n in range(2000)]
+    expected = [HTMLStripper().strip(snippet) for snippet in snippets]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(strip_html.__wrapped__, snippets)) == expected
@@ -0,0 +1,103 @@
+import asyncio
+import csv
+import os
+
+import pytest
+
+import process_llm
+from llm_cache import LLMCache
+from process_llm import (BATCH_PROMPT_TEMPLATE, LLM_MODEL, PROMPT_TEMPLATE, AsyncLLMClient, answer_batch,
+                         input_signature, load_checkpoint, parse_batch_response, save_checkpoint)
+
+
+def test_answers_are_cached_under_their_template(tmp_path):
+    cache = LLMCache(os.path.join(tmp_path, 'cache.sqlite'))
+    batch = [(1, 'a/model', '$0.01 per image'), (2, 'b/model', '$0.02 per image')]
+    both = (BATCH_PROMPT_TEMPLATE, PROMPT_TEMPLATE)
+    try:
+        fresh = lambda items: [('batched', BATCH_PROMPT_TEMPLATE), ('retried', PROMPT_TEMPLATE)]
+        assert answer_batch(batch, fresh, cache, both) == ['batched', 'retried']
+        assert (cache.hits, cache.misses) == (0, 2)
+        assert cache.get(LLM_MODEL, BATCH_PROMPT_TEMPLATE, '$0.01 per image', 0.1) == 'batched'
+        assert cache.get(LLM_MODEL, PROMPT_TEMPLATE, '$0.01 per image', 0.1) is None
+        assert cache.get(LLM_MODEL, PROMPT_TEMPLATE, '$0.02 per image', 0.1) == 'retried'
+
+        # A single-row run only reuses single-row answers
+        single = lambda items: [('single', PROMPT_TEMPLATE) for _ in items]
+        assert answer_batch(batch, single, cache) == ['single', 'retried']
+        assert answer_batch(batch, lambda items: [], cache, both) == ['batched', 'retried']
+
+        cache.put('other/model', PROMPT_TEMPLATE, 'text', 0.1, 'stale')
+        assert cache.prune(LLM_MODEL, PROMPT_TEMPLATE, BATCH_PROMPT_TEMPLATE) == 1
+    finally:
+        cache.close()
+
+
+def test_query_batch_reports_the_template_of_each_answer(monkeypatch):
+    client = AsyncLLMClient(concurrency=2)
+
+    async def request(prompt, max_tokens):
+        # Slot 2 is missing from the reply
+        return '[1] one\n[3] three', 'stop'
+
+    async def query(plain_text):
+        return f'single {plain_text}'
+
+    monkeypatch.setattr(client, 'request', request)
+    monkeypatch.setattr(client, 'query', query)
+    try:
+        answers = asyncio.run(client.query_all(['a', 'b', 'c', 'd'], batch_size=3))
+    finally:
+        client.close()
+    assert answers == [('one', BATCH_PROMPT_TEMPLATE), ('single b', PROMPT_TEMPLATE),
+                       ('three', BATCH_PROMPT_TEMPLATE), ('single d', PROMPT_TEMPLATE)]
+    assert client.usage['slot_retries'] == 1
+
+
+@pytest.mark.parametrize('content, truncated, expected', [
+    ('[1] a\n[2] b\n[3] c', False, ['a', 'b', 'c']),
+    ('[2] b\n  [1] a\nresolution:720p = 2', False, ['a\nresolution:720p = 2', 'b', None]),
+    ('[1] a\n[3] c', False, ['a', None, 'c']),
+    ('[1] a\n[2] b\n[2] again\n[3] c', False, ['a', None, 'c']),
+    ('[0] zero\n[1] a\n[4] four\n[3] c', False, ['a', None, 'c']),
+    ('[1] a\n[2]\n[3] c', False, ['a', None, 'c']),
+    ('sorry, I cannot help with that', False, [None, None, None]),
+    ('[1] a\n[2] b\n[3] seconds *', True, ['a', 'b', None]),
+    ('[1] a\n[2] seconds', True, ['a', None, None]),
+])
+def test_parse_batch_response(content, truncated, expected):
+    assert parse_batch_response(content, 3, truncated) == expected
+
+
+def test_checkpoint_is_ignored_when_the_input_changes(tmp_path):
+    input_file = os.path.join(tmp_path, 'plain.csv')
+    checkpoint_file = os.path.join(tmp_path, 'out.csv.checkpoint')
+    with open(input_file, 'w') as f:
+        f.write('Model ID,Plain Text\na/model,$0.01 per image\n')
+    state = {'input': os.path.abspath(input_file), 'signature': input_signature(input_file),
+             'row': 1, 'written': 1, 'offset': 40}
+    save_checkpoint(checkpoint_file, state)
+    assert load_checkpoint(checkpoint_file, input_file) == state
+
+    with open(input_file, 'a') as f:
+        f.write('b/model,$0.02 per image\n')
+    assert load_checkpoint(checkpoint_file, input_file) is None
+
+
+def test_resumed_run_retries_failed_rows(tmp_path, monkeypatch):
+    input_file = os.path.join(tmp_path, 'plain.csv')
+    output_file = os.path.join(tmp_path, 'out.csv')
+    with open(input_file, 'w', newline='') as f:
+        csv.writer(f).writerows([['Model ID', 'Plain Text']] + [[f'm/{n}', f'${n} per image'] for n in range(1, 5)])
+
+    monkeypatch.setattr(process_llm, 'query_llm', lambda text: 'Error: 503' if text == '$2 per image' else f'ok {text}')
+    assert process_llm.process_csv(input_file, output_file) == 4
+    assert os.path.exists(output_file + process_llm.CHECKPOINT_SUFFIX)
+
+    queried = []
+    monkeypatch.setattr(process_llm, 'query_llm', lambda text: queried.append(text) or f'ok {text}')
+    assert process_llm.process_csv(input_file, output_file) == 4
+    assert queried == ['$2 per image', '$3 per image', '$4 per image']
+    assert not os.path.exists(output_file + process_llm.CHECKPOINT_SUFFIX)
+    with open(output_file, newline='') as f:
+        assert [row['LLM Response'] for row in csv.DictReader(f)] == [f'ok ${n} per image' for n in range(1, 5)]